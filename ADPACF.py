@@ -1,7 +1,28 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import json
-import os
+from adpacf_core import Project, ProjectError, PROJECT_EXTENSION, COMBINATIONS_ADJACENT, COMBINATIONS_ALL_PAIRS
+from adpacf_analytics import analyze_structure
+from adpacf_binary import DEFERRED_CHUNK
+from adpacf_export import EXPORT_FORMATS, export_report
+from adpacf_graphview import GraphViewWindow
+from adpacf_history import ProjectHistory
+from adpacf_import import (
+    import_classifiers, import_lines, import_table, is_table_text, read_table, read_table_file, split_lines
+)
+from adpacf_journal import ProjectJournal, replay_journal, save_atomically
+from adpacf_listview import VirtualListbox
+from adpacf_search import HIT_CLASSIFIER, HIT_ELEMENT, ProjectIndex
+from adpacf_tasks import TaskRunner
+from adpacf_matrix import RelevanceMatrix, matrix_available
+from adpacf_profiling import instrumentation, instrumented
+
+TREE_PLACEHOLDER_TAG = "placeholder"  # Тег заглушки нераскрытого узла дерева результатов
+MAX_SEARCH_HITS = 1000  # Число результатов поиска, показываемых в списке
+PROJECT_FILETYPES = [
+    ("АДПАЦФ проекты", "*.adpacf"),
+    ("АДПАЦФ проекты (двоичный формат)", "*.adpacfb"),
+    ("Все файлы", "*.*")
+]
 
 class ADPACFApp:
     def __init__(self, root):
@@ -10,11 +31,23 @@ class ADPACFApp:
         self.root.geometry("800x600")
 
         # Данные проекта
-        self.project_name = "Новый проект"
-        self.classifiers = []
-        self.elements = {}
-        self.structure = []
-        self.current_stage = 0  # 0-ввод признаков, 1-ввод элементов, 2-анализ связей, 3-результаты
+        self.journal = None  # журнал изменений открытого или сохранённого проекта
+        self.journal_check_pending = False  # запланирована ли проверка, не пора ли свернуть журнал
+        self.history = None  # история отмены и повтора изменений текущего проекта
+        self.tasks = TaskRunner(root)  # фоновые операции открытия, сохранения и экспорта
+        self.diagnostics_window = None
+        self.classifiers_listbox = None  # списки экранов ввода, обновляемые по изменениям проекта
+        self.elements_listbox = None
+        self.tree = None        # дерево результатов, обновляемое по изменениям структуры
+        self.tree_keys = {}     # узел дерева -> (признак, элемент)
+        self.tree_items = {}    # (признак, элемент) -> {узел дерева: None}, где он показан
+        self.search_index = None  # поисковый индекс проекта, строится при открытии в фоновой операции
+        self.search_hits = []
+        self.set_project(Project())
+
+        # Ленивое построение дерева результатов: потомки узла создаются при его раскрытии
+        self.lazy_tree = True
+        self.drop_closed_branches = True
 
         # Создание интерфейса
         self.create_main_frame()
@@ -22,6 +55,7 @@ class ADPACFApp:
 
         # Начать с ввода признаков
         self.show_classifiers_input()
+        self.root.protocol("WM_DELETE_WINDOW", self.quit_app)
 
     def create_main_frame(self):
         """Создание основного фрейма приложения"""
@@ -36,25 +70,187 @@ class ADPACFApp:
         file_menu.add_command(label="Открыть", command=self.open_project)
         file_menu.add_command(label="Сохранить", command=self.save_project)
         file_menu.add_separator()
-        file_menu.add_command(label="Выход", command=self.root.quit)
+        file_menu.add_command(label="Выход", command=self.quit_app)
         menubar.add_cascade(label="Файл", menu=file_menu)
+        self.edit_menu = tk.Menu(menubar, tearoff=0, postcommand=self.update_edit_menu)
+        self.edit_menu.add_command(label="Отменить", accelerator="Ctrl+Z", command=self.undo)
+        self.edit_menu.add_command(label="Повторить", accelerator="Ctrl+Y", command=self.redo)
+        menubar.add_cascade(label="Правка", menu=self.edit_menu)
         help_menu = tk.Menu(menubar, tearoff=0)
         help_menu.add_command(label="О программе", command=self.about)
+        self.profiling_var = tk.BooleanVar(value=False)
+        help_menu.add_checkbutton(label="Профилирование (cProfile)", variable=self.profiling_var, command=self.toggle_profiling)
         menubar.add_cascade(label="Помощь", menu=help_menu)
         self.root.config(menu=menubar)
+        # Окно диагностики не показывается в меню и открывается сочетанием Ctrl+Shift+D
+        self.root.bind_all("<Control-D>", lambda event: self.show_diagnostics())
+        self.root.bind_all("<Control-z>", lambda event: self.undo())
+        self.root.bind_all("<Control-y>", lambda event: self.redo())
 
     def clear_main_frame(self):
         """Очистка основного фрейма"""
+        self.classifiers_listbox = None
+        self.elements_listbox = None
+        self.tree = None
+        self.tree_keys = {}
+        self.tree_items = {}
         for widget in self.main_frame.winfo_children():
             widget.destroy()
 
+    def set_project(self, project, search_index=None):
+        """Сделать проект текущим и подписаться на его изменения; search_index - уже построенный индекс проекта"""
+        if self.search_index is not None:
+            self.search_index.close()
+        self.search_index = search_index if search_index is not None else ProjectIndex(project)
+        if self.history is not None:
+            self.history.close()
+        self.project = project
+        project.listeners.append(self.on_project_change)
+        self.history = ProjectHistory(project)
+
+    def on_project_change(self, change):
+        """Отразить изменение проекта в открытом списке признаков или элементов"""
+        op = change['op']
+        if self.journal is not None and not self.journal_check_pending:
+            # Проверить журнал, когда изменение (и вся отмена из нескольких шагов) завершится
+            self.journal_check_pending = True
+            self.root.after_idle(self.compact_journal)
+        if self.classifiers_listbox is not None:
+            if op == 'add_classifier':
+                self.classifiers_listbox.insert(tk.END, change['name'])
+            elif op == 'insert_classifier':
+                self.classifiers_listbox.insert(change['index'], change['name'])
+            elif op == 'remove_classifier':
+                self.classifiers_listbox.delete(change['index'])
+            elif op == 'rename_classifier':
+                self.classifiers_listbox.replace(change['index'], change['new'])
+        if self.elements_listbox is not None and change.get('classifier') == self.current_classifier_var.get():
+            if op == 'add_element':
+                self.elements_listbox.insert(tk.END, change['name'])
+            elif op == 'add_elements':
+                self.elements_listbox.extend(change['names'])
+            elif op == 'insert_element':
+                self.elements_listbox.insert(change['index'], change['name'])
+            elif op == 'remove_element':
+                self.elements_listbox.delete(change['index'])
+            elif op == 'remove_elements':
+                self.update_elements_list()
+            elif op == 'rename_element':
+                self.elements_listbox.replace(change['index'], change['new'])
+        if self.tree is not None:
+            if op == 'add_connection':
+                self.patch_tree_add(change)
+            elif op == 'remove_node':
+                self.patch_tree_remove(change['classifier'], change['element'])
+            elif op in ('rename_element', 'rename_node'):
+                self.patch_tree_rename(change['classifier'], change['old'], change['new'])
+            elif op in (
+                'clear_structure', 'reset_analysis', 'restore_structure', 'patch_structure', 'decision', 'decisions',
+                'rename_classifier'
+            ):
+                self.build_structure_tree()
+
+    def update_edit_menu(self):
+        """Показать в меню «Правка», какие изменения будут отменены и повторены"""
+        for index, label, title in (
+            (0, "Отменить", self.history.undo_title()),
+            (1, "Повторить", self.history.redo_title()),
+        ):
+            self.edit_menu.entryconfig(
+                index, label=f"{label}: {title}" if title else label,
+                state=tk.NORMAL if title and not self.tasks.busy else tk.DISABLED
+            )
+
+    def undo(self):
+        """Отменить последнее изменение проекта"""
+        if self.tasks.busy or not self.history.can_undo:
+            return
+        try:
+            change = self.history.undo()
+        except (ProjectError, KeyError, IndexError) as e:
+            messagebox.showwarning("Предупреждение", f"Не удалось отменить изменение: {str(e)}")
+            return
+        if change['op'] == 'decision' and self.project.current_stage == 2:
+            # Вернуться к комбинации, решение по которой отменено
+            self.project.analysis_cursor = tuple(change['combination'])
+        self.refresh_after_history(change)
+
+    def redo(self):
+        """Повторить последнее отменённое изменение проекта"""
+        if self.tasks.busy or not self.history.can_redo:
+            return
+        try:
+            change = self.history.redo()
+        except (ProjectError, KeyError, IndexError) as e:
+            messagebox.showwarning("Предупреждение", f"Не удалось повторить изменение: {str(e)}")
+            return
+        self.refresh_after_history(change)
+
+    def refresh_after_history(self, change):
+        """Обновить экраны, которые не следят за изменением проекта по уведомлениям"""
+        stage = self.project.current_stage
+        if stage == 1 and change['op'] in ('add_classifier', 'insert_classifier', 'remove_classifier', 'rename_classifier'):
+            self.show_elements_input()
+        elif stage == 2:
+            self.show_analysis()
+
+    def attach_journal(self, filepath, reset=False):
+        """Начать журналирование изменений проекта рядом с файлом filepath"""
+        self.close_journal()
+        self.journal = ProjectJournal(self.project, filepath)
+        if reset:
+            self.journal.compact_without_saving()
+
+    def compact_journal(self):
+        """Свернуть журнал в файл проекта фоновой операцией, если в нём накопилось много записей"""
+        self.journal_check_pending = False
+        journal = self.journal
+        if journal is None or not journal.compact_due or self.tasks.busy:
+            return
+
+        def compacted(result):
+            if self.journal is journal:
+                journal.compact_without_saving()
+
+        def not_compacted(error=None):
+            journal.postpone_compaction()
+            if error is not None:
+                messagebox.showerror(
+                    "Ошибка",
+                    f"Не удалось сохранить изменения из журнала в файл проекта: {str(error)}\n"
+                    "Изменения сохранены в журнале и будут восстановлены при открытии проекта."
+                )
+
+        self.tasks.run(
+            "Сохранение изменений",
+            instrumented("compact_journal")(
+                lambda control: save_atomically(journal.project, journal.project_path, control)
+            ),
+            compacted, on_error=not_compacted, on_cancel=not_compacted
+        )
+
+    def close_journal(self, compact=False):
+        """Прекратить журналирование; при compact=True сохранить изменения в файл проекта"""
+        if self.journal is not None:
+            journal, self.journal = self.journal, None
+            try:
+                journal.close(compact)
+            except Exception as e:
+                messagebox.showerror("Ошибка", f"Не удалось сохранить изменения из журнала: {str(e)}")
+
+    def quit_app(self):
+        """Выход из программы с сохранением журнала в файл проекта"""
+        if self.tasks.busy:
+            messagebox.showwarning("Предупреждение", "Дождитесь завершения или отмените текущую операцию")
+            return
+        self.tasks.shutdown()
+        self.close_journal(compact=True)
+        self.root.quit()
+
     def new_project(self):
         """Создание нового проекта"""
-        self.project_name = "Новый проект"
-        self.classifiers = []
-        self.elements = {}
-        self.structure = []
-        self.current_stage = 0
+        self.close_journal(compact=True)
+        self.set_project(Project())
         self.clear_main_frame()
         self.show_classifiers_input()
 
@@ -62,54 +258,121 @@ class ADPACFApp:
         """Открытие существующего проекта"""
         filepath = filedialog.askopenfilename(
             title="Открыть проект",
-            filetypes=[("АДПАЦФ проекты", "*.adpacf"), ("Все файлы", "*.*")]
+            filetypes=PROJECT_FILETYPES
         )
         if filepath:
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                self.project_name = data.get('project_name', "Новый проект")
-                self.classifiers = data.get('classifiers', [])
-                self.elements = data.get('elements', {})
-                self.structure = data.get('structure', [])
-                self.current_stage = data.get('current_stage', 0)
+            previous_path = self.journal.project_path if self.journal is not None else None
+            self.close_journal(compact=True)
+
+            def load(control):
+                with instrumentation.timed("open_project"):
+                    project = Project.load(filepath, defer_comments=True, control=control)
+                    replayed = replay_journal(project, filepath)
+                    if replayed:
+                        save_atomically(project, filepath, control)
+                    # Поисковый индекс строится здесь, а не при первом поиске в потоке окна
+                    return project, replayed, ProjectIndex(project)
+
+            def loaded(result):
+                project, replayed, search_index = result
+                self.set_project(project, search_index)
+                self.attach_journal(filepath, reset=bool(replayed))
                 self.clear_main_frame()
-                if self.current_stage == 0:
+                if self.project.current_stage == 0:
                     self.show_classifiers_input()
-                elif self.current_stage == 1:
+                elif self.project.current_stage == 1:
                     self.show_elements_input()
-                elif self.current_stage == 2:
+                elif self.project.current_stage == 2:
                     self.show_analysis()
                 else:
                     self.show_results()
-                messagebox.showinfo("Успех", f"Проект '{self.project_name}' успешно загружен")
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Не удалось загрузить проект: {str(e)}")
+                if self.project.deferred_comments is not None:
+                    self.root.after_idle(self.load_deferred_comments, self.project)
+                if replayed:
+                    messagebox.showinfo(
+                        "Успех",
+                        f"Проект '{self.project.project_name}' успешно загружен.\n"
+                        f"Восстановлено несохранённых изменений из журнала: {replayed}"
+                    )
+                else:
+                    messagebox.showinfo("Успех", f"Проект '{self.project.project_name}' успешно загружен")
+
+            def not_loaded(error=None):
+                if previous_path is not None:
+                    self.attach_journal(previous_path)
+                if error is not None:
+                    messagebox.showerror("Ошибка", f"Не удалось загрузить проект: {str(error)}")
+
+            self.tasks.run("Открытие проекта", load, loaded, on_error=not_loaded, on_cancel=not_loaded)
 
     def save_project(self):
         """Сохранение проекта"""
-        if not hasattr(self, 'project_name'):
-            self.project_name = "Новый проект"
         filepath = filedialog.asksaveasfilename(
             title="Сохранить проект",
-            defaultextension=".adpacf",
-            filetypes=[("АДПАЦФ проекты", "*.adpacf"), ("Все файлы", "*.*")],
-            initialfile=self.project_name
+            defaultextension=PROJECT_EXTENSION,
+            filetypes=PROJECT_FILETYPES,
+            initialfile=self.project.project_name
         )
         if filepath:
-            try:
-                data = {
-                    'project_name': self.project_name,
-                    'classifiers': self.classifiers,
-                    'elements': self.elements,
-                    'structure': self.structure,
-                    'current_stage': self.current_stage
-                }
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+            previous_path = self.journal.project_path if self.journal is not None else None
+            self.close_journal(compact=previous_path is not None and previous_path != filepath)
+
+            def saved(result):
+                self.attach_journal(filepath, reset=True)
                 messagebox.showinfo("Успех", "Проект успешно сохранен")
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Не удалось сохранить проект: {str(e)}")
+
+            def not_saved(error=None):
+                if previous_path is not None:
+                    self.attach_journal(previous_path)
+                if error is not None:
+                    messagebox.showerror("Ошибка", f"Не удалось сохранить проект: {str(error)}")
+
+            self.tasks.run(
+                "Сохранение проекта",
+                instrumented("save_project")(lambda control: save_atomically(self.project, filepath, control)),
+                saved, on_error=not_saved, on_cancel=not_saved
+            )
+
+    def load_deferred_comments(self, project):
+        """Порциями загрузить комментарии связей, отложенные при открытии двоичного проекта"""
+        if project is not self.project:
+            return
+        if self.tasks.busy:
+            # Фоновая операция может читать те же связи; продолжить после её завершения
+            self.root.after(100, self.load_deferred_comments, project)
+            return
+        if project.load_deferred_comments(DEFERRED_CHUNK):
+            self.root.after(1, self.load_deferred_comments, project)
+            return
+        if not self.search_index.comments_indexed:
+            self.search_index.index_comments()
+        if project.current_stage == 3 and self.tree is not None:
+            self.refresh_tree_comments()
+
+    def toggle_profiling(self):
+        """Включить или выключить профилировщик cProfile"""
+        if self.profiling_var.get():
+            instrumentation.start_profile()
+            return
+        filepath = filedialog.asksaveasfilename(
+            title="Сохранить профиль",
+            defaultextension=".prof",
+            filetypes=[("Профиль cProfile", "*.prof"), ("Все файлы", "*.*")],
+            initialfile="adpacf.prof"
+        )
+        try:
+            instrumentation.stop_profile(filepath or None)
+        except OSError as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить файл профиля, сводка доступна в окне диагностики: {str(e)}")
+        self.show_diagnostics()
+
+    def show_diagnostics(self):
+        """Окно диагностики с замерами операций"""
+        if self.diagnostics_window is not None and self.diagnostics_window.window.winfo_exists():
+            self.diagnostics_window.refresh()
+            self.diagnostics_window.window.lift()
+        else:
+            self.diagnostics_window = DiagnosticsWindow(self.root)
 
     def about(self):
         """Окно 'О программе'"""
@@ -124,21 +387,15 @@ class ADPACFApp:
     def show_classifiers_input(self):
         """Показать интерфейс ввода признаков структуризации"""
         self.clear_main_frame()
-        self.current_stage = 0
+        self.project.current_stage = 0
         ttk.Label(self.main_frame, text="Ввод признаков структуризации", font=('Arial', 14)).pack(pady=10)
         input_frame = ttk.Frame(self.main_frame)
         input_frame.pack(fill=tk.X, pady=5)
         self.new_classifier_var = tk.StringVar()
         ttk.Entry(input_frame, textvariable=self.new_classifier_var, width=40).pack(side=tk.LEFT, padx=5)
         ttk.Button(input_frame, text="Добавить", command=self.add_classifier).pack(side=tk.LEFT)
-        ttk.Button(input_frame, text="Вставить", command=lambda: self.paste_from_clipboard(self.new_classifier_var)).pack(side=tk.LEFT, padx=5)
-        list_frame = ttk.Frame(self.main_frame)
-        list_frame.pack(fill=tk.BOTH, expand=True, pady=10)
-        self.classifiers_listbox = tk.Listbox(list_frame, selectmode=tk.SINGLE)
-        self.classifiers_listbox.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.classifiers_listbox.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.classifiers_listbox.config(yscrollcommand=scrollbar.set)
+        ttk.Button(input_frame, text="Вставить", command=self.paste_classifiers).pack(side=tk.LEFT, padx=5)
+        self.classifiers_listbox = self.create_filtered_list()
         buttons_frame = ttk.Frame(self.main_frame)
         buttons_frame.pack(fill=tk.X, pady=5)
         ttk.Button(buttons_frame, text="Удалить", command=self.remove_classifier).pack(side=tk.LEFT, padx=5)
@@ -148,34 +405,25 @@ class ADPACFApp:
 
     def add_classifier(self):
         """Добавить новый признак структуризации"""
-        new_classifier = self.new_classifier_var.get().strip()
-        if new_classifier:
-            if new_classifier not in self.classifiers:
-                self.classifiers.append(new_classifier)
-                self.new_classifier_var.set("")
-                self.update_classifiers_list()
-            else:
-                messagebox.showwarning("Предупреждение", "Такой признак уже существует")
-        else:
-            messagebox.showwarning("Предупреждение", "Введите название признака")
+        try:
+            self.project.add_classifier(self.new_classifier_var.get())
+        except ProjectError as e:
+            messagebox.showwarning("Предупреждение", str(e))
+            return
+        self.new_classifier_var.set("")
 
     def remove_classifier(self):
         """Удалить выбранный признак структуризации"""
         selection = self.classifiers_listbox.curselection()
         if selection:
-            index = selection[0]
-            classifier = self.classifiers[index]
-            if classifier in self.elements:
-                del self.elements[classifier]
-            self.classifiers.pop(index)
-            self.update_classifiers_list()
+            self.project.remove_classifier(selection[0])
 
     def edit_classifier(self):
         """Редактировать выбранный признак структуризации"""
         selection = self.classifiers_listbox.curselection()
         if selection:
             index = selection[0]
-            old_classifier = self.classifiers[index]
+            old_classifier = self.project.classifiers[index]
             edit_window = tk.Toplevel(self.root)
             edit_window.title("Редактирование признака")
             edit_window.geometry("300x100")
@@ -183,30 +431,34 @@ class ADPACFApp:
             edit_var = tk.StringVar(value=old_classifier)
             ttk.Entry(edit_window, textvariable=edit_var, width=30).pack(pady=5)
             def save_edit():
-                new_name = edit_var.get().strip()
-                if new_name and new_name != old_classifier:
-                    if new_name not in self.classifiers:
-                        self.classifiers[index] = new_name
-                        if old_classifier in self.elements:
-                            self.elements[new_name] = self.elements.pop(old_classifier)
-                        self.update_classifiers_list()
-                        edit_window.destroy()
-                    else:
-                        messagebox.showwarning("Предупреждение", "Такой признак уже существует")
-                else:
-                    messagebox.showwarning("Предупреждение", "Введите новое название признака")
+                try:
+                    self.project.rename_classifier(index, edit_var.get())
+                except ProjectError as e:
+                    messagebox.showwarning("Предупреждение", str(e))
+                    return
+                edit_window.destroy()
             ttk.Button(edit_window, text="Сохранить", command=save_edit).pack(pady=5)
 
+    def create_filtered_list(self):
+        """Создать поле фильтра и виртуальный список под ним"""
+        filter_frame = ttk.Frame(self.main_frame)
+        filter_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Label(filter_frame, text="Фильтр:").pack(side=tk.LEFT)
+        filter_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=filter_var, width=40).pack(side=tk.LEFT, padx=5)
+        listbox = VirtualListbox(self.main_frame)
+        listbox.pack(fill=tk.BOTH, expand=True, pady=(5, 10))
+        filter_var.trace_add('write', lambda *_: listbox.set_filter(filter_var.get()))
+        return listbox
+
     def update_classifiers_list(self):
         """Обновить список признаков структуризации"""
-        self.classifiers_listbox.delete(0, tk.END)
-        for classifier in self.classifiers:
-            self.classifiers_listbox.insert(tk.END, classifier)
+        self.classifiers_listbox.set_items(self.project.classifiers)
 
     def go_to_elements_input(self):
         """Перейти к вводу элементов структуризации"""
-        if len(self.classifiers) > 0:
-            self.current_stage = 1
+        if len(self.project.classifiers) > 0:
+            self.project.current_stage = 1
             self.show_elements_input()
         else:
             messagebox.showwarning("Предупреждение", "Добавьте хотя бы один признак структуризации")
@@ -214,19 +466,19 @@ class ADPACFApp:
     def show_elements_input(self):
         """Показать интерфейс ввода элементов структуризации"""
         self.clear_main_frame()
-        self.current_stage = 1
+        self.project.current_stage = 1
         ttk.Label(self.main_frame, text="Ввод элементов структуризации", font=('Arial', 14)).pack(pady=10)
         classifier_frame = ttk.Frame(self.main_frame)
         classifier_frame.pack(fill=tk.X, pady=5)
         ttk.Label(classifier_frame, text="Текущий признак:").pack(side=tk.LEFT)
         self.current_classifier_var = tk.StringVar()
-        if self.classifiers:
-            self.current_classifier_var.set(self.classifiers[0])
+        if self.project.classifiers:
+            self.current_classifier_var.set(self.project.classifiers[0])
         classifier_menu = ttk.OptionMenu(
             classifier_frame,
             self.current_classifier_var,
-            self.classifiers[0] if self.classifiers else "",
-            *self.classifiers
+            self.project.classifiers[0] if self.project.classifiers else "",
+            *self.project.classifiers
         )
         classifier_menu.pack(side=tk.LEFT, padx=5)
         input_frame = ttk.Frame(self.main_frame)
@@ -234,14 +486,9 @@ class ADPACFApp:
         self.new_element_var = tk.StringVar()
         ttk.Entry(input_frame, textvariable=self.new_element_var, width=40).pack(side=tk.LEFT, padx=5)
         ttk.Button(input_frame, text="Добавить", command=self.add_element).pack(side=tk.LEFT)
-        ttk.Button(input_frame, text="Вставить", command=lambda: self.paste_from_clipboard(self.new_element_var)).pack(side=tk.LEFT, padx=5)
-        list_frame = ttk.Frame(self.main_frame)
-        list_frame.pack(fill=tk.BOTH, expand=True, pady=10)
-        self.elements_listbox = tk.Listbox(list_frame, selectmode=tk.SINGLE)
-        self.elements_listbox.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.elements_listbox.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.elements_listbox.config(yscrollcommand=scrollbar.set)
+        ttk.Button(input_frame, text="Вставить", command=self.paste_elements).pack(side=tk.LEFT, padx=5)
+        ttk.Button(input_frame, text="Импорт из файла", command=self.import_elements_file).pack(side=tk.LEFT)
+        self.elements_listbox = self.create_filtered_list()
         buttons_frame = ttk.Frame(self.main_frame)
         buttons_frame.pack(fill=tk.X, pady=5)
         ttk.Button(buttons_frame, text="Удалить", command=self.remove_element).pack(side=tk.LEFT, padx=5)
@@ -255,28 +502,19 @@ class ADPACFApp:
 
     def add_element(self):
         """Добавить новый элемент для текущего признака"""
-        current_classifier = self.current_classifier_var.get()
-        new_element = self.new_element_var.get().strip()
-        if current_classifier and new_element:
-            if current_classifier not in self.elements:
-                self.elements[current_classifier] = []
-            if new_element not in self.elements[current_classifier]:
-                self.elements[current_classifier].append(new_element)
-                self.new_element_var.set("")
-                self.update_elements_list()
-            else:
-                messagebox.showwarning("Предупреждение", "Такой элемент уже существует")
-        else:
-            messagebox.showwarning("Предупреждение", "Введите название элемента")
+        try:
+            self.project.add_element(self.current_classifier_var.get(), self.new_element_var.get())
+        except ProjectError as e:
+            messagebox.showwarning("Предупреждение", str(e))
+            return
+        self.new_element_var.set("")
 
     def remove_element(self):
         """Удалить выбранный элемент"""
         current_classifier = self.current_classifier_var.get()
         selection = self.elements_listbox.curselection()
         if current_classifier and selection:
-            index = selection[0]
-            self.elements[current_classifier].pop(index)
-            self.update_elements_list()
+            self.project.remove_element(current_classifier, selection[0])
 
     def edit_element(self):
         """Редактировать выбранный элемент"""
@@ -284,7 +522,7 @@ class ADPACFApp:
         selection = self.elements_listbox.curselection()
         if current_classifier and selection:
             index = selection[0]
-            old_element = self.elements[current_classifier][index]
+            old_element = self.project.elements[current_classifier][index]
             edit_window = tk.Toplevel(self.root)
             edit_window.title("Редактирование элемента")
             edit_window.geometry("300x100")
@@ -292,36 +530,24 @@ class ADPACFApp:
             edit_var = tk.StringVar(value=old_element)
             ttk.Entry(edit_window, textvariable=edit_var, width=30).pack(pady=5)
             def save_edit():
-                new_name = edit_var.get().strip()
-                if new_name and new_name != old_element:
-                    if new_name not in self.elements[current_classifier]:
-                        self.elements[current_classifier][index] = new_name
-                        self.update_elements_list()
-                        edit_window.destroy()
-                    else:
-                        messagebox.showwarning("Предупреждение", "Такой элемент уже существует")
-                else:
-                    messagebox.showwarning("Предупреждение", "Введите новое название элемента")
+                try:
+                    self.project.rename_element(current_classifier, index, edit_var.get())
+                except ProjectError as e:
+                    messagebox.showwarning("Предупреждение", str(e))
+                    return
+                edit_window.destroy()
             ttk.Button(edit_window, text="Сохранить", command=save_edit).pack(pady=5)
 
     def update_elements_list(self):
         """Обновить список элементов для текущего признака"""
-        self.elements_listbox.delete(0, tk.END)
         current_classifier = self.current_classifier_var.get()
-        if current_classifier and current_classifier in self.elements:
-            for element in self.elements[current_classifier]:
-                self.elements_listbox.insert(tk.END, element)
+        self.elements_listbox.set_items(self.project.elements.get(current_classifier, ()))
 
     def go_to_analysis(self):
         """Перейти к анализу связей"""
-        valid = True
-        missing = []
-        for classifier in self.classifiers:
-            if classifier not in self.elements or len(self.elements[classifier]) == 0:
-                valid = False
-                missing.append(classifier)
-        if valid:
-            self.current_stage = 2
+        missing = self.project.missing_elements()
+        if not missing:
+            self.project.current_stage = 2
             self.show_analysis()
         else:
             messagebox.showwarning(
@@ -332,9 +558,13 @@ class ADPACFApp:
     def show_analysis(self):
         """Показать интерфейс анализа связей"""
         self.clear_main_frame()
-        self.current_stage = 2
-        self.structure = []
+        self.project.current_stage = 2
         ttk.Label(self.main_frame, text="Анализ связей между элементами", font=('Arial', 14)).pack(pady=10)
+        if self.project.shard is not None:
+            ttk.Label(
+                self.main_frame,
+                text=f"Участок анализа {self.project.shard['index'] + 1} из {self.project.shard['count']}"
+            ).pack()
         self.combination_var = tk.StringVar()
         ttk.Label(self.main_frame, textvariable=self.combination_var, font=('Arial', 12), wraplength=700).pack(pady=20)
         ttk.Label(self.main_frame, text="Комментарий к связи:").pack(pady=5)
@@ -347,20 +577,42 @@ class ADPACFApp:
         nav_frame = ttk.Frame(self.main_frame)
         nav_frame.pack(fill=tk.X, pady=5)
         ttk.Button(nav_frame, text="Назад", command=self.show_elements_input).pack(side=tk.LEFT)
+        ttk.Button(nav_frame, text="Начать заново", command=self.restart_analysis).pack(side=tk.LEFT, padx=5)
+        ttk.Button(nav_frame, text="Пакетный режим", command=self.show_matrix_mode).pack(side=tk.LEFT, padx=5)
         ttk.Button(nav_frame, text="Завершить", command=self.go_to_results).pack(side=tk.RIGHT)
-        self.combination_generator = self.generate_combinations()
+        self.all_pairs_var = tk.BooleanVar(value=self.project.combination_mode == COMBINATIONS_ALL_PAIRS)
+        ttk.Checkbutton(
+            self.main_frame, text="Связи через уровни (все пары признаков, недостижимые элементы пропускаются)",
+            variable=self.all_pairs_var, command=self.toggle_combination_mode
+        ).pack(pady=5)
+        self.current_combination = None
+        self.combination_generator = self.project.generate_combinations()
+        self.show_next_combination()
+
+    def show_matrix_mode(self):
+        """Открыть пакетный режим анализа связей"""
+        if not matrix_available():
+            messagebox.showwarning("Предупреждение", "Для пакетного режима требуется пакет numpy")
+            return
+        if not self.project.classifier_pairs():
+            messagebox.showwarning("Предупреждение", "Для анализа связей нужно хотя бы два признака")
+            return
+        RelevanceMatrixWindow(self.root, self.project, on_commit=self.show_analysis)
+
+    def toggle_combination_mode(self):
+        """Переключить перебор комбинаций между соседними признаками и всеми парами признаков"""
+        mode = COMBINATIONS_ALL_PAIRS if self.all_pairs_var.get() else COMBINATIONS_ADJACENT
+        self.project.set_combination_mode(mode)
+        self.combination_generator = self.project.generate_combinations()
         self.show_next_combination()
 
-    def generate_combinations(self):
-        """Генератор комбинаций элементов"""
-        for i in range(len(self.classifiers) - 1):
-            classifier1 = self.classifiers[i]
-            classifier2 = self.classifiers[i + 1]
-            if classifier1 in self.elements and classifier2 in self.elements:
-                for element1 in self.elements[classifier1]:
-                    for element2 in self.elements[classifier2]:
-                        yield (classifier1, element1, classifier2, element2)
+    def restart_analysis(self):
+        """Отменить все решения и начать анализ связей с первой комбинации"""
+        if messagebox.askyesno("Подтверждение", "Отменить все принятые решения и начать анализ связей заново?"):
+            self.project.reset_analysis()
+            self.show_analysis()
 
+    @instrumented()
     def show_next_combination(self):
         """Показать следующую комбинацию"""
         try:
@@ -369,34 +621,68 @@ class ADPACFApp:
             text = f"Комбинация: '{element1}' ({classifier1}) → '{element2}' ({classifier2})"
             self.combination_var.set(text)
         except StopIteration:
+            self.current_combination = None
             self.combination_var.set("Все комбинации проанализированы. Нажмите 'Завершить' для просмотра результатов.")
+        self.project.analysis_cursor = self.current_combination
 
+    @instrumented()
     def process_combination(self, is_valid):
         """Обработать текущую комбинацию"""
-        if hasattr(self, 'current_combination'):
-            classifier1, element1, classifier2, element2 = self.current_combination
+        if self.current_combination is not None:
             comment = self.comment_var.get().strip()
+            self.project.record_decision(self.current_combination, is_valid, comment)
+            instrumentation.count("decisions")
             if is_valid:
-                self.structure.append({
-                    'from_classifier': classifier1,
-                    'from_element': element1,
-                    'to_classifier': classifier2,
-                    'to_element': element2,
-                    'comment': comment
-                })
                 self.comment_var.set("")
             self.show_next_combination()
 
     def go_to_results(self):
-        """Перейти к результатам"""
-        self.current_stage = 3
+        """Перейти к результатам, предварительно показав найденные проблемы структуры"""
+        report = self.analyze_structure()
+        if report.has_problems:
+            StructureReportWindow(self.root, report, on_continue=self.show_results)
+            return
+        self.project.current_stage = 3
         self.show_results()
 
+    @instrumented()
+    def analyze_structure(self):
+        """Проанализировать структуру связей проекта"""
+        return analyze_structure(self.project)
+
+    def show_structure_report(self):
+        """Показать отчёт анализа структуры"""
+        StructureReportWindow(self.root, self.analyze_structure())
+
+    def show_graph_view(self):
+        """Показать структуру графом"""
+        GraphViewWindow(self.root, self.project)
+
+    @instrumented()
     def show_results(self):
         """Показать результаты анализа"""
         self.clear_main_frame()
-        self.current_stage = 3
+        self.project.current_stage = 3
         ttk.Label(self.main_frame, text="Результаты анализа", font=('Arial', 14)).pack(pady=10)
+        search_frame = ttk.Frame(self.main_frame)
+        search_frame.pack(fill=tk.X)
+        ttk.Label(search_frame, text="Поиск:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=40)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<Return>", lambda event: self.run_search())
+        ttk.Button(search_frame, text="Найти", command=self.run_search).pack(side=tk.LEFT)
+        self.search_status_var = tk.StringVar()
+        ttk.Label(search_frame, textvariable=self.search_status_var).pack(side=tk.LEFT, padx=5)
+        hits_frame = ttk.Frame(self.main_frame)
+        hits_frame.pack(fill=tk.X, pady=(5, 0))
+        self.search_listbox = tk.Listbox(hits_frame, height=5, selectmode=tk.SINGLE)
+        self.search_listbox.pack(fill=tk.X, expand=True, side=tk.LEFT)
+        hits_scrollbar = ttk.Scrollbar(hits_frame, orient=tk.VERTICAL, command=self.search_listbox.yview)
+        hits_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.search_listbox.config(yscrollcommand=hits_scrollbar.set)
+        self.search_listbox.bind("<<ListboxSelect>>", self.on_search_select)
+        self.search_hits = []
         result_frame = ttk.Frame(self.main_frame)
         result_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         self.tree = ttk.Treeview(result_frame)
@@ -411,6 +697,8 @@ class ADPACFApp:
         self.tree.heading("#0", text="Элемент", anchor=tk.W)
         self.tree.heading("type", text="Тип", anchor=tk.W)
         self.tree.heading("comment", text="Комментарий", anchor=tk.W)
+        self.tree.bind("<<TreeviewOpen>>", self.on_tree_open)
+        self.tree.bind("<<TreeviewClose>>", self.on_tree_close)
         self.build_structure_tree()
 
         # Добавление кнопок для редактирования
@@ -425,42 +713,152 @@ class ADPACFApp:
         ttk.Button(buttons_frame, text="Назад", command=self.show_analysis).pack(side=tk.LEFT)
         ttk.Button(buttons_frame, text="Экспорт в файл", command=self.export_results).pack(side=tk.RIGHT, padx=5)
         ttk.Button(buttons_frame, text="Печать", command=self.print_results).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(buttons_frame, text="Проверка структуры", command=self.show_structure_report).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(buttons_frame, text="Граф структуры", command=self.show_graph_view).pack(side=tk.RIGHT, padx=5)
+        self.export_back_references_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            buttons_frame, text="Ссылки вместо повторов", variable=self.export_back_references_var
+        ).pack(side=tk.RIGHT, padx=5)
 
+    @instrumented()
     def build_structure_tree(self):
         """Построить дерево структуры"""
         self.tree.delete(*self.tree.get_children())  # Очистить дерево перед построением
-        first_classifier = self.classifiers[0] if self.classifiers else None
-        if first_classifier and first_classifier in self.elements:
-            for element in self.elements[first_classifier]:
-                has_connections = any(
-                    item['from_element'] == element and item['from_classifier'] == first_classifier
-                    for item in self.structure
-                )
-                if has_connections:
-                    node = self.tree.insert("", tk.END, text=element, values=(first_classifier, ""))
-                    self.add_children(node, first_classifier, element)
-                else:
-                    self.tree.insert("", tk.END, text=element, values=(first_classifier, ""))
+        self.tree_keys = {}
+        self.tree_items = {}
+        first_classifier, roots = self.project.root_elements()
+        for element in roots:
+            self.insert_tree_node("", first_classifier, element, "")
+
+    def insert_tree_node(self, parent_node, classifier, element, comment):
+        """Вставить узел дерева; в ленивом режиме потомки заменяются заглушкой"""
+        node = self.tree.insert(parent_node, tk.END, text=element, values=(classifier, comment))
+        instrumentation.count("tree_items_inserted")
+        self.register_tree_item(node, (classifier, element))
+        if self.project.structure.has_children(classifier, element):
+            if self.lazy_tree:
+                self.insert_tree_placeholder(node)
+            else:
+                self.add_children(node, classifier, element)
+        return node
 
     def add_children(self, parent_node, parent_classifier, parent_element):
         """Добавить дочерние элементы к узлу"""
-        connections = [
-            item for item in self.structure
-            if item['from_element'] == parent_element and item['from_classifier'] == parent_classifier
-        ]
-        for connection in connections:
-            child_classifier = connection['to_classifier']
-            child_element = connection['to_element']
-            comment = connection['comment']
-            has_children = any(
-                item['from_element'] == child_element and item['from_classifier'] == child_classifier
-                for item in self.structure
+        for connection in self.project.structure.children(parent_classifier, parent_element):
+            self.insert_tree_node(
+                parent_node, connection['to_classifier'], connection['to_element'], connection['comment']
             )
-            if has_children:
-                node = self.tree.insert(parent_node, tk.END, text=child_element, values=(child_classifier, comment))
-                self.add_children(node, child_classifier, child_element)
+
+    def register_tree_item(self, item, key):
+        """Запомнить, что узел дерева показывает элемент key = (признак, элемент)"""
+        self.tree_keys[item] = key
+        self.tree_items.setdefault(key, {})[item] = None
+
+    def unregister_tree_item(self, item):
+        """Забыть узел дерева в соответствии элементов и узлов"""
+        key = self.tree_keys.pop(item, None)
+        if key is not None:
+            shown = self.tree_items[key]
+            del shown[item]
+            if not shown:
+                del self.tree_items[key]
+
+    def delete_tree_items(self, items):
+        """Удалить узлы дерева вместе с потомками"""
+        stack = list(items)
+        while stack:
+            item = stack.pop()
+            self.unregister_tree_item(item)
+            stack.extend(self.tree.get_children(item))
+        if items:
+            self.tree.delete(*items)
+
+    def tree_children_loaded(self, item):
+        """Загружены ли потомки узла (нет заглушки ленивой загрузки)"""
+        children = self.tree.get_children(item)
+        return not (children and self.is_tree_placeholder(children[0]))
+
+    def patch_tree_add(self, connection):
+        """Показать новую связь под каждым узлом-родителем с загруженными потомками"""
+        key = (connection['from_classifier'], connection['from_element'])
+        for item in list(self.tree_items.get(key, ())):
+            if self.tree_children_loaded(item):
+                self.insert_tree_node(
+                    item, connection['to_classifier'], connection['to_element'], connection['comment']
+                )
+
+    def patch_tree_remove(self, classifier, element):
+        """Убрать из дерева узлы элемента, у которого удалены все связи"""
+        for item in list(self.tree_items.get((classifier, element), ())):
+            if item not in self.tree_keys:
+                continue  # уже удалён вместе с предком
+            if self.tree.parent(item) == "":
+                # Корни берутся из списка элементов и остаются, теряя только потомков
+                self.delete_tree_items(self.tree.get_children(item))
             else:
-                self.tree.insert(parent_node, tk.END, text=child_element, values=(child_classifier, comment))
+                self.delete_tree_items((item,))
+
+    def patch_tree_rename(self, classifier, old_element, new_element):
+        """Переименовать узлы элемента на месте"""
+        for item in list(self.tree_items.get((classifier, old_element), ())):
+            if self.tree.parent(item) == "":
+                # Корни берутся из списка элементов, поэтому связи переименованного элемента у них пропадают
+                self.delete_tree_items(self.tree.get_children(item))
+                continue
+            self.unregister_tree_item(item)
+            self.tree.item(item, text=new_element)
+            self.register_tree_item(item, (classifier, new_element))
+            children = self.tree.get_children(item)
+            if self.tree_children_loaded(item) and len(children) != len(
+                self.project.structure.children(classifier, new_element)
+            ):
+                # Элемент слился с уже существующим: перечитать потомков
+                self.delete_tree_items(children)
+                self.add_children(item, classifier, new_element)
+
+    def refresh_tree_comments(self):
+        """Обновить комментарии во всех загруженных узлах дерева"""
+        stack = list(self.tree.get_children())
+        while stack:
+            item = stack.pop()
+            children = self.tree.get_children(item)
+            if not children or self.is_tree_placeholder(children[0]):
+                continue
+            comments = {}
+            for connection in self.project.structure.children(*self.tree_keys[item]):
+                comments.setdefault((connection['to_classifier'], connection['to_element']), connection['comment'])
+            for child in children:
+                self.tree.set(child, "comment", comments.get(self.tree_keys[child], ""))
+                stack.append(child)
+
+    def insert_tree_placeholder(self, node):
+        """Вставить заглушку, обозначающую ещё не загруженных потомков узла"""
+        self.tree.insert(node, tk.END, text="Загрузка...", values=("", ""), tags=(TREE_PLACEHOLDER_TAG,))
+
+    def is_tree_placeholder(self, item):
+        """Является ли узел заглушкой ещё не загруженных потомков"""
+        return TREE_PLACEHOLDER_TAG in self.tree.item(item, "tags")
+
+    def on_tree_open(self, event):
+        """Загрузить потомков раскрываемого узла"""
+        self.load_tree_children(self.tree.focus())
+
+    def load_tree_children(self, item):
+        """Заменить заглушку узла его потомками"""
+        children = self.tree.get_children(item)
+        if len(children) == 1 and self.is_tree_placeholder(children[0]):
+            self.tree.delete(children[0])
+            self.add_children(item, *self.tree_keys[item])
+
+    def on_tree_close(self, event):
+        """Выгрузить потомков сворачиваемого узла, оставив заглушку"""
+        if not (self.lazy_tree and self.drop_closed_branches):
+            return
+        item = self.tree.focus()
+        children = self.tree.get_children(item)
+        if children and not self.is_tree_placeholder(children[0]):
+            self.delete_tree_items(children)
+            self.insert_tree_placeholder(item)
 
     def add_tree_element(self):
         """Добавить новый элемент в дерево"""
@@ -470,8 +868,9 @@ class ADPACFApp:
             return
 
         parent_item = selected_item[0]
-        parent_text = self.tree.item(parent_item, "text")
-        parent_classifier = self.tree.item(parent_item, "values")[0]
+        if self.is_tree_placeholder(parent_item):
+            return
+        parent_classifier, parent_text = self.tree_keys[parent_item]
 
         # Диалог для ввода нового элемента
         add_window = tk.Toplevel(self.root)
@@ -482,7 +881,7 @@ class ADPACFApp:
         ttk.Entry(add_window, textvariable=new_element_var, width=30).pack(pady=5)
         ttk.Label(add_window, text="Классификатор:").pack(pady=5)
         classifier_var = tk.StringVar()
-        classifier_menu = ttk.OptionMenu(add_window, classifier_var, *self.classifiers)
+        classifier_menu = ttk.OptionMenu(add_window, classifier_var, *self.project.classifiers)
         classifier_menu.pack(pady=5)
         ttk.Label(add_window, text="Комментарий:").pack(pady=5)
         comment_var = tk.StringVar()
@@ -493,15 +892,11 @@ class ADPACFApp:
             comment = comment_var.get().strip()
             if new_element and classifier:
                 # Добавить новый элемент в структуру
-                self.structure.append({
-                    'from_classifier': parent_classifier,
-                    'from_element': parent_text,
-                    'to_classifier': classifier,
-                    'to_element': new_element,
-                    'comment': comment
-                })
-                # Обновить дерево
-                self.build_structure_tree()
+                self.project.add_connection(parent_classifier, parent_text, classifier, new_element, comment)
+                # Показать нового потомка под выбранным узлом
+                if parent_item in self.tree_keys:
+                    self.load_tree_children(parent_item)
+                    self.tree.item(parent_item, open=True)
                 add_window.destroy()
             else:
                 messagebox.showwarning("Предупреждение", "Введите название элемента и выберите классификатор")
@@ -515,17 +910,12 @@ class ADPACFApp:
             return
 
         item = selected_item[0]
-        element_text = self.tree.item(item, "text")
-        classifier = self.tree.item(item, "values")[0]
-
-        # Удалить все связи, связанные с этим элементом
-        self.structure = [conn for conn in self.structure if not (
-            (conn['from_element'] == element_text and conn['from_classifier'] == classifier) or
-            (conn['to_element'] == element_text and conn['to_classifier'] == classifier)
-        )]
+        if self.is_tree_placeholder(item):
+            return
+        classifier, element_text = self.tree_keys[item]
 
-        # Обновить дерево
-        self.build_structure_tree()
+        # Удалить все связи, связанные с этим элементом; дерево обновится по уведомлению проекта
+        self.project.remove_node(classifier, element_text)
 
     def rename_tree_element(self):
         """Переименовать выбранный элемент в дереве"""
@@ -535,12 +925,13 @@ class ADPACFApp:
             return
 
         item = selected_item[0]
+        if self.is_tree_placeholder(item):
+            return
         if self.tree.parent(item) == "":
             messagebox.showwarning("Предупреждение", "Нельзя переименовывать главные элементы.")
             return
 
-        old_element = self.tree.item(item, "text")
-        classifier = self.tree.item(item, "values")[0]
+        classifier, old_element = self.tree_keys[item]
 
         # Диалог для ввода нового имени
         rename_window = tk.Toplevel(self.root)
@@ -550,74 +941,482 @@ class ADPACFApp:
         new_name_var = tk.StringVar(value=old_element)
         ttk.Entry(rename_window, textvariable=new_name_var, width=30).pack(pady=5)
         def save_rename():
-            new_name = new_name_var.get().strip()
-            if new_name and new_name != old_element:
+            try:
                 # Обновить имя в структуре
-                for conn in self.structure:
-                    if conn['from_element'] == old_element and conn['from_classifier'] == classifier:
-                        conn['from_element'] = new_name
-                    if conn['to_element'] == old_element and conn['to_classifier'] == classifier:
-                        conn['to_element'] = new_name
-                # Обновить дерево
-                self.build_structure_tree()
-                rename_window.destroy()
-            else:
-                messagebox.showwarning("Предупреждение", "Введите новое название элемента")
+                self.project.rename_node(classifier, old_element, new_name_var.get())
+            except ProjectError as e:
+                messagebox.showwarning("Предупреждение", str(e))
+                return
+            rename_window.destroy()
         ttk.Button(rename_window, text="Сохранить", command=save_rename).pack(pady=5)
 
+    def run_search(self):
+        """Найти признаки, элементы и комментарии связей по строке поиска"""
+        query = self.search_var.get().strip()
+        self.search_listbox.delete(0, tk.END)
+        self.search_hits = []
+        if not query:
+            self.search_status_var.set("")
+            return
+        hits = self.search_index.search(query)
+        self.search_hits = hits[:MAX_SEARCH_HITS]
+        self.search_listbox.insert(tk.END, *(self.describe_search_hit(hit) for hit in self.search_hits))
+        if len(hits) > MAX_SEARCH_HITS:
+            self.search_status_var.set(f"Найдено: {len(hits)} (показаны первые {MAX_SEARCH_HITS})")
+        else:
+            self.search_status_var.set(f"Найдено: {len(hits)}")
+
+    def describe_search_hit(self, hit):
+        """Строка списка результатов поиска"""
+        if hit[0] == HIT_CLASSIFIER:
+            return f"Признак: {hit[1]}"
+        if hit[0] == HIT_ELEMENT:
+            return f"{hit[2]} ({hit[1]})"
+        return f"{hit[2]} → {hit[4]}: {self.search_index.comment_text(hit)}"
+
+    def on_search_select(self, event):
+        """Раскрыть дерево до найденных узлов и выделить их"""
+        selection = self.search_listbox.curselection()
+        if not selection:
+            return
+        hit = self.search_hits[selection[0]]
+        if hit[0] == HIT_CLASSIFIER:
+            items = self.reveal_classifier(hit[1])
+        elif hit[0] == HIT_ELEMENT:
+            items = self.reveal_tree_nodes(hit[1], hit[2])
+        else:
+            items = self.reveal_tree_connection(*hit[1:])
+        if items:
+            self.tree.selection_set(items)
+            self.tree.focus(items[0])
+            self.tree.see(items[0])
+        else:
+            messagebox.showinfo("Поиск", "Найденный элемент не входит в дерево результатов")
+
+    def reveal_tree_path(self, path):
+        """Загрузить узлы дерева вдоль пути от корня; вернуть узел конца пути"""
+        roots = [item for item in self.tree_items.get(path[0], ()) if self.tree.parent(item) == ""]
+        if not roots:
+            return None
+        item = roots[0]
+        for key in path[1:]:
+            self.load_tree_children(item)
+            item = next((child for child in self.tree.get_children(item) if self.tree_keys.get(child) == key), None)
+            if item is None:
+                return None
+        return item
+
+    def reveal_tree_nodes(self, classifier, element):
+        """Узлы дерева, показывающие элемент; если ни один не загружен - загрузить путь от корня"""
+        key = (classifier, element)
+        if key not in self.tree_items:
+            first_classifier, roots = self.project.root_elements()
+            path = self.project.structure.path_from([(first_classifier, root) for root in roots], key)
+            if path:
+                self.reveal_tree_path(path)
+        return list(self.tree_items.get(key, ()))
+
+    def reveal_tree_connection(self, from_classifier, from_element, to_classifier, to_element):
+        """Узлы дерева, показывающие связь: потомки to_element под узлами from_element"""
+        items = []
+        for parent in self.reveal_tree_nodes(from_classifier, from_element):
+            self.load_tree_children(parent)
+            items.extend(
+                child for child in self.tree.get_children(parent)
+                if self.tree_keys.get(child) == (to_classifier, to_element)
+            )
+        return items
+
+    def reveal_classifier(self, classifier):
+        """Узлы первого элемента признака, который входит в дерево"""
+        for element in self.project.elements.get(classifier, ()):
+            items = self.reveal_tree_nodes(classifier, element)
+            if items:
+                return items
+        return []
+
     def export_results(self):
         """Экспорт результатов в файл"""
         filepath = filedialog.asksaveasfilename(
             title="Экспорт результатов",
             defaultextension=".txt",
-            filetypes=[("Текстовые файлы", "*.txt"), ("Все файлы", "*.*")],
-            initialfile=f"{self.project_name}_результаты.txt"
+            filetypes=[
+                (description, f"*.{extension}") for extension, (description, _) in EXPORT_FORMATS.items()
+            ] + [("Все файлы", "*.*")],
+            initialfile=f"{self.project.project_name}_результаты.txt"
         )
         if filepath:
-            try:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(f"Результаты анализа проекта: {self.project_name}\n")
-                    f.write("=" * 50 + "\n\n")
-                    f.write("Структура целей и функций:\n")
-                    if not self.structure:
-                        f.write("Нет значимых связей между элементами\n")
-                    else:
-                        first_classifier = self.classifiers[0] if self.classifiers else None
-                        if first_classifier and first_classifier in self.elements:
-                            for element in self.elements[first_classifier]:
-                                self.export_element_recursive(f, element, first_classifier, "", 0)
-                messagebox.showinfo("Успех", "Результаты успешно экспортированы")
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Не удалось экспортировать результаты: {str(e)}")
-
-    def export_element_recursive(self, file, element, classifier, comment, level):
-        """Рекурсивный экспорт элемента и всех его потомков с комментариями"""
-        indent = "    " * level
-        if comment:
-            file.write(f"{indent}{element} ({classifier}) [Комментарий: {comment}]\n")
-        else:
-            file.write(f"{indent}{element} ({classifier})\n")
-        connections = [
-            item for item in self.structure
-            if item['from_element'] == element and item['from_classifier'] == classifier
-        ]
-        for connection in connections:
-            child_element = connection['to_element']
-            child_classifier = connection['to_classifier']
-            child_comment = connection['comment']
-            self.export_element_recursive(file, child_element, child_classifier, child_comment, level + 1)
+            back_references = self.export_back_references_var.get()
+            self.tasks.run(
+                "Экспорт результатов",
+                instrumented("export_results")(
+                    lambda control: export_report(self.project, filepath, back_references=back_references, control=control)
+                ),
+                lambda result: messagebox.showinfo("Успех", "Результаты успешно экспортированы"),
+                on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось экспортировать результаты: {str(e)}")
+            )
 
     def print_results(self):
         """Печать результатов"""
         messagebox.showinfo("Печать", "Функция печати будет реализована в следующей версии")
 
-    def paste_from_clipboard(self, var):
-        """Вставить текст из буфера обмена в переменную"""
+    def get_clipboard_text(self):
+        """Текст из буфера обмена или None, если буфер пуст"""
         try:
-            clipboard_text = self.root.clipboard_get()
-            var.set(clipboard_text)
+            return self.root.clipboard_get()
         except tk.TclError:
             messagebox.showwarning("Предупреждение", "Буфер обмена пуст")
+            return None
+
+    def paste_classifiers(self):
+        """Вставить признаки из буфера обмена; несколько строк добавляются списком"""
+        clipboard_text = self.get_clipboard_text()
+        if clipboard_text is None:
+            return
+        if len(split_lines(clipboard_text)) > 1:
+            try:
+                report = import_classifiers(self.project, clipboard_text)
+            except ProjectError as e:
+                messagebox.showerror("Ошибка", f"Не удалось вставить признаки: {str(e)}")
+                return
+            messagebox.showinfo("Импорт", report.summary())
+        else:
+            self.new_classifier_var.set(clipboard_text.strip())
+
+    def paste_elements(self):
+        """Вставить элементы из буфера обмена; таблица или несколько строк импортируются списком"""
+        clipboard_text = self.get_clipboard_text()
+        if clipboard_text is None:
+            return
+        try:
+            if is_table_text(clipboard_text):
+                report = import_table(self.project, read_table(clipboard_text, "\t"))
+            elif len(split_lines(clipboard_text)) > 1:
+                report = import_lines(self.project, self.current_classifier_var.get(), clipboard_text)
+            else:
+                self.new_element_var.set(clipboard_text.strip())
+                return
+        except ProjectError as e:
+            messagebox.showerror("Ошибка", f"Не удалось вставить элементы: {str(e)}")
+            return
+        messagebox.showinfo("Импорт", report.summary())
+
+    def import_elements_file(self):
+        """Импорт элементов из файла CSV/TSV (столбцы - признаки) или текстового файла (строки - элементы текущего признака)"""
+        filepath = filedialog.askopenfilename(
+            title="Импорт элементов",
+            filetypes=[
+                ("Таблицы", "*.csv *.tsv *.tab"),
+                ("Текстовые файлы", "*.txt"),
+                ("Все файлы", "*.*")
+            ]
+        )
+        if not filepath:
+            return
+        try:
+            if filepath.lower().endswith(".txt"):
+                with open(filepath, 'r', encoding='utf-8-sig') as f:
+                    report = import_lines(self.project, self.current_classifier_var.get(), f.read())
+            else:
+                report = import_table(self.project, read_table_file(filepath))
+        except (OSError, UnicodeDecodeError, ProjectError) as e:
+            messagebox.showerror("Ошибка", f"Не удалось импортировать элементы: {str(e)}")
+            return
+        messagebox.showinfo("Импорт", report.summary())
+
+class DiagnosticsWindow:
+    """Окно диагностики: время операций, счётчики и сводка профилировщика"""
+
+    def __init__(self, root):
+        self.window = tk.Toplevel(root)
+        self.window.title("Диагностика")
+        self.window.geometry("700x450")
+        self.text = tk.Text(self.window, wrap=tk.NONE, font=('Courier', 10))
+        scrollbar = ttk.Scrollbar(self.window, orient=tk.VERTICAL, command=self.text.yview)
+        self.text.config(yscrollcommand=scrollbar.set)
+        buttons_frame = ttk.Frame(self.window)
+        buttons_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=5)
+        ttk.Button(buttons_frame, text="Обновить", command=self.refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Сбросить", command=self.reset).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Сохранить в JSON", command=self.dump).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Закрыть", command=self.window.destroy).pack(side=tk.RIGHT, padx=5)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(fill=tk.BOTH, expand=True)
+        self.refresh()
+
+    def refresh(self):
+        """Показать текущие замеры"""
+        snapshot = instrumentation.snapshot()
+        lines = [
+            f"Работает с {snapshot['started']} ({snapshot['uptime_seconds']:.0f} с), Python {snapshot['python']}",
+            "",
+            f"{'Операция':<28}{'Вызовов':>9}{'Всего, с':>11}{'Среднее, мс':>13}{'Макс., мс':>11}",
+        ]
+        for name, timing in sorted(snapshot['timings'].items()):
+            lines.append(
+                f"{name:<28}{timing['calls']:>9}{timing['total_seconds']:>11.3f}"
+                f"{timing['mean_seconds'] * 1000:>13.1f}{timing['max_seconds'] * 1000:>11.1f}"
+            )
+        lines.extend(["", f"{'Счётчик':<28}{'Значение':>9}{'В минуту':>11}"])
+        for name, counter in sorted(snapshot['counters'].items()):
+            per_minute = f"{counter['per_minute']:.1f}" if counter['per_minute'] is not None else "-"
+            lines.append(f"{name:<28}{counter['value']:>9}{per_minute:>11}")
+        if snapshot['profile']:
+            lines.extend(["", "Профиль последнего сеанса cProfile:", snapshot['profile']])
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        self.text.config(state=tk.DISABLED)
+
+    def reset(self):
+        """Сбросить замеры"""
+        instrumentation.reset()
+        self.refresh()
+
+    def dump(self):
+        """Сохранить замеры в файл JSON"""
+        filepath = filedialog.asksaveasfilename(
+            parent=self.window,
+            title="Сохранить диагностику",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Все файлы", "*.*")],
+            initialfile="adpacf_diagnostics.json"
+        )
+        if filepath:
+            try:
+                instrumentation.dump(filepath)
+            except OSError as e:
+                messagebox.showerror("Ошибка", f"Не удалось сохранить диагностику: {str(e)}", parent=self.window)
+
+class StructureReportWindow:
+    """Окно отчёта анализа структуры: найденные проблемы и статистика"""
+
+    def __init__(self, root, report, on_continue=None):
+        self.on_continue = on_continue
+        self.window = tk.Toplevel(root)
+        self.window.title("Проверка структуры")
+        self.window.geometry("700x450")
+        self.window.transient(root)
+        text = tk.Text(self.window, wrap=tk.NONE, font=('Courier', 10))
+        scrollbar = ttk.Scrollbar(self.window, orient=tk.VERTICAL, command=text.yview)
+        text.config(yscrollcommand=scrollbar.set)
+        buttons_frame = ttk.Frame(self.window)
+        buttons_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=5)
+        if on_continue is not None:
+            self.window.grab_set()
+            ttk.Button(buttons_frame, text="Показать результаты", command=self.proceed).pack(side=tk.RIGHT, padx=5)
+            ttk.Button(buttons_frame, text="Вернуться", command=self.window.destroy).pack(side=tk.RIGHT, padx=5)
+        else:
+            ttk.Button(buttons_frame, text="Закрыть", command=self.window.destroy).pack(side=tk.RIGHT, padx=5)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        text.pack(fill=tk.BOTH, expand=True)
+        text.insert("1.0", report.to_text())
+        text.config(state=tk.DISABLED)
+
+    def proceed(self):
+        """Закрыть отчёт и перейти к результатам"""
+        self.window.destroy()
+        self.on_continue()
+
+class RelevanceMatrixWindow:
+    """Окно пакетного режима: матрица значимости связей для пары признаков"""
+
+    CELL_SIZE = 18
+    ROW_LABEL_WIDTH = 160
+    COLUMN_LABEL_HEIGHT = 120
+
+    def __init__(self, root, project, on_commit=None):
+        self.project = project
+        self.on_commit = on_commit
+        self.pairs = project.classifier_pairs()
+        self.matrix = None
+        self.redraw_pending = False
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Пакетный режим анализа связей")
+        self.window.geometry("900x650")
+        self.window.transient(root)
+        self.window.grab_set()
+
+        pair_frame = ttk.Frame(self.window, padding=5)
+        pair_frame.pack(fill=tk.X)
+        ttk.Label(pair_frame, text="Признаки:").pack(side=tk.LEFT)
+        self.pair_var = tk.StringVar()
+        pair_menu = ttk.Combobox(
+            pair_frame, textvariable=self.pair_var, state="readonly", width=50,
+            values=[f"{classifier1} → {classifier2}" for classifier1, classifier2 in self.pairs]
+        )
+        pair_menu.pack(side=tk.LEFT, padx=5)
+        pair_menu.bind("<<ComboboxSelected>>", lambda _: self.load_pair(pair_menu.current()))
+        self.status_var = tk.StringVar()
+        ttk.Label(pair_frame, textvariable=self.status_var).pack(side=tk.RIGHT)
+
+        rule_frame = ttk.Frame(self.window, padding=5)
+        rule_frame.pack(fill=tk.X)
+        ttk.Label(rule_frame, text="Строки:").pack(side=tk.LEFT)
+        self.row_pattern_var = tk.StringVar()
+        ttk.Entry(rule_frame, textvariable=self.row_pattern_var, width=15).pack(side=tk.LEFT, padx=2)
+        ttk.Label(rule_frame, text="Столбцы:").pack(side=tk.LEFT)
+        self.column_pattern_var = tk.StringVar()
+        ttk.Entry(rule_frame, textvariable=self.column_pattern_var, width=15).pack(side=tk.LEFT, padx=2)
+        self.regex_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(rule_frame, text="Рег. выражение", variable=self.regex_var).pack(side=tk.LEFT, padx=2)
+        ttk.Button(rule_frame, text="Отметить", command=lambda: self.fill_by_rule(True)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(rule_frame, text="Снять", command=lambda: self.fill_by_rule(False)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(rule_frame, text="Инвертировать", command=self.invert).pack(side=tk.LEFT, padx=2)
+        ttk.Button(rule_frame, text="Отметить все", command=lambda: self.set_all(True)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(rule_frame, text="Снять все", command=lambda: self.set_all(False)).pack(side=tk.LEFT, padx=2)
+
+        grid_frame = ttk.Frame(self.window)
+        grid_frame.pack(fill=tk.BOTH, expand=True)
+        self.canvas = tk.Canvas(grid_frame, background="white")
+        x_scrollbar = ttk.Scrollbar(grid_frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
+        y_scrollbar = ttk.Scrollbar(grid_frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.canvas.config(
+            xscrollcommand=lambda *args: (x_scrollbar.set(*args), self.schedule_redraw()),
+            yscrollcommand=lambda *args: (y_scrollbar.set(*args), self.schedule_redraw())
+        )
+        y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.canvas.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        self.canvas.bind("<Configure>", lambda _: self.schedule_redraw())
+        self.canvas.bind("<Button-1>", self.on_click)
+
+        bottom_frame = ttk.Frame(self.window, padding=5)
+        bottom_frame.pack(fill=tk.X)
+        ttk.Label(bottom_frame, text="Комментарий к новым связям:").pack(side=tk.LEFT)
+        self.comment_var = tk.StringVar()
+        ttk.Entry(bottom_frame, textvariable=self.comment_var, width=30).pack(side=tk.LEFT, padx=5)
+        self.reject_unchecked_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            bottom_frame, text="Неотмеченные пары считать незначимыми", variable=self.reject_unchecked_var,
+            command=self.redraw
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Button(bottom_frame, text="Закрыть", command=self.window.destroy).pack(side=tk.RIGHT)
+        ttk.Button(bottom_frame, text="Применить", command=self.commit).pack(side=tk.RIGHT, padx=5)
+
+        pair_menu.current(0)
+        self.load_pair(0)
+
+    def load_pair(self, index):
+        """Загрузить матрицу для выбранной пары признаков"""
+        classifier1, classifier2 = self.pairs[index]
+        self.matrix = RelevanceMatrix(self.project, classifier1, classifier2)
+        rows, columns = self.matrix.shape
+        self.canvas.config(scrollregion=(
+            0, 0,
+            self.ROW_LABEL_WIDTH + columns * self.CELL_SIZE,
+            self.COLUMN_LABEL_HEIGHT + rows * self.CELL_SIZE
+        ))
+        self.canvas.xview_moveto(0)
+        self.canvas.yview_moveto(0)
+        self.redraw()
+
+    def schedule_redraw(self):
+        """Перерисовать видимую часть матрицы при ближайшем простое"""
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.window.after_idle(self.redraw)
+
+    def visible_range(self):
+        """Диапазоны строк и столбцов, попадающих в видимую область"""
+        rows, columns = self.matrix.shape
+        left = self.canvas.canvasx(0) - self.ROW_LABEL_WIDTH
+        top = self.canvas.canvasy(0) - self.COLUMN_LABEL_HEIGHT
+        right = left + self.canvas.winfo_width()
+        bottom = top + self.canvas.winfo_height()
+        first_column = max(0, int(left // self.CELL_SIZE))
+        last_column = min(columns, int(right // self.CELL_SIZE) + 1)
+        first_row = max(0, int(top // self.CELL_SIZE))
+        last_row = min(rows, int(bottom // self.CELL_SIZE) + 1)
+        return range(first_row, last_row), range(first_column, last_column)
+
+    def redraw(self):
+        """Нарисовать только видимые ячейки и подписи"""
+        self.redraw_pending = False
+        self.canvas.delete("all")
+        if self.matrix is None:
+            return
+        size = self.CELL_SIZE
+        values = self.matrix.values
+        decided = self.matrix.decided()
+        row_range, column_range = self.visible_range()
+        for i in row_range:
+            y = self.COLUMN_LABEL_HEIGHT + i * size
+            self.canvas.create_text(
+                self.ROW_LABEL_WIDTH - 4, y + size / 2, text=self.matrix.rows[i], anchor=tk.E, width=self.ROW_LABEL_WIDTH - 8
+            )
+        for j in column_range:
+            x = self.ROW_LABEL_WIDTH + j * size
+            self.canvas.create_text(
+                x + size / 2, self.COLUMN_LABEL_HEIGHT - 4, text=self.matrix.columns[j], anchor=tk.W, angle=90
+            )
+        for i in row_range:
+            y = self.COLUMN_LABEL_HEIGHT + i * size
+            for j in column_range:
+                x = self.ROW_LABEL_WIDTH + j * size
+                if values[i, j]:
+                    fill = "#4caf50"
+                elif decided[i, j]:
+                    fill = "#d0d0d0"
+                else:
+                    fill = "white"
+                self.canvas.create_rectangle(x, y, x + size, y + size, fill=fill, outline="#a0a0a0")
+        added, dropped = self.matrix.changes(self.reject_unchecked_var.get())
+        self.status_var.set(
+            f"Значимых: {int(values.sum())}, новых значимых: {int(added.sum())}, "
+            f"новых незначимых: {int(dropped.sum())}"
+        )
+
+    def on_click(self, event):
+        """Переключить ячейку; щелчок по подписи строки или столбца переключает её целиком"""
+        x = self.canvas.canvasx(event.x) - self.ROW_LABEL_WIDTH
+        y = self.canvas.canvasy(event.y) - self.COLUMN_LABEL_HEIGHT
+        rows, columns = self.matrix.shape
+        row = int(y // self.CELL_SIZE)
+        column = int(x // self.CELL_SIZE)
+        if x < 0 and 0 <= row < rows:
+            self.matrix.set_row(row, not self.matrix.values[row, :].all())
+        elif y < 0 and 0 <= column < columns:
+            self.matrix.set_column(column, not self.matrix.values[:, column].all())
+        elif 0 <= row < rows and 0 <= column < columns:
+            self.matrix.toggle(row, column)
+        else:
+            return
+        self.redraw()
+
+    def fill_by_rule(self, value):
+        """Отметить или снять пары, подходящие под правила для строк и столбцов"""
+        try:
+            self.matrix.fill_by_rule(
+                self.row_pattern_var.get().strip(), self.column_pattern_var.get().strip(), self.regex_var.get(), value
+            )
+        except ProjectError as e:
+            messagebox.showwarning("Предупреждение", str(e), parent=self.window)
+            return
+        self.redraw()
+
+    def invert(self):
+        self.matrix.invert()
+        self.redraw()
+
+    def set_all(self, value):
+        self.matrix.set_all(value)
+        self.redraw()
+
+    def commit(self):
+        """Записать матрицу в проект"""
+        significant, insignificant = self.matrix.commit(
+            self.comment_var.get().strip(), self.reject_unchecked_var.get()
+        )
+        self.redraw()
+        messagebox.showinfo(
+            "Успех",
+            f"Решения записаны: значимых - {significant}, незначимых - {insignificant}",
+            parent=self.window
+        )
+        if self.on_commit is not None:
+            self.on_commit()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,314 @@
+"""Анализ структуры связей: достижимость, циклы, висячие элементы и статистика.
+
+Узлы (признак, элемент) нумеруются целыми числами, связи превращаются
+в массивы номеров начала и конца и сжатые списки смежности (CSR). Степени
+узлов и плотность связей по парам признаков считаются через NumPy, если он
+установлен, иначе - средствами стандартной библиотеки. Обходы графа
+(достижимость из корней, сильно связные компоненты) выполняются
+итеративно, поэтому глубина структуры не ограничена стеком вызовов.
+
+Пример:
+    report = analyze_structure(project)
+    for problem in report.problems():
+        print(problem)
+"""
+from collections import Counter
+
+MAX_LISTED = 20  # число примеров, перечисляемых в тексте отчёта для каждой проблемы
+
+
+class StructureReport:
+    """Результаты анализа структуры связей"""
+
+    def __init__(self):
+        self.node_count = 0
+        self.connection_count = 0
+        self.roots = []        # корни: элементы первого признака
+        self.reachable = 0     # число узлов, достижимых из корней
+        self.unreachable = []  # узлы со входящими связями, недостижимые из корней
+        self.orphans = []      # элементы не первого признака без входящих связей
+        self.dead_ends = []    # достижимые элементы не последнего признака без исходящих связей
+        self.foreign = []      # узлы связей, отсутствующие в списках элементов
+        self.cycles = []       # циклы (сильно связные компоненты), списки узлов
+        self.fan_in = {}       # число входящих связей -> число узлов
+        self.fan_out = {}      # число исходящих связей -> число узлов
+        self.max_fan_in = 0
+        self.max_fan_out = 0
+        self.density = {}      # (признак1, признак2) -> доля значимых пар элементов
+
+    @property
+    def has_problems(self):
+        return bool(self.unreachable or self.orphans or self.dead_ends or self.foreign or self.cycles)
+
+    def problems(self):
+        """Сообщения о найденных проблемах"""
+        messages = []
+        for nodes, title in (
+            (self.foreign, "Связи ссылаются на элементы, которых нет у признака"),
+            (self.cycles, "Циклы в структуре"),
+            (self.unreachable, "Недостижимые из корней ветви"),
+            (self.orphans, "Элементы без родительских связей"),
+            (self.dead_ends, "Элементы без дочерних связей"),
+        ):
+            if not nodes:
+                continue
+            messages.append(f"{title}: {len(nodes)}")
+            for item in nodes[:MAX_LISTED]:
+                if isinstance(item, list):
+                    messages.append("    " + " → ".join(_node_text(node) for node in item[:MAX_LISTED]))
+                else:
+                    messages.append(f"    {_node_text(item)}")
+            if len(nodes) > MAX_LISTED:
+                messages.append(f"    ... и ещё {len(nodes) - MAX_LISTED}")
+        return messages
+
+    def statistics(self):
+        """Строки со статистикой структуры"""
+        lines = [
+            f"Узлов: {self.node_count}, связей: {self.connection_count}",
+            f"Корней: {len(self.roots)}, достижимо из корней: {self.reachable}",
+            f"Наибольшее число входящих связей: {self.max_fan_in}, исходящих: {self.max_fan_out}",
+            "Распределение исходящих связей: " + _distribution_text(self.fan_out),
+            "Распределение входящих связей: " + _distribution_text(self.fan_in),
+        ]
+        if self.density:
+            lines.append("Плотность связей по парам признаков:")
+            for (classifier1, classifier2), density in self.density.items():
+                lines.append(f"    {classifier1} → {classifier2}: {density:.1%}")
+        return lines
+
+    def to_text(self):
+        """Текст отчёта: проблемы и статистика"""
+        lines = self.problems() or ["Проблем в структуре не найдено"]
+        return "\n".join(lines + [""] + self.statistics())
+
+    def to_dict(self):
+        """Отчёт в виде словаря, пригодного для JSON"""
+        as_lists = lambda nodes: [list(node) for node in nodes]
+        return {
+            'nodes': self.node_count,
+            'connections': self.connection_count,
+            'roots': len(self.roots),
+            'reachable': self.reachable,
+            'unreachable': as_lists(self.unreachable),
+            'orphans': as_lists(self.orphans),
+            'dead_ends': as_lists(self.dead_ends),
+            'foreign': as_lists(self.foreign),
+            'cycles': [as_lists(cycle) for cycle in self.cycles],
+            'fan_in': self.fan_in,
+            'fan_out': self.fan_out,
+            'max_fan_in': self.max_fan_in,
+            'max_fan_out': self.max_fan_out,
+            'density': [
+                {'from': classifier1, 'to': classifier2, 'density': density}
+                for (classifier1, classifier2), density in self.density.items()
+            ],
+        }
+
+
+def _node_text(node):
+    return f"'{node[1]}' ({node[0]})"
+
+
+def _distribution_text(distribution):
+    return ", ".join(f"{degree}: {count}" for degree, count in distribution.items()) or "-"
+
+
+def _number_nodes(project):
+    """Номера узлов и связей: (узлы, число узлов из списков элементов, начала, концы)"""
+    ids = {}
+    nodes = []
+    for classifier in project.classifiers:
+        for element in project.elements.get(classifier, ()):
+            key = (classifier, element)
+            if key not in ids:
+                ids[key] = len(nodes)
+                nodes.append(key)
+    for classifier, elements in project.elements.items():
+        for element in elements:
+            key = (classifier, element)
+            if key not in ids:
+                ids[key] = len(nodes)
+                nodes.append(key)
+    declared = len(nodes)
+    sources = []
+    targets = []
+    for connection in project.structure:
+        for key, side in (
+            ((connection['from_classifier'], connection['from_element']), sources),
+            ((connection['to_classifier'], connection['to_element']), targets),
+        ):
+            node_id = ids.get(key)
+            if node_id is None:
+                node_id = ids[key] = len(nodes)
+                nodes.append(key)
+            side.append(node_id)
+    return nodes, declared, sources, targets
+
+
+def _numpy():
+    """Модуль numpy или None; импортируется только при анализе, чтобы не замедлять запуск программы"""
+    try:
+        import numpy
+    except ImportError:  # анализ работает и без numpy, но медленнее
+        return None
+    return numpy
+
+
+def _adjacency(node_count, sources, targets, np=None):
+    """Сжатые списки смежности: (indptr, targets, входящие степени, исходящие степени)"""
+    if np is not None:
+        source_array = np.asarray(sources, dtype=np.int64)
+        target_array = np.asarray(targets, dtype=np.int64)
+        out_degree = np.bincount(source_array, minlength=node_count)
+        in_degree = np.bincount(target_array, minlength=node_count)
+        indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(out_degree, out=indptr[1:])
+        order = np.argsort(source_array, kind='stable')
+        return indptr.tolist(), target_array[order].tolist(), in_degree.tolist(), out_degree.tolist()
+    out_degree = [0] * node_count
+    in_degree = [0] * node_count
+    for source in sources:
+        out_degree[source] += 1
+    for target in targets:
+        in_degree[target] += 1
+    indptr = [0] * (node_count + 1)
+    for node in range(node_count):
+        indptr[node + 1] = indptr[node] + out_degree[node]
+    position = indptr[:-1]
+    ordered = [0] * len(targets)
+    for source, target in zip(sources, targets):
+        ordered[position[source]] = target
+        position[source] += 1
+    return indptr, ordered, in_degree, out_degree
+
+
+def _reach(roots, indptr, targets, node_count):
+    """Битовая маска (bytearray) узлов, достижимых из roots"""
+    reached = bytearray(node_count)
+    stack = []
+    for root in roots:
+        if not reached[root]:
+            reached[root] = 1
+            stack.append(root)
+    while stack:
+        node = stack.pop()
+        for child in targets[indptr[node]:indptr[node + 1]]:
+            if not reached[child]:
+                reached[child] = 1
+                stack.append(child)
+    return reached
+
+
+def _cycles(node_count, indptr, targets):
+    """Сильно связные компоненты из нескольких узлов и петли (итеративный алгоритм Тарьяна)"""
+    index = [-1] * node_count
+    low = [0] * node_count
+    on_stack = bytearray(node_count)
+    stack = []
+    components = []
+    counter = 0
+    for start in range(node_count):
+        if index[start] != -1 or indptr[start] == indptr[start + 1]:
+            continue
+        index[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack[start] = 1
+        work = [(start, indptr[start])]
+        while work:
+            node, position = work[-1]
+            if position < indptr[node + 1]:
+                work[-1] = (node, position + 1)
+                child = targets[position]
+                if index[child] == -1:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = 1
+                    work.append((child, indptr[child]))
+                elif on_stack[child] and index[child] < low[node]:
+                    low[node] = index[child]
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in targets[indptr[node]:indptr[node + 1]]:
+                    component.reverse()
+                    components.append(component)
+    return components
+
+
+def _distribution(degrees):
+    return dict(sorted(Counter(degrees).items()))
+
+
+def analyze_structure(project):
+    """Проанализировать структуру связей проекта и вернуть StructureReport"""
+    np = _numpy()
+    report = StructureReport()
+    nodes, declared, sources, targets = _number_nodes(project)
+    node_count = len(nodes)
+    report.node_count = node_count
+    report.connection_count = len(sources)
+    indptr, ordered_targets, in_degree, out_degree = _adjacency(node_count, sources, targets, np)
+
+    first_classifier, _ = project.root_elements()
+    last_classifier = project.classifiers[-1] if project.classifiers else None
+    root_ids = [node_id for node_id, node in enumerate(nodes) if node[0] == first_classifier and node_id < declared]
+    report.roots = [nodes[node_id] for node_id in root_ids]
+    reached = _reach(root_ids, indptr, ordered_targets, node_count)
+    report.reachable = sum(reached)
+
+    for node_id, node in enumerate(nodes):
+        if node_id >= declared:
+            report.foreign.append(node)
+        if reached[node_id]:
+            if out_degree[node_id] == 0 and node[0] != last_classifier:
+                report.dead_ends.append(node)
+        elif in_degree[node_id]:
+            report.unreachable.append(node)
+        elif node[0] != first_classifier:
+            report.orphans.append(node)
+
+    report.cycles = [[nodes[node_id] for node_id in component] for component in _cycles(node_count, indptr, ordered_targets)]
+    report.fan_in = _distribution(in_degree)
+    report.fan_out = _distribution(out_degree)
+    report.max_fan_in = max(in_degree, default=0)
+    report.max_fan_out = max(out_degree, default=0)
+
+    # Плотность: доля пар элементов двух признаков, между которыми есть связь
+    classifier_ids = {}
+    node_classifier = []
+    for classifier, _ in nodes:
+        node_classifier.append(classifier_ids.setdefault(classifier, len(classifier_ids)))
+    classifier_names = list(classifier_ids)
+    classifier_sizes = Counter(node_classifier)
+    pair_count = len(classifier_names)
+    if np is not None and sources:
+        # Повторные связи между одними и теми же узлами считаются один раз
+        edges = np.unique(np.asarray(sources, dtype=np.int64) * node_count + np.asarray(targets, dtype=np.int64))
+        classifier_array = np.asarray(node_classifier, dtype=np.int64)
+        pair_keys = classifier_array[edges // node_count] * pair_count + classifier_array[edges % node_count]
+        counts = np.bincount(pair_keys)
+        pair_counts = {int(key): int(counts[key]) for key in np.flatnonzero(counts)}
+    else:
+        pair_counts = Counter(
+            node_classifier[source] * pair_count + node_classifier[target]
+            for source, target in set(zip(sources, targets))
+        )
+    for key in sorted(pair_counts, key=lambda key: (key // pair_count, key % pair_count)):
+        classifier1, classifier2 = divmod(key, pair_count)
+        size = classifier_sizes[classifier1] * classifier_sizes[classifier2]
+        report.density[(classifier_names[classifier1], classifier_names[classifier2])] = pair_counts[key] / size
+    return report
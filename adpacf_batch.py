@@ -0,0 +1,156 @@
+"""Пакетная обработка архива проектов в нескольких процессах.
+
+Каждый проект из каталога или маски файлов загружается, проверяется
+(Project.validate, при необходимости - анализ структуры), экспортируется
+в выбранные форматы и при необходимости пересохраняется в другом формате
+файла проекта. Проекты обрабатываются в ProcessPoolExecutor, поэтому
+используются все ядра; ошибка в одном файле записывается в его результат
+и не останавливает обработку остальных. Для каждого файла замеряется время
+отдельных этапов.
+
+Пример:
+    results = run_batch(collect_projects(["archive/"]), BatchOptions(export_formats=["txt"]))
+"""
+import glob
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from adpacf_analytics import analyze_structure
+from adpacf_core import BINARY_PROJECT_EXTENSION, PROJECT_EXTENSION, Project, ProjectError
+from adpacf_export import EXPORT_FORMATS, export_report
+from adpacf_journal import replay_journal
+
+PROJECT_PATTERNS = ("*" + PROJECT_EXTENSION, "*" + BINARY_PROJECT_EXTENSION)
+
+
+class BatchOptions:
+    """Что делать с каждым проектом пакета"""
+
+    def __init__(
+        self, export_formats=(), convert_to=None, output_dir=None, structure=False, back_references=False, journal=True
+    ):
+        self.export_formats = list(export_formats)  # форматы экспорта из EXPORT_FORMATS
+        self.convert_to = convert_to                # расширение нового файла проекта или None
+        self.output_dir = output_dir                # каталог результатов; None - рядом с проектом
+        self.structure = structure                  # проверять также структуру связей
+        self.back_references = back_references      # ссылки вместо повторов в текстовом отчёте
+        self.journal = journal                      # повторять несохранённые изменения из журнала
+        self.root = None                            # общий каталог проектов для путей результатов
+
+
+def collect_projects(patterns):
+    """Файлы проектов по каталогам (рекурсивно) и маскам файлов, без повторов и по порядку"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for name in PROJECT_PATTERNS:
+                paths.update(glob.glob(os.path.join(pattern, "**", name), recursive=True))
+        else:
+            paths.update(glob.glob(pattern, recursive=True))
+    # Временные файлы атомарного сохранения пропускаются
+    return sorted(path for path in paths if os.path.isfile(path) and ".tmp." not in os.path.basename(path))
+
+
+def output_path(options, project_path, extension):
+    """Путь результата обработки проекта с заданным расширением"""
+    stem = os.path.splitext(os.path.basename(project_path))[0]
+    directory = os.path.dirname(project_path)
+    if options.output_dir is not None:
+        relative = os.path.relpath(directory, options.root) if options.root else ""
+        directory = os.path.normpath(os.path.join(options.output_dir, relative))
+        os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, stem + extension)
+
+
+def process_project(project_path, options):
+    """Обработать один проект; исключения не выбрасываются, а записываются в результат"""
+    result = {
+        'path': project_path,
+        'ok': False,
+        'problems': [],
+        'outputs': [],
+        'timings': {},
+        'error': None,
+    }
+    started = time.perf_counter()
+    stage = 'load'
+    try:
+        project = Project.load(project_path)
+        if options.journal:
+            replay_journal(project, project_path)
+        result['timings']['load'] = time.perf_counter() - started
+        stage = 'validate'
+        start = time.perf_counter()
+        result['problems'] = project.validate()
+        if options.structure:
+            result['problems'] += analyze_structure(project).problems()
+        result['timings']['validate'] = time.perf_counter() - start
+        for export_format in options.export_formats:
+            stage = f'export_{export_format}'
+            start = time.perf_counter()
+            path = output_path(options, project_path, "." + export_format)
+            export_report(project, path, export_format, options.back_references)
+            result['outputs'].append(path)
+            result['timings'][stage] = time.perf_counter() - start
+        if options.convert_to:
+            stage = 'convert'
+            start = time.perf_counter()
+            path = output_path(options, project_path, options.convert_to)
+            if os.path.abspath(path) == os.path.abspath(project_path):
+                raise ProjectError("Файл проекта уже в этом формате")
+            project.save(path)
+            result['outputs'].append(path)
+            result['timings'][stage] = time.perf_counter() - start
+        result['ok'] = True
+    except (OSError, ProjectError) as e:
+        result['error'] = f"{stage}: {e}"
+    except Exception as e:  # непредвиденная ошибка не должна останавливать пакет
+        result['error'] = f"{stage}: {type(e).__name__}: {e}"
+        result['traceback'] = traceback.format_exc()
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def run_batch(paths, options, workers=None, on_result=None):
+    """Обработать проекты в workers процессах (None - по числу ядер); вернуть результаты в порядке paths.
+
+    on_result(результат) вызывается по мере завершения файлов.
+    """
+    for export_format in options.export_formats:
+        if export_format not in EXPORT_FORMATS:
+            raise ProjectError(f"Неизвестный формат экспорта: {export_format}")
+    if options.output_dir is not None and paths:
+        options.root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    results = {}
+    if workers == 1:
+        for path in paths:
+            results[path] = process_project(path, options)
+            if on_result is not None:
+                on_result(results[path])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(process_project, path, options): path for path in paths}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:  # процесс обработчика аварийно завершился
+                    result = {'path': path, 'ok': False, 'problems': [], 'outputs': [], 'timings': {},
+                              'error': f"{type(e).__name__}: {e}", 'seconds': 0.0}
+                results[path] = result
+                if on_result is not None:
+                    on_result(result)
+    return [results[path] for path in paths]
+
+
+def batch_summary(results, seconds):
+    """Сводка пакета: число файлов, ошибок и проектов с проблемами, общее время"""
+    return {
+        'projects': len(results),
+        'failed': sum(1 for result in results if not result['ok']),
+        'invalid': sum(1 for result in results if result['ok'] and result['problems']),
+        'seconds': seconds,
+        'cpu_seconds': sum(result['seconds'] for result in results),
+    }
@@ -0,0 +1,268 @@
+"""Замеры производительности АДПАЦФ на синтетических проектах.
+
+Генератор создаёт проект с заданным числом признаков, элементов в признаке,
+плотностью связей между соседними признаками и длиной комментариев. Затем
+замеряются основные операции: сохранение и загрузка (JSON и двоичный формат),
+перебор комбинаций анализа связей, экспорт во все форматы и, если доступен
+дисплей, построение дерева результатов в скрытом окне Tk. Для каждой операции
+записываются время (медиана и все повторы) и пиковый объём памяти по
+tracemalloc; отчёт выводится в JSON для сравнения версий.
+
+Примеры:
+    python adpacf_bench.py -o report.json
+    python adpacf_bench.py --classifiers 5 --elements 400 --density 0.02 --repeat 5
+    python adpacf_bench.py --generate synthetic.adpacf --elements 1000
+    python adpacf_bench.py --project real.adpacf --no-gui
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from adpacf_core import STAGE_RESULTS, Project, ProjectError
+from adpacf_export import EXPORT_FORMATS, export_report
+
+REPORT_VERSION = 1
+MAX_TREE_NODES = 200000  # предел узлов для замера полностью раскрытого дерева
+COMMENT_ALPHABET = "абвгдежзийклмнопрстуфхцчшщэюя "
+
+
+def generate_project(classifiers=4, elements=100, density=0.05, comment_length=20, seed=0):
+    """Синтетический проект на этапе результатов.
+
+    Между каждой парой соседних признаков случайно выбирается
+    density * elements * elements значимых связей.
+    """
+    rng = random.Random(seed)
+    project = Project("Синтетический проект")
+    for i in range(classifiers):
+        classifier = project.add_classifier(f"Признак {i + 1}")
+        project.add_elements(classifier, [f"Элемент {i + 1}.{j + 1}" for j in range(elements)])
+    pair_count = elements * elements
+    edge_count = min(pair_count, round(density * pair_count))
+    for i in range(classifiers - 1):
+        classifier1 = project.classifiers[i]
+        classifier2 = project.classifiers[i + 1]
+        elements1 = project.elements[classifier1]
+        elements2 = project.elements[classifier2]
+        for pair in sorted(rng.sample(range(pair_count), edge_count)):
+            comment = "".join(rng.choices(COMMENT_ALPHABET, k=comment_length)) if comment_length else ""
+            project.structure.add(
+                classifier1, elements1[pair // elements], classifier2, elements2[pair % elements], comment
+            )
+    project.current_stage = STAGE_RESULTS
+    return project
+
+
+def count_tree_nodes(project):
+    """Число узлов полностью раскрытого дерева результатов или None, если в структуре есть цикл"""
+    structure = project.structure
+    sizes = {}
+    first_classifier, roots = project.root_elements()
+    total = 0
+    for root in roots:
+        stack = [((first_classifier, root), False)]
+        on_path = set()
+        while stack:
+            node, expanded = stack.pop()
+            if node in sizes:
+                continue
+            children = [
+                (connection['to_classifier'], connection['to_element'])
+                for connection in structure.children(*node)
+            ]
+            if expanded:
+                on_path.discard(node)
+                sizes[node] = 1 + sum(sizes[child] for child in children)
+                continue
+            if node in on_path:
+                return None
+            on_path.add(node)
+            stack.append((node, True))
+            for child in children:
+                if child in on_path:
+                    return None
+                if child not in sizes:
+                    stack.append((child, False))
+        total += sizes[(first_classifier, root)]
+    return total
+
+
+def measure(name, operation, repeat):
+    """Замерить операцию: время каждого повтора и пиковую память одного дополнительного прогона"""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = operation()
+        runs.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        operation()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'name': name,
+        'seconds': statistics.median(runs),
+        'runs': runs,
+        'peak_memory': peak,
+    }, result
+
+
+def skipped(name, reason):
+    """Запись отчёта о пропущенном замере"""
+    return {'name': name, 'skipped': reason}
+
+
+def benchmark_core(project, repeat, directory):
+    """Замеры операций, не требующих графического интерфейса"""
+    results = []
+    for extension in ("adpacf", "adpacfb"):
+        path = os.path.join(directory, f"project.{extension}")
+        record, _ = measure(f"save_{extension}", lambda: project.save(path), repeat)
+        record['file_size'] = os.path.getsize(path)
+        results.append(record)
+        record, _ = measure(f"load_{extension}", lambda: Project.load(path), repeat)
+        results.append(record)
+    record, pending = measure("generate_combinations", lambda: sum(1 for _ in project.generate_combinations()), repeat)
+    record['combinations'] = pending
+    results.append(record)
+    record, _ = measure("pending_count", project.pending_count, repeat)
+    results.append(record)
+    for export_format in EXPORT_FORMATS:
+        path = os.path.join(directory, f"report.{export_format}")
+        record, _ = measure(f"export_{export_format}", lambda: export_report(project, path), repeat)
+        record['file_size'] = os.path.getsize(path)
+        results.append(record)
+    path = os.path.join(directory, "report_back_references.txt")
+    record, _ = measure(
+        "export_txt_back_references", lambda: export_report(project, path, back_references=True), repeat
+    )
+    record['file_size'] = os.path.getsize(path)
+    results.append(record)
+    return results
+
+
+def benchmark_gui(project, repeat):
+    """Замеры дерева результатов в скрытом окне Tk; без дисплея замеры пропускаются"""
+    names = ("show_results", "build_structure_tree", "build_structure_tree_expanded")
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:  # нет tkinter или дисплея
+        return [skipped(name, f"Tk недоступен: {e}") for name in names]
+    try:
+        root.withdraw()
+        from ADPACF import ADPACFApp
+        app = ADPACFApp(root)
+        app.set_project(project)
+        results = []
+        record, _ = measure("show_results", app.show_results, repeat)
+        results.append(record)
+        record, _ = measure("build_structure_tree", app.build_structure_tree, repeat)
+        record['tree_items'] = len(app.tree_keys)
+        results.append(record)
+        node_count = count_tree_nodes(project)
+        if node_count is None:
+            results.append(skipped("build_structure_tree_expanded", "в структуре есть цикл"))
+        elif node_count > MAX_TREE_NODES:
+            results.append(skipped(
+                "build_structure_tree_expanded", f"раскрытое дерево содержит {node_count} узлов (предел {MAX_TREE_NODES})"
+            ))
+        else:
+            app.lazy_tree = False
+            record, _ = measure("build_structure_tree_expanded", app.build_structure_tree, repeat)
+            record['tree_items'] = len(app.tree_keys)
+            results.append(record)
+            app.lazy_tree = True
+        return results
+    finally:
+        root.destroy()
+
+
+def run_benchmarks(project, parameters, repeat=3, gui=True):
+    """Выполнить все замеры и вернуть отчёт"""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="adpacf_bench_") as directory:
+        results.extend(benchmark_core(project, repeat, directory))
+    if gui:
+        results.extend(benchmark_gui(project, repeat))
+    summary = project.summary()
+    return {
+        'report_version': REPORT_VERSION,
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': parameters,
+        'project': {
+            'classifiers': summary['classifiers'],
+            'elements': summary['elements'],
+            'connections': summary['connections'],
+        },
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def build_parser():
+    """Создать разборщик аргументов командной строки"""
+    parser = argparse.ArgumentParser(
+        prog="adpacf-bench",
+        description="Замеры производительности АДПАЦФ на синтетическом или существующем проекте"
+    )
+    parser.add_argument("--classifiers", type=int, default=4, help="число признаков (по умолчанию 4)")
+    parser.add_argument("--elements", type=int, default=100, help="число элементов в признаке (по умолчанию 100)")
+    parser.add_argument(
+        "--density", type=float, default=0.05,
+        help="доля значимых пар элементов соседних признаков (по умолчанию 0.05)"
+    )
+    parser.add_argument("--comment-length", type=int, default=20, help="длина комментария связи (по умолчанию 20)")
+    parser.add_argument("--seed", type=int, default=0, help="начальное значение генератора случайных чисел")
+    parser.add_argument("--project", help="замерить существующий проект вместо синтетического")
+    parser.add_argument("--generate", metavar="FILE", help="только сохранить синтетический проект в файл")
+    parser.add_argument("--repeat", type=int, default=3, help="число повторов каждого замера (по умолчанию 3)")
+    parser.add_argument("--no-gui", action="store_true", help="не замерять дерево результатов")
+    parser.add_argument("-o", "--output", help="файл отчёта JSON (по умолчанию stdout)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.project:
+        try:
+            project = Project.load(args.project)
+        except (OSError, ProjectError) as e:
+            print(f"{args.project}: не удалось загрузить проект: {e}", file=sys.stderr)
+            return 2
+        parameters = {'project': args.project}
+    else:
+        parameters = {
+            'classifiers': args.classifiers,
+            'elements': args.elements,
+            'density': args.density,
+            'comment_length': args.comment_length,
+            'seed': args.seed,
+        }
+        project = generate_project(args.classifiers, args.elements, args.density, args.comment_length, args.seed)
+    if args.generate:
+        project.save(args.generate)
+        return 0
+    report = run_benchmarks(project, parameters, max(1, args.repeat), gui=not args.no_gui)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""Компактный двоичный формат проекта АДПАЦФ (.adpacfb).
+
+Все строки проекта хранятся один раз в таблице строк, а связи - записями
+фиксированной длины из пяти 32-битных номеров строк (признак и элемент
+начала, признак и элемент конца, комментарий). Файл читается через mmap:
+строки декодируются по запросу, поэтому комментарии можно загрузить
+позже, когда структура уже показана.
+
+Устройство файла (little-endian):
+    заголовок           FILE_HEADER
+    смещения строк      (число строк + 1) x u64, относительно начала блока строк
+    таблица признаков   u32: число признаков, номера признаков,
+                        число групп элементов, затем для каждой группы
+                        номер признака, число элементов, номера элементов
+    связи               число связей x CONNECTION_RECORD
+    решения             u32: наличие позиции анализа, 4 номера строк позиции (если есть),
+                        число незначимых комбинаций, по 4 номера строк на комбинацию
+                        (начиная с версии 2)
+    блок строк          строки в UTF-8 подряд
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+from adpacf_core import COMBINATIONS_ADJACENT, COMBINATIONS_ALL_PAIRS, Project, ProjectError
+
+BINARY_MAGIC = b"ADPACFB\0"
+BINARY_VERSION = 2
+
+# магия, версия, резерв, число строк, длина таблицы признаков в u32, число связей, этап, номер имени проекта
+FILE_HEADER_V1 = struct.Struct("<8sHHIIIiI")
+# заголовок версии 1, длина таблицы решений в u32, флаги проекта
+FILE_HEADER = struct.Struct("<8sHHIIIiIII")
+FLAG_ALL_PAIRS = 1  # комбинации перебираются по всем парам признаков
+CONNECTION_RECORD = struct.Struct("<IIIII")
+CONNECTION_WIDTH = CONNECTION_RECORD.size // 4
+
+DEFERRED_CHUNK = 10000  # число комментариев, декодируемых за один шаг отложенной загрузки
+PROGRESS_STEP = 65536  # число связей между сообщениями о прогрессе фоновой операции
+
+
+def is_binary_project(filepath):
+    """Является ли файл проектом в двоичном формате"""
+    with open(filepath, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def _u32_array(values=()):
+    result = array('I', values)
+    if result.itemsize != 4:
+        result = array('L', values)
+    return result
+
+
+class _StringTable:
+    """Таблица строк с интернированием при записи"""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, value):
+        if not isinstance(value, str):
+            raise ProjectError(f"Ожидалась строка, получено: {value!r}")
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+
+def save_binary(project, filepath, control=None):
+    """Сохранить проект в двоичном формате; control - необязательный TaskControl фоновой операции"""
+    if not isinstance(project.current_stage, int):
+        raise ProjectError(f"Некорректный этап проекта: {project.current_stage!r}")
+    strings = _StringTable()
+    project_name_id = strings.intern(project.project_name)
+
+    # Названия признаков и элементов интернируются первыми и занимают начало таблицы строк
+    classifier_words = _u32_array([len(project.classifiers)])
+    classifier_words.extend(strings.intern(classifier) for classifier in project.classifiers)
+    classifier_words.append(len(project.elements))
+    for classifier, elements in project.elements.items():
+        classifier_words.append(strings.intern(classifier))
+        classifier_words.append(len(elements))
+        classifier_words.extend(strings.intern(element) for element in elements)
+
+    connection_words = _u32_array()
+    intern = strings.intern
+    connection_count = len(project.structure)
+    for number, connection in enumerate(project.structure):
+        if control is not None and not number % PROGRESS_STEP:
+            control.progress(number, connection_count)
+        connection_words.extend((
+            intern(connection['from_classifier']),
+            intern(connection['from_element']),
+            intern(connection['to_classifier']),
+            intern(connection['to_element']),
+            intern(connection['comment'])
+        ))
+
+    decision_words = _u32_array()
+    if project.analysis_cursor is not None:
+        decision_words.append(1)
+        decision_words.extend(intern(value) for value in project.analysis_cursor)
+    else:
+        decision_words.append(0)
+    decision_words.append(len(project.rejected))
+    for combination in project.rejected:
+        decision_words.extend(intern(value) for value in combination)
+
+    encoded = [value.encode('utf-8') for value in strings.strings]
+    offsets = array('Q', [0])
+    position = 0
+    for data in encoded:
+        position += len(data)
+        offsets.append(position)
+
+    if sys.byteorder != 'little':
+        for table in (classifier_words, connection_words, decision_words, offsets):
+            table.byteswap()
+
+    if control is not None:
+        control.check()
+    with open(filepath, 'wb') as f:
+        f.write(FILE_HEADER.pack(
+            BINARY_MAGIC, BINARY_VERSION, 0,
+            len(strings.strings), len(classifier_words), len(connection_words) // CONNECTION_WIDTH,
+            project.current_stage, project_name_id, len(decision_words),
+            FLAG_ALL_PAIRS if project.combination_mode == COMBINATIONS_ALL_PAIRS else 0
+        ))
+        f.write(offsets.tobytes())
+        f.write(classifier_words.tobytes())
+        f.write(connection_words.tobytes())
+        f.write(decision_words.tobytes())
+        f.writelines(encoded)
+
+
+class BinaryProjectReader:
+    """Чтение двоичного проекта через mmap с декодированием строк по запросу"""
+
+    def __init__(self, filepath):
+        self._file = open(filepath, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            self._file.close()
+            raise ProjectError("Файл проекта пуст") from e
+        self._views = []
+        self._cache = {}
+        try:
+            self._parse()
+        except (ProjectError, struct.error, TypeError, ValueError) as e:
+            self.close()
+            if isinstance(e, ProjectError):
+                raise
+            raise ProjectError(f"Файл повреждён: {e}") from e
+
+    def _parse(self):
+        if len(self._map) < FILE_HEADER_V1.size:
+            raise ProjectError("Файл не является проектом АДПАЦФ")
+        (magic, version, _, string_count, classifier_word_count, connection_count,
+         self.current_stage, self._project_name_id) = FILE_HEADER_V1.unpack_from(self._map, 0)
+        if magic != BINARY_MAGIC:
+            raise ProjectError("Файл не является проектом АДПАЦФ")
+        if version > BINARY_VERSION:
+            raise ProjectError(f"Неподдерживаемая версия двоичного формата: {version}")
+        if version >= 2:
+            decision_word_count, self.flags = FILE_HEADER.unpack_from(self._map, 0)[8:]
+            position = FILE_HEADER.size
+        else:
+            decision_word_count = 0
+            self.flags = 0
+            position = FILE_HEADER_V1.size
+        self._offsets, position = self._table(position, string_count + 1, 'Q', 8)
+        self._classifier_words, position = self._table(position, classifier_word_count, 'I', 4)
+        self.connection_words, position = self._table(
+            position, connection_count * CONNECTION_WIDTH, 'I', 4
+        )
+        self.connection_count = connection_count
+        self._decision_words, position = self._table(position, decision_word_count, 'I', 4)
+        self._blob_start = position
+        if self._blob_start + self._offsets[string_count] > len(self._map):
+            raise ProjectError("Файл повреждён: блок строк обрезан")
+
+    def _table(self, position, count, typecode, itemsize):
+        end = position + count * itemsize
+        if end > len(self._map):
+            raise ProjectError("Файл повреждён: таблица обрезана")
+        if sys.byteorder == 'little' and array(typecode).itemsize == itemsize:
+            view = memoryview(self._map)[position:end]
+            self._views.append(view)
+            table = view.cast(typecode)
+            self._views.append(table)
+        else:
+            table = array(typecode if typecode == 'Q' else _u32_array().typecode)
+            table.frombytes(self._map[position:end])
+            if sys.byteorder != 'little':
+                table.byteswap()
+        return table, end
+
+    def string(self, string_id):
+        """Декодировать строку по номеру"""
+        value = self._cache.get(string_id)
+        if value is None:
+            start = self._blob_start + self._offsets[string_id]
+            end = self._blob_start + self._offsets[string_id + 1]
+            value = self._cache[string_id] = self._map[start:end].decode('utf-8')
+        return value
+
+    @property
+    def project_name(self):
+        return self.string(self._project_name_id)
+
+    def classifiers_and_elements(self):
+        """Список признаков и словарь элементов в исходном порядке"""
+        words = self._classifier_words
+        classifier_count = words[0]
+        classifiers = [self.string(words[1 + i]) for i in range(classifier_count)]
+        position = 1 + classifier_count
+        elements = {}
+        group_count = words[position]
+        position += 1
+        for _ in range(group_count):
+            classifier = self.string(words[position])
+            element_count = words[position + 1]
+            position += 2
+            elements[classifier] = [self.string(words[position + i]) for i in range(element_count)]
+            position += element_count
+        return classifiers, elements
+
+    def decisions(self):
+        """Позиция анализа связей и незначимые комбинации"""
+        words = self._decision_words
+        if not len(words):
+            return None, {}
+        position = 0
+        cursor = None
+        if words[position]:
+            cursor = tuple(self.string(words[position + 1 + i]) for i in range(4))
+            position += 4
+        position += 1
+        rejected_count = words[position]
+        position += 1
+        rejected = {}
+        for i in range(position, position + rejected_count * 4, 4):
+            rejected[tuple(self.string(words[i + j]) for j in range(4))] = None
+        return cursor, rejected
+
+    def close(self):
+        """Освободить отображение файла"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._cache = {}
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+
+class DeferredComments:
+    """Комментарии связей, декодируемые порциями после загрузки структуры"""
+
+    def __init__(self, reader, pending):
+        self._reader = reader
+        self._pending = pending  # [(связь, номер строки комментария)]
+        self._position = 0
+
+    def __len__(self):
+        return len(self._pending) - self._position
+
+    def load(self, limit=None):
+        """Декодировать не более limit комментариев; вернуть True, если остались ещё"""
+        end = len(self._pending) if limit is None else min(len(self._pending), self._position + limit)
+        string = self._reader.string
+        for connection, comment_id in self._pending[self._position:end]:
+            connection['comment'] = string(comment_id)
+        self._position = end
+        if self._position < len(self._pending):
+            return True
+        self._pending = []
+        self._reader.close()
+        return False
+
+
+def load_binary(filepath, defer_comments=False, control=None):
+    """Загрузить проект из двоичного файла.
+
+    При defer_comments=True комментарии связей остаются пустыми до вызова
+    Project.load_deferred_comments(), а файл остаётся отображённым в память.
+    control - необязательный TaskControl фоновой операции (прогресс и отмена).
+    """
+    reader = BinaryProjectReader(filepath)
+    try:
+        project = Project(reader.project_name)
+        project.current_stage = reader.current_stage
+        project.combination_mode = COMBINATIONS_ALL_PAIRS if reader.flags & FLAG_ALL_PAIRS else COMBINATIONS_ADJACENT
+        project.classifiers, project.elements = reader.classifiers_and_elements()
+        project.analysis_cursor, project.rejected = reader.decisions()
+        string = reader.string
+        add = project.structure.add
+        pending = []
+        words = iter(reader.connection_words)
+        records = zip(*[words] * CONNECTION_WIDTH)
+        for number, (from_classifier, from_element, to_classifier, to_element, comment_id) in enumerate(records):
+            if control is not None and not number % PROGRESS_STEP:
+                control.progress(number, reader.connection_count)
+            connection = add(
+                string(from_classifier), string(from_element),
+                string(to_classifier), string(to_element),
+                "" if defer_comments else string(comment_id)
+            )
+            if defer_comments:
+                pending.append((connection, comment_id))
+    except (IndexError, UnicodeDecodeError) as e:
+        reader.close()
+        raise ProjectError(f"Файл повреждён: {e}") from e
+    except BaseException:
+        reader.close()
+        raise
+    if pending:
+        project.deferred_comments = DeferredComments(reader, pending)
+    else:
+        reader.close()
+    return project
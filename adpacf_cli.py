@@ -0,0 +1,354 @@
+"""Командная строка АДПАЦФ для работы с файлами проектов без графического интерфейса.
+
+Как и программа, команды повторяют несохранённые изменения из журнала
+проекта (<проект>.journal); журнал при этом не меняется, кроме convert
+в тот же файл, после которого он становится не нужен.
+
+Примеры:
+    python adpacf_cli.py info project.adpacf
+    python adpacf_cli.py --ignore-journal info project.adpacf
+    python adpacf_cli.py validate project.adpacf
+    python adpacf_cli.py validate --structure project.adpacf
+    python adpacf_cli.py analyze project.adpacf --json
+    python adpacf_cli.py export project.adpacf -o report.txt
+    python adpacf_cli.py export project.adpacf -o edges.csv
+    python adpacf_cli.py convert project.adpacf normalized.adpacf
+    python adpacf_cli.py convert project.adpacf project.adpacfb
+    python adpacf_cli.py shard project.adpacf -n 4
+    python adpacf_cli.py merge project.adpacf project.part*of4.adpacf -o merged.adpacf
+    python adpacf_cli.py batch archive/ --export txt --export csv -o reports/ -j 8
+    python adpacf_cli.py serve project.adpacf other.adpacf --port 8765
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from adpacf_core import BINARY_PROJECT_EXTENSION, PROJECT_EXTENSION, Project, ProjectError
+from adpacf_export import EXPORT_FORMATS, export_report, write_text_report
+from adpacf_journal import journal_path, replay_journal, save_atomically
+
+EXIT_OK = 0
+EXIT_INVALID = 1   # проект загружен, но содержит ошибки
+EXIT_FAILURE = 2   # проект не удалось прочитать или записать
+
+# Модули анализа, пакетной обработки, участков и сервиса импортируются в обработчиках команд:
+# они тянут numpy, asyncio и пул процессов, которые не нужны остальным командам.
+
+
+def load_project(filepath, journal=True):
+    """Загрузить проект, сообщив об ошибке в stderr.
+
+    При journal=True повторяются несохранённые изменения из журнала проекта
+    (как при открытии в программе); журнал только читается.
+    """
+    try:
+        project = Project.load(filepath)
+        if journal:
+            replay_journal(project, filepath)
+        return project
+    except (OSError, ProjectError) as e:
+        print(f"{filepath}: не удалось загрузить проект: {e}", file=sys.stderr)
+        return None
+
+
+def command_info(args):
+    """Вывести сводку по проекту"""
+    project = load_project(args.project, not args.ignore_journal)
+    if project is None:
+        return EXIT_FAILURE
+    summary = project.summary()
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return EXIT_OK
+    print(f"Проект: {summary['project_name']}")
+    print(f"Этап: {summary['current_stage']}")
+    print(f"Признаков: {summary['classifiers']}")
+    for classifier, count in summary['elements_per_classifier'].items():
+        print(f"    {classifier}: {count}")
+    print(f"Элементов: {summary['elements']}")
+    print(f"Значимых связей: {summary['connections']}")
+    print(f"Незначимых комбинаций: {summary['rejected']}")
+    print(f"Не рассмотрено комбинаций: {summary['pending']}")
+    print(f"Режим перебора комбинаций: {summary['combination_mode']}")
+    if summary['shard'] is not None:
+        print(f"Участок анализа: {summary['shard']['index'] + 1} из {summary['shard']['count']}")
+    return EXIT_OK
+
+
+def command_validate(args):
+    """Проверить проекты и вывести найденные проблемы"""
+    exit_code = EXIT_OK
+    for filepath in args.projects:
+        project = load_project(filepath, not args.ignore_journal)
+        if project is None:
+            exit_code = EXIT_FAILURE
+            continue
+        problems = project.validate()
+        if args.structure:
+            from adpacf_analytics import analyze_structure
+            problems += analyze_structure(project).problems()
+        if problems:
+            exit_code = max(exit_code, EXIT_INVALID)
+            for problem in problems:
+                print(f"{filepath}: {problem}")
+        elif not args.quiet:
+            print(f"{filepath}: OK")
+    return exit_code
+
+
+def command_analyze(args):
+    """Вывести отчёт анализа структуры связей: проблемы и статистику"""
+    from adpacf_analytics import analyze_structure
+
+    project = load_project(args.project, not args.ignore_journal)
+    if project is None:
+        return EXIT_FAILURE
+    report = analyze_structure(project)
+    if args.json:
+        print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    else:
+        print(report.to_text())
+    return EXIT_INVALID if report.has_problems else EXIT_OK
+
+
+def command_export(args):
+    """Экспортировать результаты в отчёт или формат для анализа графов"""
+    project = load_project(args.project, not args.ignore_journal)
+    if project is None:
+        return EXIT_FAILURE
+    try:
+        if args.output in (None, "-"):
+            export_format = args.format or "txt"
+            if export_format == "txt":
+                write_text_report(project, sys.stdout, args.back_references)
+            else:
+                EXPORT_FORMATS[export_format][1](project, sys.stdout)
+        else:
+            export_report(project, args.output, args.format, args.back_references)
+    except OSError as e:
+        print(f"{args.output}: не удалось записать отчёт: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    return EXIT_OK
+
+
+def command_convert(args):
+    """Пересохранить проект; формат (.adpacf или .adpacfb) определяется по расширению"""
+    project = load_project(args.source, not args.ignore_journal)
+    if project is None:
+        return EXIT_FAILURE
+    try:
+        if os.path.abspath(args.destination) == os.path.abspath(args.source) and not args.ignore_journal:
+            # Изменения журнала теперь в файле; иначе при следующем открытии они повторились бы дважды
+            save_atomically(project, args.destination)
+            if os.path.exists(journal_path(args.source)):
+                os.remove(journal_path(args.source))
+        else:
+            project.save(args.destination)
+    except (OSError, ProjectError) as e:
+        print(f"{args.destination}: не удалось сохранить проект: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    return EXIT_OK
+
+
+def command_shard(args):
+    """Разделить нерассмотренные комбинации проекта на участки для нескольких аналитиков"""
+    from adpacf_shard import write_shards
+
+    project = load_project(args.project, not args.ignore_journal)
+    if project is None:
+        return EXIT_FAILURE
+    try:
+        paths = write_shards(project, args.project, args.count)
+    except (OSError, ProjectError) as e:
+        print(f"{args.project}: не удалось создать участки: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    for path, pending in zip(paths, (Project.load(path).pending_count() for path in paths)):
+        print(f"{path}: комбинаций {pending}")
+    return EXIT_OK
+
+
+def command_merge(args):
+    """Слить решения участков с исходным проектом"""
+    from adpacf_shard import merge_shards
+
+    base = load_project(args.project, not args.ignore_journal)
+    if base is None:
+        return EXIT_FAILURE
+    shards = [load_project(path, not args.ignore_journal) for path in args.shards]
+    if None in shards:
+        return EXIT_FAILURE
+    try:
+        report = merge_shards(base, shards)
+        report.project.save(args.output)
+    except (OSError, ProjectError) as e:
+        print(f"{args.output}: не удалось слить участки: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    print(report.summary())
+    return EXIT_INVALID if report.conflicts else EXIT_OK
+
+
+def command_batch(args):
+    """Проверить, экспортировать и пересохранить все проекты каталогов и масок"""
+    from adpacf_batch import BatchOptions, batch_summary, collect_projects, run_batch
+
+    paths = collect_projects(args.paths)
+    if not paths:
+        print("Не найдено ни одного файла проекта", file=sys.stderr)
+        return EXIT_FAILURE
+    options = BatchOptions(
+        export_formats=args.export or (),
+        convert_to={"adpacf": PROJECT_EXTENSION, "adpacfb": BINARY_PROJECT_EXTENSION}.get(args.convert),
+        output_dir=args.output_dir,
+        structure=args.structure,
+        back_references=args.back_references,
+        journal=not args.ignore_journal
+    )
+
+    def report(result):
+        if args.json:
+            return
+        if not result['ok']:
+            print(f"{result['path']}: ошибка: {result['error']}", file=sys.stderr)
+            return
+        status = f"проблем {len(result['problems'])}" if result['problems'] else "OK"
+        print(f"{result['path']}: {status}, {result['seconds']:.2f} с")
+        if not args.quiet:
+            for problem in result['problems']:
+                print(f"    {problem}")
+
+    started = time.perf_counter()
+    results = run_batch(paths, options, args.workers, on_result=report)
+    summary = batch_summary(results, time.perf_counter() - started)
+    if args.json:
+        print(json.dumps({'summary': summary, 'results': results}, ensure_ascii=False, indent=2))
+    else:
+        print(
+            f"Проектов: {summary['projects']}, с проблемами: {summary['invalid']}, с ошибками: {summary['failed']}; "
+            f"{summary['seconds']:.2f} с (суммарно по файлам {summary['cpu_seconds']:.2f} с)"
+        )
+    if summary['failed']:
+        return EXIT_FAILURE
+    return EXIT_INVALID if summary['invalid'] else EXIT_OK
+
+
+def command_serve(args):
+    """Обслуживать проекты по HTTP до прерывания (Ctrl+C)"""
+    from adpacf_server import DEFAULT_HOST, DEFAULT_PORT, serve
+
+    host = DEFAULT_HOST if args.host is None else args.host
+    port = DEFAULT_PORT if args.port is None else args.port
+
+    def started(server):
+        names = ", ".join(server.projects)
+        print(f"Проекты: {names}; адрес http://{host}:{server.port}/projects", flush=True)
+
+    try:
+        serve(args.projects, host, port, journal=not args.no_journal, on_started=started)
+    except (OSError, ProjectError) as e:
+        print(f"Не удалось запустить сервис: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    return EXIT_OK
+
+
+def build_parser():
+    """Создать разборщик аргументов командной строки"""
+    parser = argparse.ArgumentParser(
+        prog="adpacf",
+        description="Работа с проектами АДПАЦФ без графического интерфейса"
+    )
+    parser.add_argument(
+        "--ignore-journal", action="store_true",
+        help="не повторять несохранённые изменения из журнала проекта (<проект>.journal)"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    info_parser = subparsers.add_parser("info", help="сводка по проекту")
+    info_parser.add_argument("project", help="файл проекта")
+    info_parser.add_argument("--json", action="store_true", help="вывести сводку в формате JSON")
+    info_parser.set_defaults(handler=command_info)
+
+    validate_parser = subparsers.add_parser("validate", help="проверка согласованности проектов")
+    validate_parser.add_argument("projects", nargs="+", help="файлы проектов")
+    validate_parser.add_argument("-q", "--quiet", action="store_true", help="не выводить OK для корректных проектов")
+    validate_parser.add_argument(
+        "--structure", action="store_true",
+        help="проверить также структуру связей: циклы, недостижимые и висячие элементы"
+    )
+    validate_parser.set_defaults(handler=command_validate)
+
+    analyze_parser = subparsers.add_parser("analyze", help="анализ и статистика структуры связей")
+    analyze_parser.add_argument("project", help="файл проекта")
+    analyze_parser.add_argument("--json", action="store_true", help="вывести отчёт в формате JSON")
+    analyze_parser.set_defaults(handler=command_analyze)
+
+    export_parser = subparsers.add_parser("export", help="экспорт результатов")
+    export_parser.add_argument("project", help="файл проекта")
+    export_parser.add_argument("-o", "--output", help="файл отчёта (по умолчанию stdout)")
+    export_parser.add_argument(
+        "-f", "--format", choices=sorted(EXPORT_FORMATS),
+        help="формат экспорта (по умолчанию определяется по расширению файла, иначе txt)"
+    )
+    export_parser.add_argument(
+        "--back-references", action="store_true",
+        help="не раскрывать повторно уже выведенные поддеревья, а ссылаться на них"
+    )
+    export_parser.set_defaults(handler=command_export)
+
+    convert_parser = subparsers.add_parser("convert", help="пересохранение проекта, в том числе между JSON и двоичным форматом")
+    convert_parser.add_argument("source", help="исходный файл проекта")
+    convert_parser.add_argument("destination", help="новый файл проекта")
+    convert_parser.set_defaults(handler=command_convert)
+
+    shard_parser = subparsers.add_parser("shard", help="разделение анализа связей на участки")
+    shard_parser.add_argument("project", help="файл проекта")
+    shard_parser.add_argument("-n", "--count", type=int, required=True, help="число участков")
+    shard_parser.set_defaults(handler=command_shard)
+
+    merge_parser = subparsers.add_parser("merge", help="слияние участков анализа с исходным проектом")
+    merge_parser.add_argument("project", help="исходный файл проекта, из которого созданы участки")
+    merge_parser.add_argument("shards", nargs="+", help="файлы участков")
+    merge_parser.add_argument("-o", "--output", required=True, help="файл объединённого проекта")
+    merge_parser.set_defaults(handler=command_merge)
+
+    batch_parser = subparsers.add_parser("batch", help="пакетная проверка, экспорт и преобразование проектов")
+    batch_parser.add_argument("paths", nargs="+", help="каталоги (просматриваются рекурсивно) или маски файлов проектов")
+    batch_parser.add_argument(
+        "--export", action="append", choices=sorted(EXPORT_FORMATS),
+        help="экспортировать результаты в формат (можно указать несколько раз)"
+    )
+    batch_parser.add_argument(
+        "--convert", choices=("adpacf", "adpacfb"), help="пересохранить проекты в JSON или двоичном формате"
+    )
+    batch_parser.add_argument(
+        "-o", "--output-dir", help="каталог результатов (по умолчанию рядом с проектами); подкаталоги сохраняются"
+    )
+    batch_parser.add_argument("-j", "--workers", type=int, help="число процессов (по умолчанию по числу ядер)")
+    batch_parser.add_argument("--structure", action="store_true", help="проверить также структуру связей")
+    batch_parser.add_argument(
+        "--back-references", action="store_true", help="ссылки вместо повторов в текстовом отчёте"
+    )
+    batch_parser.add_argument("-q", "--quiet", action="store_true", help="не перечислять найденные проблемы")
+    batch_parser.add_argument("--json", action="store_true", help="вывести результаты в формате JSON")
+    batch_parser.set_defaults(handler=command_batch)
+
+    serve_parser = subparsers.add_parser("serve", help="локальный HTTP-сервис с JSON для работы с проектами")
+    serve_parser.add_argument("projects", nargs="+", help="файлы проектов")
+    serve_parser.add_argument("--host", help="адрес (по умолчанию только локальный, 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, help="порт (по умолчанию 8765, 0 - любой свободный)")
+    serve_parser.add_argument(
+        "--no-journal", action="store_true", help="не вести журнал: изменения сохраняются только запросом save"
+    )
+    serve_parser.set_defaults(handler=command_serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,779 @@
+"""Модель проекта АДПАЦФ без зависимости от графического интерфейса.
+
+Модуль содержит признаки структуризации, их элементы, структуру значимых связей
+и чтение/запись файлов проекта (.adpacf - JSON, .adpacfb - двоичный формат
+из adpacf_binary). Он не импортирует tkinter и используется
+как графическим приложением (ADPACF.py), так и командной строкой (adpacf_cli.py).
+"""
+import json
+import os
+import zlib
+
+from adpacf_graph import ConnectionGraph
+
+PROJECT_EXTENSION = ".adpacf"
+BINARY_PROJECT_EXTENSION = ".adpacfb"
+DEFAULT_PROJECT_NAME = "Новый проект"
+READ_CHUNK = 1 << 20  # размер порции чтения файла проекта при отслеживании прогресса
+
+# Этапы работы с проектом
+STAGE_CLASSIFIERS = 0  # ввод признаков
+STAGE_ELEMENTS = 1     # ввод элементов
+STAGE_ANALYSIS = 2     # анализ связей
+STAGE_RESULTS = 3      # результаты
+
+# Режимы перебора комбинаций при анализе связей
+COMBINATIONS_ADJACENT = "adjacent"    # только соседние признаки
+COMBINATIONS_ALL_PAIRS = "all_pairs"  # все пары признаков с отсечением недостижимых элементов
+COMBINATION_MODES = (COMBINATIONS_ADJACENT, COMBINATIONS_ALL_PAIRS)
+
+
+def combination_key(combination):
+    """Устойчивый между запусками числовой ключ комбинации (признак1, элемент1, признак2, элемент2)"""
+    return zlib.crc32("\x1f".join(combination).encode('utf-8'))
+
+
+class ProjectError(ValueError):
+    """Ошибка изменения или загрузки проекта; текст сообщения предназначен для пользователя"""
+
+
+class Project:
+    """Данные проекта: признаки, элементы и структура связей.
+
+    Каждое изменение через методы проекта передаётся подписчикам из listeners
+    в виде словаря {'op': операция, ...}; такой словарь можно повторить
+    методом apply (используется журналом изменений).
+
+    Для проверки дубликатов рядом со списками признаков и элементов хранятся
+    множества; они строятся по запросу и сбрасываются при присваивании
+    classifiers или elements, поэтому списки следует менять только методами проекта.
+    """
+
+    def __init__(self, project_name=DEFAULT_PROJECT_NAME):
+        self.project_name = project_name
+        self.classifiers = []
+        self.elements = {}
+        self.structure = ConnectionGraph()
+        self.current_stage = STAGE_CLASSIFIERS
+        # Комбинации (признак1, элемент1, признак2, элемент2), признанные незначимыми;
+        # словарь используется как упорядоченное множество
+        self.rejected = {}
+        self.analysis_cursor = None  # комбинация, на которой остановился анализ связей
+        self.combination_mode = COMBINATIONS_ADJACENT
+        self.revision = 0  # номер изменения проекта, увеличивается при каждом уведомлении
+        self._reachable = None  # (revision, множество узлов, достижимых из корней)
+        self.deferred_comments = None  # комментарии, ещё не прочитанные из двоичного файла
+        self.shard = None  # участок совместного анализа {'index', 'count', 'split'} (см. adpacf_shard)
+        self.listeners = []  # подписчики на изменения проекта
+
+    @property
+    def classifiers(self):
+        return self._classifiers
+
+    @classifiers.setter
+    def classifiers(self, value):
+        self._classifiers = value
+        self._classifier_set = None
+
+    @property
+    def elements(self):
+        return self._elements
+
+    @elements.setter
+    def elements(self, value):
+        self._elements = value
+        self._element_sets = {}
+
+    def _classifier_index(self):
+        """Множество названий признаков"""
+        if self._classifier_set is None:
+            self._classifier_set = set(self._classifiers)
+        return self._classifier_set
+
+    def _element_index(self, classifier):
+        """Множество названий элементов признака"""
+        index = self._element_sets.get(classifier)
+        if index is None:
+            index = self._element_sets[classifier] = set(self._elements.get(classifier, ()))
+        return index
+
+    def has_classifier(self, name):
+        """Есть ли признак с таким названием"""
+        return name in self._classifier_index()
+
+    def has_element(self, classifier, name):
+        """Есть ли у признака элемент с таким названием"""
+        return name in self._element_index(classifier)
+
+    def _notify(self, op, **fields):
+        """Сообщить подписчикам об изменении проекта"""
+        self.revision += 1
+        if self.listeners:
+            change = {'op': op, **fields}
+            for listener in self.listeners:
+                listener(change)
+
+    def apply(self, change):
+        """Повторить изменение, описанное словарём из уведомления"""
+        op = change['op']
+        if op == 'add_classifier':
+            self.add_classifier(change['name'])
+        elif op == 'remove_classifier':
+            self.remove_classifier(change['index'])
+        elif op == 'rename_classifier':
+            self.rename_classifier(change['index'], change['new'], change.get('rename_links', True))
+        elif op == 'add_element':
+            self.add_element(change['classifier'], change['name'])
+        elif op == 'add_elements':
+            self.add_elements(change['classifier'], change['names'])
+        elif op == 'remove_element':
+            self.remove_element(change['classifier'], change['index'])
+        elif op == 'rename_element':
+            self.rename_element(change['classifier'], change['index'], change['new'], change.get('rename_links', True))
+        elif op == 'decision':
+            self.record_decision(tuple(change['combination']), change['is_valid'], change['comment'])
+        elif op == 'decisions':
+            self.record_decisions(
+                change['classifier1'], change['classifier2'],
+                [tuple(pair) for pair in change['significant']],
+                [tuple(pair) for pair in change['insignificant']],
+                change['comment']
+            )
+        elif op == 'clear_structure':
+            self.clear_structure()
+        elif op == 'reset_analysis':
+            self.reset_analysis()
+        elif op == 'add_connection':
+            self.add_connection(
+                change['from_classifier'], change['from_element'],
+                change['to_classifier'], change['to_element'], change['comment']
+            )
+        elif op == 'remove_node':
+            self.remove_node(change['classifier'], change['element'])
+        elif op == 'rename_node':
+            self.rename_node(change['classifier'], change['old'], change['new'])
+        elif op == 'combination_mode':
+            self.set_combination_mode(change['mode'])
+        elif op == 'insert_classifier':
+            self.insert_classifier(change['index'], change['name'], change['elements'])
+        elif op == 'insert_element':
+            self.insert_element(change['classifier'], change['index'], change['name'])
+        elif op == 'remove_elements':
+            self.remove_elements(change['classifier'], change['names'])
+        elif op == 'patch_structure':
+            self.patch_structure(change['added'], change['removed'], change['rejected'], change['unrejected'])
+        elif op == 'restore_structure':
+            self.restore_structure(
+                ConnectionGraph(change['connections']),
+                {tuple(combination): None for combination in change['rejected']},
+                tuple(change['cursor']) if change['cursor'] else None
+            )
+        else:
+            raise ProjectError(f"Неизвестная операция: {op}")
+
+    # Признаки структуризации
+
+    def add_classifier(self, name):
+        """Добавить новый признак структуризации"""
+        name = name.strip()
+        if not name:
+            raise ProjectError("Введите название признака")
+        if self.has_classifier(name):
+            raise ProjectError("Такой признак уже существует")
+        self.classifiers.append(name)
+        self._classifier_index().add(name)
+        self._notify('add_classifier', name=name)
+        return name
+
+    def remove_classifier(self, index):
+        """Удалить признак структуризации вместе с его элементами"""
+        classifier = self.classifiers.pop(index)
+        self._classifier_index().discard(classifier)
+        elements = self.elements.pop(classifier, None)
+        self._element_sets.pop(classifier, None)
+        self._notify('remove_classifier', index=index, name=classifier, elements=elements)
+        return classifier
+
+    def insert_classifier(self, index, name, elements=None):
+        """Вставить признак в позицию index вместе с его элементами (восстановление удалённого признака)"""
+        if self.has_classifier(name):
+            raise ProjectError("Такой признак уже существует")
+        self.classifiers.insert(index, name)
+        self._classifier_index().add(name)
+        if elements is not None:
+            # Элементы ставятся перед элементами следующего признака, чтобы порядок в файле проекта не менялся
+            following = next(
+                (classifier for classifier in self.classifiers[index + 1:] if classifier in self.elements), None
+            )
+            items = list(self.elements.items())
+            position = next((i for i, (classifier, _) in enumerate(items) if classifier == following), len(items))
+            items.insert(position, (name, list(elements)))
+            self.elements.clear()
+            self.elements.update(items)
+            self._element_sets.pop(name, None)
+        self._notify('insert_classifier', index=index, name=name, elements=elements)
+        return name
+
+    def rename_classifier(self, index, new_name, rename_links=True):
+        """Переименовать признак структуризации вместе со связями и решениями.
+
+        rename_links=False переименовывает только сам признак (используется отменой
+        переименования, при котором узлы объединились с уже существующими).
+        """
+        old_name = self.classifiers[index]
+        new_name = new_name.strip()
+        if not new_name or new_name == old_name:
+            raise ProjectError("Введите новое название признака")
+        if self.has_classifier(new_name):
+            raise ProjectError("Такой признак уже существует")
+        self.classifiers[index] = new_name
+        classifier_index = self._classifier_index()
+        classifier_index.discard(old_name)
+        classifier_index.add(new_name)
+        if old_name in self.elements:
+            # Ключ заменяется на месте: порядок признаков в файле проекта не меняется
+            items = [(new_name if classifier == old_name else classifier, elements)
+                     for classifier, elements in self.elements.items()]
+            self.elements.clear()
+            self.elements.update(items)
+        self._element_sets.pop(old_name, None)
+        self._element_sets.pop(new_name, None)
+        if rename_links:
+            fields = self._rename_links(
+                lambda classifier, element: (new_name, element) if classifier == old_name else (classifier, element),
+                self.structure.has_classifier(new_name),
+                lambda: self.structure.rename_classifier(old_name, new_name)
+            )
+        else:
+            fields = {'rename_links': False}
+        self._notify('rename_classifier', index=index, old=old_name, new=new_name, **fields)
+        return new_name
+
+    # Элементы структуризации
+
+    def add_element(self, classifier, name):
+        """Добавить новый элемент для признака"""
+        name = name.strip()
+        if not classifier or not name:
+            raise ProjectError("Введите название элемента")
+        if self.has_element(classifier, name):
+            raise ProjectError("Такой элемент уже существует")
+        self.elements.setdefault(classifier, []).append(name)
+        self._element_index(classifier).add(name)
+        self._notify('add_element', classifier=classifier, name=name)
+        return name
+
+    def add_elements(self, classifier, names):
+        """Добавить несколько элементов признака за одну операцию.
+
+        Пустые названия и дубликаты (уже существующие или повторяющиеся в names)
+        пропускаются. Вернуть списки добавленных и пропущенных названий.
+        """
+        if not classifier:
+            raise ProjectError("Не выбран признак")
+        index = self._element_index(classifier)
+        added = []
+        skipped = []
+        for name in names:
+            name = name.strip()
+            if not name:
+                continue
+            if name in index:
+                skipped.append(name)
+            else:
+                index.add(name)
+                added.append(name)
+        if added:
+            self.elements.setdefault(classifier, []).extend(added)
+            self._notify('add_elements', classifier=classifier, names=added)
+        return added, skipped
+
+    def remove_element(self, classifier, index):
+        """Удалить элемент признака"""
+        name = self.elements[classifier].pop(index)
+        self._element_index(classifier).discard(name)
+        self._notify('remove_element', classifier=classifier, index=index, name=name)
+        return name
+
+    def insert_element(self, classifier, index, name):
+        """Вставить элемент признака в позицию index (восстановление удалённого элемента)"""
+        if self.has_element(classifier, name):
+            raise ProjectError("Такой элемент уже существует")
+        self.elements.setdefault(classifier, []).insert(index, name)
+        self._element_index(classifier).add(name)
+        self._notify('insert_element', classifier=classifier, index=index, name=name)
+        return name
+
+    def remove_elements(self, classifier, names):
+        """Удалить несколько элементов признака за одну операцию; вернуть удалённые названия"""
+        elements = self.elements.get(classifier)
+        if not elements or not names:
+            return []
+        count = len(names)
+        if elements[-count:] == list(names):
+            # Отмена добавления: элементы в конце списка
+            removed = elements[-count:]
+            del elements[-count:]
+        else:
+            removing = set(names)
+            removed = [name for name in elements if name in removing]
+            elements[:] = [name for name in elements if name not in removing]
+        self._element_index(classifier).difference_update(removed)
+        if removed:
+            self._notify('remove_elements', classifier=classifier, names=removed)
+        return removed
+
+    def rename_element(self, classifier, index, new_name, rename_links=True):
+        """Переименовать элемент признака вместе с его узлом в структуре и решениями.
+
+        rename_links=False переименовывает только сам элемент (см. rename_classifier).
+        """
+        elements = self.elements[classifier]
+        old_name = elements[index]
+        new_name = new_name.strip()
+        if not new_name or new_name == old_name:
+            raise ProjectError("Введите новое название элемента")
+        if self.has_element(classifier, new_name):
+            raise ProjectError("Такой элемент уже существует")
+        elements[index] = new_name
+        element_index = self._element_index(classifier)
+        element_index.discard(old_name)
+        element_index.add(new_name)
+        if rename_links:
+            fields = self._rename_links(
+                lambda node_classifier, element: (
+                    (node_classifier, new_name) if (node_classifier, element) == (classifier, old_name)
+                    else (node_classifier, element)
+                ),
+                self.structure.has_node(classifier, new_name),
+                lambda: self.structure.rename_node(classifier, old_name, new_name)
+            )
+        else:
+            fields = {'rename_links': False}
+        self._notify('rename_element', classifier=classifier, index=index, old=old_name, new=new_name, **fields)
+        return new_name
+
+    def _rename_links(self, rename, merges_nodes, rename_structure):
+        """Переименовать узлы в связях, незначимых комбинациях и позиции анализа.
+
+        rename(признак, элемент) возвращает новый узел (признак, элемент);
+        rename_structure переименовывает узлы в self.structure. Решения всегда
+        записываются в новый словарь. Если узлы объединятся с уже существующими
+        (merges_nodes) или совпадут незначимые комбинации, связи переименовываются
+        в копии структуры: прежние объекты остаются нетронутыми, и отмена
+        возвращает их целиком, с прежним порядком связей и решений. Вернуть
+        поля уведомления.
+        """
+        def renamed(combination):
+            return rename(combination[0], combination[1]) + rename(combination[2], combination[3])
+        rejected = dict.fromkeys(renamed(combination) for combination in self.rejected)
+        merged = merges_nodes or len(rejected) < len(self.rejected)
+        if merged:
+            self._copy_structure()
+        rename_structure()
+        self.rejected = rejected
+        if self.analysis_cursor is not None:
+            self.analysis_cursor = renamed(self.analysis_cursor)
+        return {'merged': True} if merged else {}
+
+    def _copy_structure(self):
+        """Заменить структуру копией, оставив прежний объект без изменений"""
+        self.load_deferred_comments()
+        self.structure = ConnectionGraph(self.structure)
+
+    def missing_elements(self):
+        """Признаки, для которых не указано ни одного элемента"""
+        return [classifier for classifier in self.classifiers if not self.elements.get(classifier)]
+
+    # Анализ связей
+
+    def set_combination_mode(self, mode):
+        """Выбрать режим перебора комбинаций (COMBINATIONS_ADJACENT или COMBINATIONS_ALL_PAIRS)"""
+        if mode not in COMBINATION_MODES:
+            raise ProjectError(f"Неизвестный режим перебора комбинаций: {mode}")
+        if mode != self.combination_mode:
+            self.combination_mode = mode
+            self._notify('combination_mode', mode=mode)
+
+    def classifier_pairs(self):
+        """Пары признаков, между которыми анализируются связи, в порядке перебора.
+
+        В режиме всех пар сначала идут соседние признаки, затем признаки через
+        один уровень и т.д.: решения по близким уровням определяют достижимость
+        элементов и отсекают большую часть дальних комбинаций.
+        """
+        count = len(self.classifiers)
+        if self.combination_mode == COMBINATIONS_ALL_PAIRS:
+            gaps = range(1, count)
+        else:
+            gaps = range(1, min(2, count))
+        return [
+            (self.classifiers[i], self.classifiers[i + gap])
+            for gap in gaps
+            for i in range(count - gap)
+        ]
+
+    def reachable_nodes(self):
+        """Узлы (признак, элемент), достижимые по связям из элементов первого признака"""
+        if self._reachable is not None and self._reachable[0] == self.revision:
+            return self._reachable[1]
+        first_classifier, roots = self.root_elements()
+        reachable = {(first_classifier, root) for root in roots}
+        stack = list(reachable)
+        structure = self.structure
+        while stack:
+            for connection in structure.children(*stack.pop()):
+                node = (connection['to_classifier'], connection['to_element'])
+                if node not in reachable:
+                    reachable.add(node)
+                    stack.append(node)
+        self._reachable = (self.revision, reachable)
+        return reachable
+
+    def is_pruned(self, combination):
+        """Отсечена ли комбинация: в режиме всех пар её начальный элемент недостижим из корней"""
+        if self.combination_mode != COMBINATIONS_ALL_PAIRS or self.shard is not None:
+            # На участке видны не все решения, поэтому отсекать по достижимости нельзя
+            return False
+        classifier1, element1 = combination[0], combination[1]
+        if self.classifiers and classifier1 == self.classifiers[0]:
+            return False
+        return (classifier1, element1) not in self.reachable_nodes()
+
+    def iter_all_combinations(self):
+        """Все комбинации элементов пар признаков текущего режима"""
+        for classifier1, classifier2 in self.classifier_pairs():
+            if classifier1 in self.elements and classifier2 in self.elements:
+                for element1 in self.elements[classifier1]:
+                    for element2 in self.elements[classifier2]:
+                        yield (classifier1, element1, classifier2, element2)
+
+    def is_decided(self, combination):
+        """Принято ли уже решение по комбинации"""
+        return combination in self.rejected or self.structure.has_edge(*combination)
+
+    def generate_combinations(self):
+        """Генератор ещё не рассмотренных комбинаций.
+
+        Перебор начинается с сохранённой позиции analysis_cursor и затем
+        возвращается к пропущенным комбинациям в начале (например, к парам
+        с недавно добавленными элементами). Решение проверяется в момент
+        выдачи, поэтому уже рассмотренные пары не возвращаются.
+
+        В режиме всех пар комбинации с недостижимым начальным элементом
+        пропускаются. Решения могут сделать такой элемент достижимым, поэтому,
+        пока проект меняется, перебор повторяется по кругу.
+        """
+        cursor = self.analysis_cursor
+        while True:
+            revision = self.revision
+            cursor_found = cursor is None
+            if not cursor_found:
+                for combination in self.iter_all_combinations():
+                    if not cursor_found:
+                        if combination != cursor:
+                            continue
+                        cursor_found = True
+                    if self.is_pending(combination):
+                        yield combination
+            for combination in self.iter_all_combinations():
+                if cursor is not None and cursor_found and combination == cursor:
+                    break
+                if self.is_pending(combination):
+                    yield combination
+            if self.combination_mode != COMBINATIONS_ALL_PAIRS or self.revision == revision:
+                return
+            cursor = None
+
+    def in_shard(self, combination):
+        """Относится ли комбинация к участку анализа проекта (без участка - все комбинации)"""
+        shard = self.shard
+        return shard is None or combination_key(combination) % shard['count'] == shard['index']
+
+    def is_pending(self, combination):
+        """Нужно ли ещё принять решение по комбинации"""
+        return (
+            not self.is_decided(combination) and self.in_shard(combination) and not self.is_pruned(combination)
+        )
+
+    def pending_count(self):
+        """Число ещё не рассмотренных комбинаций"""
+        return sum(1 for combination in self.iter_all_combinations() if self.is_pending(combination))
+
+    def record_decision(self, combination, is_valid, comment=""):
+        """Записать решение по комбинации; значимая связь добавляется в структуру"""
+        connection = None
+        rejected_before = tuple(combination) in self.rejected
+        if is_valid:
+            classifier1, element1, classifier2, element2 = combination
+            connection = self.structure.add(classifier1, element1, classifier2, element2, comment)
+            self.rejected.pop(tuple(combination), None)
+        else:
+            self.rejected[tuple(combination)] = None
+        self._notify(
+            'decision', combination=list(combination), is_valid=is_valid, comment=comment,
+            rejected_before=rejected_before
+        )
+        return connection
+
+    def record_decisions(self, classifier1, classifier2, significant, insignificant, comment=""):
+        """Записать решения по множеству пар элементов двух признаков.
+
+        significant и insignificant - списки пар (элемент1, элемент2). Значимые пары
+        добавляются в структуру, если связи ещё нет; для незначимых пар существующие
+        связи удаляются.
+        """
+        rejected = self.rejected
+        added = self.structure.add_missing(classifier1, classifier2, significant, comment)
+        removed = self.structure.remove_pairs(classifier1, classifier2, insignificant)
+        accepted = [(classifier1, element1, classifier2, element2) for element1, element2 in significant]
+        dropped = [(classifier1, element1, classifier2, element2) for element1, element2 in insignificant]
+        rejected_before = [[key[1], key[3]] for key in accepted + dropped if key in rejected]
+        for key in accepted:
+            rejected.pop(key, None)
+        rejected.update(dict.fromkeys(dropped))
+        self._notify(
+            'decisions', classifier1=classifier1, classifier2=classifier2,
+            significant=[list(pair) for pair in significant],
+            insignificant=[list(pair) for pair in insignificant],
+            comment=comment, added=[connection.to_dict() for connection in added],
+            removed=[connection.to_dict() for connection in removed], rejected_before=rejected_before
+        )
+
+    def clear_structure(self):
+        """Удалить все связи"""
+        self.structure = ConnectionGraph()
+        self._notify('clear_structure')
+
+    def reset_analysis(self):
+        """Отменить все решения и начать анализ связей заново"""
+        self.structure = ConnectionGraph()
+        self.rejected = {}
+        self.analysis_cursor = None
+        self._notify('reset_analysis')
+
+    def patch_structure(self, added=(), removed=(), rejected=(), unrejected=()):
+        """Изменить связи и решения одной операцией (используется отменой действий).
+
+        Для каждой записи removed удаляется одна связь с теми же узлами и комментарием,
+        связи added добавляются, комбинации rejected отмечаются незначимыми,
+        а с комбинаций unrejected эта отметка снимается.
+        """
+        removed = [
+            connection for connection in map(self.structure.remove_connection, removed)
+            if connection is not None
+        ]
+        added = [
+            self.structure.add(
+                connection['from_classifier'], connection['from_element'],
+                connection['to_classifier'], connection['to_element'], connection.get('comment', "")
+            )
+            for connection in added
+        ]
+        for combination in rejected:
+            self.rejected[tuple(combination)] = None
+        for combination in unrejected:
+            self.rejected.pop(tuple(combination), None)
+        self._notify(
+            'patch_structure',
+            added=[connection.to_dict() for connection in added],
+            removed=[connection.to_dict() for connection in removed],
+            rejected=[list(combination) for combination in rejected],
+            unrejected=[list(combination) for combination in unrejected]
+        )
+
+    def restore_structure(self, structure, rejected, analysis_cursor=None):
+        """Заменить связи и решения целиком (используется отменой очистки структуры и сброса анализа)"""
+        self.structure = structure
+        self.rejected = rejected
+        self.analysis_cursor = analysis_cursor
+        self._notify(
+            'restore_structure', connections=structure.to_list(),
+            rejected=[list(combination) for combination in rejected],
+            cursor=list(analysis_cursor) if analysis_cursor else None
+        )
+
+    # Структура связей
+
+    def root_elements(self):
+        """Признак верхнего уровня и его элементы - корни структуры"""
+        first_classifier = self.classifiers[0] if self.classifiers else None
+        if first_classifier and first_classifier in self.elements:
+            return first_classifier, self.elements[first_classifier]
+        return first_classifier, []
+
+    def add_connection(self, from_classifier, from_element, to_classifier, to_element, comment=""):
+        """Добавить связь в структуру"""
+        connection = self.structure.add(from_classifier, from_element, to_classifier, to_element, comment)
+        self._notify('add_connection', **connection)
+        return connection
+
+    def remove_node(self, classifier, element):
+        """Удалить все связи элемента"""
+        removed = [connection.to_dict() for connection in self.structure.remove_node(classifier, element)]
+        self._notify('remove_node', classifier=classifier, element=element, removed=removed)
+        return removed
+
+    def rename_node(self, classifier, old_element, new_element):
+        """Переименовать элемент во всех связях"""
+        new_element = new_element.strip()
+        if not new_element or new_element == old_element:
+            raise ProjectError("Введите новое название элемента")
+        fields = {}
+        if self.structure.has_node(classifier, new_element):
+            # Связи объединяются с существующим узлом: прежняя структура остаётся для отмены
+            self._copy_structure()
+            fields['merged'] = True
+        self.structure.rename_node(classifier, old_element, new_element)
+        self._notify('rename_node', classifier=classifier, old=old_element, new=new_element, **fields)
+        return new_element
+
+    # Проверка и сводка
+
+    def validate(self):
+        """Проверить согласованность данных проекта; вернуть список найденных проблем"""
+        problems = []
+        seen = set()
+        for classifier in self.classifiers:
+            if not isinstance(classifier, str) or not classifier.strip():
+                problems.append(f"Некорректное название признака: {classifier!r}")
+            elif classifier in seen:
+                problems.append(f"Признак '{classifier}' указан несколько раз")
+            seen.add(classifier)
+        for classifier, elements in self.elements.items():
+            if classifier not in seen:
+                problems.append(f"Элементы указаны для неизвестного признака '{classifier}'")
+            if len(set(elements)) != len(elements):
+                problems.append(f"У признака '{classifier}' есть повторяющиеся элементы")
+        known = {
+            (classifier, element)
+            for classifier, elements in self.elements.items()
+            for element in elements
+        }
+        for connection in self.structure:
+            for side in ('from', 'to'):
+                node = (connection[f'{side}_classifier'], connection[f'{side}_element'])
+                if node not in known:
+                    problems.append(
+                        f"Связь ссылается на отсутствующий элемент '{node[1]}' ({node[0]})"
+                    )
+        if self.current_stage not in (STAGE_CLASSIFIERS, STAGE_ELEMENTS, STAGE_ANALYSIS, STAGE_RESULTS):
+            problems.append(f"Некорректный этап проекта: {self.current_stage!r}")
+        return problems
+
+    def summary(self):
+        """Краткая сводка по проекту"""
+        return {
+            'project_name': self.project_name,
+            'current_stage': self.current_stage,
+            'classifiers': len(self.classifiers),
+            'elements': sum(len(elements) for elements in self.elements.values()),
+            'elements_per_classifier': {
+                classifier: len(self.elements.get(classifier, [])) for classifier in self.classifiers
+            },
+            'connections': len(self.structure),
+            'rejected': len(self.rejected),
+            'pending': self.pending_count(),
+            'combination_mode': self.combination_mode,
+            'shard': self.shard,
+        }
+
+    # Чтение и запись
+
+    def to_dict(self):
+        """Данные проекта в формате файла .adpacf"""
+        self.load_deferred_comments()
+        data = {
+            'project_name': self.project_name,
+            'classifiers': self.classifiers,
+            'elements': self.elements,
+            'structure': self.structure.to_list(),
+            'current_stage': self.current_stage,
+            'rejected': [list(combination) for combination in self.rejected],
+            'analysis_cursor': list(self.analysis_cursor) if self.analysis_cursor is not None else None,
+            'combination_mode': self.combination_mode
+        }
+        if self.shard is not None:
+            data['shard'] = self.shard
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Создать проект из данных файла .adpacf"""
+        if not isinstance(data, dict):
+            raise ProjectError("Файл не является проектом АДПАЦФ")
+        project = cls(data.get('project_name', DEFAULT_PROJECT_NAME))
+        project.classifiers = data.get('classifiers', [])
+        project.elements = data.get('elements', {})
+        try:
+            project.structure = ConnectionGraph(data.get('structure', []))
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ProjectError(f"Некорректная запись связи: {e}") from e
+        project.current_stage = data.get('current_stage', STAGE_CLASSIFIERS)
+        project.combination_mode = data.get('combination_mode', COMBINATIONS_ADJACENT)
+        if project.combination_mode not in COMBINATION_MODES:
+            raise ProjectError(f"Неизвестный режим перебора комбинаций: {project.combination_mode}")
+        shard = data.get('shard')
+        if shard is not None:
+            try:
+                if not 0 <= shard['index'] < shard['count']:
+                    raise ValueError(shard['index'])
+            except (KeyError, TypeError, ValueError) as e:
+                raise ProjectError(f"Некорректное описание участка анализа: {e}") from e
+            project.shard = shard
+        try:
+            project.rejected = dict.fromkeys(tuple(combination) for combination in data.get('rejected', []))
+            cursor = data.get('analysis_cursor')
+            project.analysis_cursor = tuple(cursor) if cursor is not None else None
+        except TypeError as e:
+            raise ProjectError(f"Некорректная запись решения: {e}") from e
+        return project
+
+    def load_deferred_comments(self, limit=None):
+        """Загрузить отложенные комментарии связей; вернуть True, если часть ещё не загружена"""
+        if self.deferred_comments is None:
+            return False
+        if self.deferred_comments.load(limit):
+            return True
+        self.deferred_comments = None
+        return False
+
+    @classmethod
+    def load(cls, filepath, defer_comments=False, control=None):
+        """Загрузить проект из файла .adpacf или .adpacfb (формат определяется по содержимому).
+
+        control - необязательный TaskControl фоновой операции (прогресс и отмена).
+        """
+        from adpacf_binary import is_binary_project, load_binary
+        if is_binary_project(filepath):
+            return load_binary(filepath, defer_comments, control)
+        with open(filepath, 'r', encoding='utf-8') as f:
+            if control is None:
+                text = f.read()
+            else:
+                total = os.fstat(f.fileno()).st_size
+                chunks = []
+                while True:
+                    chunk = f.read(READ_CHUNK)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    control.progress(f.buffer.tell(), total)
+                text = "".join(chunks)
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ProjectError(f"Файл повреждён: {e}") from e
+        return cls.from_dict(data)
+
+    def save(self, filepath, control=None):
+        """Сохранить проект; файлы .adpacfb записываются в двоичном формате"""
+        if os.path.splitext(filepath)[1].lower() == BINARY_PROJECT_EXTENSION:
+            if self.shard is not None:
+                raise ProjectError("Участок анализа сохраняется только в формате .adpacf")
+            from adpacf_binary import save_binary
+            self.load_deferred_comments()
+            save_binary(self, filepath, control)
+            return
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f if control is None else control.wrap_file(f), ensure_ascii=False, indent=2)
@@ -0,0 +1,250 @@
+"""Экспорт результатов анализа.
+
+Текстовый отчёт повторяет иерархию структуры. Остальные форматы (CSV, JSON Lines,
+GraphML, DOT) записываются за один проход по связям и предназначены для
+загрузки в инструменты анализа графов.
+
+Обход структуры выполняется итеративно, с явным стеком, поэтому глубина
+иерархии не ограничена глубиной рекурсии Python. Связи, ведущие обратно
+в текущую ветку, помечаются как цикл и не раскрываются. При включённых
+обратных ссылках уже выведенное поддерево повторно не раскрывается, а
+заменяется пометкой "см. выше". Строки отчёта формируются по мере обхода
+и пишутся в буферизованный поток, так что расход памяти не зависит от
+размера отчёта.
+"""
+import csv
+import json
+import os
+
+from adpacf_graph import CONNECTION_FIELDS
+
+EXPORT_BUFFER_SIZE = 1 << 16
+
+# Пометки узлов при обходе структуры
+MARK_CYCLE = "cycle"  # связь ведёт к узлу текущей ветки
+MARK_SEEN = "seen"    # поддерево узла уже выведено выше
+
+
+def walk_structure(structure, roots, back_references=False):
+    """Обойти структуру в глубину от корней.
+
+    Возвращает кортежи (уровень, признак, элемент, комментарий, пометка),
+    где пометка - None, MARK_CYCLE или MARK_SEEN.
+    """
+    expanded = set()
+    for root_classifier, root_element in roots:
+        on_path = set()
+        stack = []  # (узел, уровень, итератор исходящих связей)
+        entry = (root_classifier, root_element, "", 0)
+        while True:
+            if entry is not None:
+                classifier, element, comment, level = entry
+                node = (classifier, element)
+                if node in on_path:
+                    yield level, classifier, element, comment, MARK_CYCLE
+                elif back_references and node in expanded:
+                    yield level, classifier, element, comment, MARK_SEEN
+                else:
+                    yield level, classifier, element, comment, None
+                    if structure.has_children(classifier, element):
+                        expanded.add(node)
+                        on_path.add(node)
+                        stack.append((node, level, iter(structure.children(classifier, element))))
+            if not stack:
+                break
+            node, level, children = stack[-1]
+            connection = next(children, None)
+            if connection is None:
+                stack.pop()
+                on_path.discard(node)
+                entry = None
+            else:
+                entry = (connection['to_classifier'], connection['to_element'], connection['comment'], level + 1)
+
+
+def project_roots(project):
+    """Корневые узлы структуры: элементы признака верхнего уровня"""
+    first_classifier, roots = project.root_elements()
+    return [(first_classifier, element) for element in roots]
+
+
+def iter_text_report(project, back_references=False):
+    """Строки текстового отчёта о структуре целей и функций"""
+    yield f"Результаты анализа проекта: {project.project_name}\n"
+    yield "=" * 50 + "\n\n"
+    yield "Структура целей и функций:\n"
+    if not project.structure:
+        yield "Нет значимых связей между элементами\n"
+        return
+    for level, classifier, element, comment, mark in walk_structure(
+            project.structure, project_roots(project), back_references):
+        line = f"{'    ' * level}{element} ({classifier})"
+        if comment:
+            line += f" [Комментарий: {comment}]"
+        if mark == MARK_SEEN:
+            line += " [см. выше]"
+        elif mark == MARK_CYCLE:
+            line += " [цикл]"
+        yield line + "\n"
+
+
+def write_text_report(project, file, back_references=False):
+    """Записать текстовый отчёт в открытый поток"""
+    for line in iter_text_report(project, back_references):
+        file.write(line)
+
+
+def write_csv(project, file):
+    """Записать список связей в формате CSV"""
+    writer = csv.writer(file)
+    writer.writerow(CONNECTION_FIELDS)
+    writer.writerows(
+        [connection[field] for field in CONNECTION_FIELDS] for connection in project.structure
+    )
+
+
+def write_jsonl(project, file):
+    """Записать связи в формате JSON Lines: одна связь на строку"""
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    for connection in project.structure:
+        file.write(encode(connection.to_dict()))
+        file.write("\n")
+
+
+class _NodeIds:
+    """Идентификаторы узлов графа для форматов GraphML и DOT"""
+
+    def __init__(self):
+        self.ids = {}
+
+    def get(self, classifier, element):
+        """Идентификатор узла и признак того, что он встретился впервые"""
+        key = (classifier, element)
+        node_id = self.ids.get(key)
+        if node_id is None:
+            node_id = self.ids[key] = f"n{len(self.ids)}"
+            return node_id, True
+        return node_id, False
+
+
+# Замены для текста и значений атрибутов XML (xml.sax.saxutils не используется:
+# он импортирует urllib.request и заметно замедляет запуск командной строки)
+_XML_ESCAPES = str.maketrans({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#9;'
+})
+
+
+def _xml_string(value):
+    """Текст, экранированный для XML (в том числе для значения атрибута в двойных кавычках)"""
+    return value.translate(_XML_ESCAPES)
+
+
+def write_graphml(project, file):
+    """Записать структуру в формате GraphML"""
+    file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    file.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+    file.write('  <key id="label" for="node" attr.name="label" attr.type="string"/>\n')
+    file.write('  <key id="classifier" for="node" attr.name="classifier" attr.type="string"/>\n')
+    file.write('  <key id="comment" for="edge" attr.name="comment" attr.type="string"/>\n')
+    file.write(f'  <graph id="{_xml_string(project.project_name)}" edgedefault="directed">\n')
+    node_ids = _NodeIds()
+
+    def write_node(node_id, classifier, element):
+        file.write(
+            f'    <node id="{node_id}"><data key="label">{_xml_string(element)}</data>'
+            f'<data key="classifier">{_xml_string(classifier)}</data></node>\n'
+        )
+
+    for classifier in project.classifiers:
+        for element in project.elements.get(classifier, []):
+            node_id, _ = node_ids.get(classifier, element)
+            write_node(node_id, classifier, element)
+    for connection in project.structure:
+        endpoints = []
+        for side in ('from', 'to'):
+            classifier = connection[f'{side}_classifier']
+            element = connection[f'{side}_element']
+            node_id, is_new = node_ids.get(classifier, element)
+            if is_new:
+                write_node(node_id, classifier, element)
+            endpoints.append(node_id)
+        file.write(f'    <edge source="{endpoints[0]}" target="{endpoints[1]}">')
+        if connection['comment']:
+            file.write(f'<data key="comment">{_xml_string(connection["comment"])}</data>')
+        file.write('</edge>\n')
+    file.write('  </graph>\n')
+    file.write('</graphml>\n')
+
+
+def _dot_string(value):
+    """Строка в кавычках для языка DOT"""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def write_dot(project, file):
+    """Записать структуру в формате Graphviz DOT; признаки выводятся кластерами"""
+    file.write(f"digraph {_dot_string(project.project_name)} {{\n")
+    file.write("    rankdir=LR;\n")
+    node_ids = _NodeIds()
+    for index, classifier in enumerate(project.classifiers):
+        file.write(f"    subgraph cluster_{index} {{\n")
+        file.write(f"        label={_dot_string(classifier)};\n")
+        for element in project.elements.get(classifier, []):
+            node_id, _ = node_ids.get(classifier, element)
+            file.write(f"        {node_id} [label={_dot_string(element)}];\n")
+        file.write("    }\n")
+    for connection in project.structure:
+        endpoints = []
+        for side in ('from', 'to'):
+            classifier = connection[f'{side}_classifier']
+            element = connection[f'{side}_element']
+            node_id, is_new = node_ids.get(classifier, element)
+            if is_new:
+                file.write(f"    {node_id} [label={_dot_string(f'{element} ({classifier})')}];\n")
+            endpoints.append(node_id)
+        if connection['comment']:
+            file.write(f"    {endpoints[0]} -> {endpoints[1]} [label={_dot_string(connection['comment'])}];\n")
+        else:
+            file.write(f"    {endpoints[0]} -> {endpoints[1]};\n")
+    file.write("}\n")
+
+
+# Форматы экспорта: расширение -> (описание, функция записи)
+EXPORT_FORMATS = {
+    "txt": ("Текстовый отчёт", write_text_report),
+    "csv": ("Список связей CSV", write_csv),
+    "jsonl": ("JSON Lines", write_jsonl),
+    "graphml": ("GraphML", write_graphml),
+    "dot": ("Graphviz DOT", write_dot),
+}
+
+
+def format_from_path(filepath):
+    """Определить формат экспорта по расширению файла; по умолчанию - текстовый отчёт"""
+    extension = os.path.splitext(filepath)[1].lower().lstrip(".")
+    return extension if extension in EXPORT_FORMATS else "txt"
+
+
+def export_report(project, filepath, export_format=None, back_references=False, control=None):
+    """Записать результаты в файл в указанном формате (по умолчанию - по расширению).
+
+    control - необязательный TaskControl фоновой операции; при отмене
+    недописанный файл удаляется.
+    """
+    export_format = export_format or format_from_path(filepath)
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат экспорта: {export_format}")
+    writer = EXPORT_FORMATS[export_format][1]
+    project.load_deferred_comments()
+    newline = "" if export_format == "csv" else None
+    try:
+        with open(filepath, 'w', encoding='utf-8', newline=newline, buffering=EXPORT_BUFFER_SIZE) as f:
+            out = f if control is None else control.wrap_file(f)
+            if export_format == "txt":
+                writer(project, out, back_references)
+            else:
+                writer(project, out)
+    except BaseException:
+        if control is not None and control.cancelled and os.path.exists(filepath):
+            os.remove(filepath)
+        raise
@@ -0,0 +1,415 @@
+"""Граф связей между элементами структуризации.
+
+Названия признаков и элементов хранятся один раз в реестре узлов
+(NodeRegistry) с постоянными целыми номерами; связи (Connection) - компактные
+записи со слотами, ссылающиеся на номера узлов. Поэтому переименование
+признака или элемента выполняется за O(1) и сразу видно во всех связях.
+
+Связь читается как словарь того же вида, что и записи в файле проекта
+(connection['from_classifier'], 'from_element', 'to_classifier', 'to_element',
+'comment'). Связи индексируются по номерам узлов в прямом и обратном
+направлениях: поиск потомков выполняется за O(степени узла), удаление
+узла - за O(числа затронутых связей).
+"""
+from collections import deque
+
+CONNECTION_FIELDS = ('from_classifier', 'from_element', 'to_classifier', 'to_element', 'comment')
+
+
+class NodeRegistry:
+    """Реестр признаков и узлов (признак, элемент) с постоянными целыми номерами"""
+
+    def __init__(self):
+        self.classifier_names = []  # номер признака -> название
+        self.classifier_ids = {}    # название признака -> номер
+        self.node_classifiers = []  # номер узла -> номер признака
+        self.node_names = []        # номер узла -> название элемента
+        self.node_ids = {}          # (номер признака, элемент) -> номер узла
+
+    def __len__(self):
+        return len(self.node_names)
+
+    def classifier_id(self, classifier):
+        """Номер признака; признак регистрируется при первом обращении"""
+        classifier_id = self.classifier_ids.get(classifier)
+        if classifier_id is None:
+            classifier_id = self.classifier_ids[classifier] = len(self.classifier_names)
+            self.classifier_names.append(classifier)
+        return classifier_id
+
+    def node_id(self, classifier, element):
+        """Номер узла; узел регистрируется при первом обращении"""
+        key = (self.classifier_id(classifier), element)
+        node_id = self.node_ids.get(key)
+        if node_id is None:
+            node_id = self.node_ids[key] = len(self.node_names)
+            self.node_classifiers.append(key[0])
+            self.node_names.append(element)
+        return node_id
+
+    def find(self, classifier, element):
+        """Номер узла или None, если такого узла нет"""
+        classifier_id = self.classifier_ids.get(classifier)
+        if classifier_id is None:
+            return None
+        return self.node_ids.get((classifier_id, element))
+
+    def node(self, node_id):
+        """Узел (признак, элемент) по номеру"""
+        return self.classifier_names[self.node_classifiers[node_id]], self.node_names[node_id]
+
+    def classifier_of(self, node_id):
+        return self.classifier_names[self.node_classifiers[node_id]]
+
+    def element_of(self, node_id):
+        return self.node_names[node_id]
+
+    def rename_node(self, node_id, new_element):
+        """Переименовать узел; новое название не должно быть занято"""
+        classifier_id = self.node_classifiers[node_id]
+        del self.node_ids[(classifier_id, self.node_names[node_id])]
+        self.node_ids[(classifier_id, new_element)] = node_id
+        self.node_names[node_id] = new_element
+
+    def rename_classifier(self, old_classifier, new_classifier):
+        """Переименовать признак; новое название не должно быть занято"""
+        classifier_id = self.classifier_ids.pop(old_classifier)
+        self.classifier_ids[new_classifier] = classifier_id
+        self.classifier_names[classifier_id] = new_classifier
+
+    def classifier_nodes(self, classifier):
+        """Номера узлов признака"""
+        classifier_id = self.classifier_ids.get(classifier)
+        return [node_id for node_id, owner in enumerate(self.node_classifiers) if owner == classifier_id]
+
+
+class Connection:
+    """Связь между двумя узлами: номера узлов в реестре и комментарий.
+
+    Поля читаются как у словаря: connection['from_element'], connection.get('comment').
+    """
+
+    __slots__ = ('registry', 'source', 'target', 'comment')
+
+    def __init__(self, registry, source, target, comment=""):
+        self.registry = registry
+        self.source = source  # номер начального узла
+        self.target = target  # номер конечного узла
+        self.comment = comment
+
+    def __getitem__(self, field):
+        registry = self.registry
+        if field == 'from_classifier':
+            return registry.classifier_names[registry.node_classifiers[self.source]]
+        if field == 'from_element':
+            return registry.node_names[self.source]
+        if field == 'to_classifier':
+            return registry.classifier_names[registry.node_classifiers[self.target]]
+        if field == 'to_element':
+            return registry.node_names[self.target]
+        if field == 'comment':
+            return self.comment
+        raise KeyError(field)
+
+    def __setitem__(self, field, value):
+        if field != 'comment':
+            raise KeyError(field)
+        self.comment = value
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return CONNECTION_FIELDS
+
+    def __iter__(self):
+        return iter(CONNECTION_FIELDS)
+
+    def __repr__(self):
+        return f"Connection({self.to_dict()!r})"
+
+    def to_dict(self):
+        """Связь в виде словаря записи файла проекта"""
+        registry = self.registry
+        source_classifier, source_element = registry.node(self.source)
+        target_classifier, target_element = registry.node(self.target)
+        return {
+            'from_classifier': source_classifier,
+            'from_element': source_element,
+            'to_classifier': target_classifier,
+            'to_element': target_element,
+            'comment': self.comment
+        }
+
+
+class ConnectionGraph:
+    """Индексированный граф связей со списками смежности по номерам узлов"""
+
+    def __init__(self, connections=()):
+        self.registry = NodeRegistry()
+        self._edges = {}    # id связи -> Connection
+        self._forward = {}  # номер узла -> {id связи: None} исходящих связей
+        self._reverse = {}  # номер узла -> {id связи: None} входящих связей
+        self._pairs = {}    # (номер начала, номер конца) -> число связей между ними
+        self._next_id = 0
+        for connection in connections:
+            self.add(
+                connection['from_classifier'],
+                connection['from_element'],
+                connection['to_classifier'],
+                connection['to_element'],
+                connection.get('comment', "")
+            )
+
+    def __len__(self):
+        return len(self._edges)
+
+    def __iter__(self):
+        """Перебор связей в порядке добавления"""
+        return iter(list(self._edges.values()))
+
+    def __bool__(self):
+        return bool(self._edges)
+
+    def add(self, from_classifier, from_element, to_classifier, to_element, comment=""):
+        """Добавить связь и вернуть её запись"""
+        registry = self.registry
+        return self._add_edge(
+            registry.node_id(from_classifier, from_element), registry.node_id(to_classifier, to_element), comment
+        )
+
+    def _add_edge(self, source, target, comment):
+        edge_id = self._next_id
+        self._next_id += 1
+        connection = self._edges[edge_id] = Connection(self.registry, source, target, comment)
+        self._forward.setdefault(source, {})[edge_id] = None
+        self._reverse.setdefault(target, {})[edge_id] = None
+        self._count_pair((source, target), 1)
+        return connection
+
+    def _count_pair(self, pair, delta):
+        count = self._pairs.get(pair, 0) + delta
+        if count:
+            self._pairs[pair] = count
+        else:
+            del self._pairs[pair]
+
+    def _find_pair(self, connection):
+        """Номера узлов связи, заданной словарём или Connection; None, если узла нет"""
+        if isinstance(connection, Connection) and connection.registry is self.registry:
+            return connection.source, connection.target
+        find = self.registry.find
+        source = find(connection['from_classifier'], connection['from_element'])
+        target = find(connection['to_classifier'], connection['to_element'])
+        if source is None or target is None:
+            return None
+        return source, target
+
+    def has_node(self, classifier, element):
+        """Встречался ли узел в связях"""
+        return self.registry.find(classifier, element) is not None
+
+    def has_classifier(self, classifier):
+        """Встречался ли признак в связях"""
+        return classifier in self.registry.classifier_ids
+
+    def has_edge(self, from_classifier, from_element, to_classifier, to_element):
+        """Есть ли связь между двумя узлами"""
+        find = self.registry.find
+        return (find(from_classifier, from_element), find(to_classifier, to_element)) in self._pairs
+
+    def children(self, classifier, element):
+        """Исходящие связи узла в порядке добавления"""
+        edge_ids = self._forward.get(self.registry.find(classifier, element), ())
+        return [self._edges[edge_id] for edge_id in edge_ids]
+
+    def parents(self, classifier, element):
+        """Входящие связи узла в порядке добавления"""
+        edge_ids = self._reverse.get(self.registry.find(classifier, element), ())
+        return [self._edges[edge_id] for edge_id in edge_ids]
+
+    def has_children(self, classifier, element):
+        """Есть ли у узла исходящие связи"""
+        return bool(self._forward.get(self.registry.find(classifier, element)))
+
+    def has_parents(self, classifier, element):
+        """Есть ли у узла входящие связи"""
+        return bool(self._reverse.get(self.registry.find(classifier, element)))
+
+    def node_edges(self):
+        """Пары номеров узлов (начало, конец) всех связей в порядке добавления"""
+        return [(connection.source, connection.target) for connection in self._edges.values()]
+
+    def path_from(self, sources, target):
+        """Кратчайший путь по связям от одного из узлов sources до узла target.
+
+        Вернуть список узлов (признак, элемент) от начала до target или None, если пути нет.
+        """
+        sources = set(sources)
+        if target in sources:
+            return [target]
+        registry = self.registry
+        target_id = registry.find(*target)
+        if target_id is None:
+            return None
+        source_ids = {registry.find(*source) for source in sources} - {None}
+        following = {target_id: None}  # узел -> следующий узел на пути к target
+        queue = deque([target_id])
+        while queue:
+            node = queue.popleft()
+            for edge_id in self._reverse.get(node, ()):
+                parent = self._edges[edge_id].source
+                if parent in following:
+                    continue
+                following[parent] = node
+                if parent in source_ids:
+                    path = [parent]
+                    while path[-1] != target_id:
+                        path.append(following[path[-1]])
+                    return [registry.node(node_id) for node_id in path]
+                queue.append(parent)
+        return None
+
+    def _remove_edge(self, edge_id):
+        connection = self._edges.pop(edge_id)
+        self._count_pair((connection.source, connection.target), -1)
+        for index, key in ((self._forward, connection.source), (self._reverse, connection.target)):
+            edge_ids = index.get(key)
+            if edge_ids is not None:
+                edge_ids.pop(edge_id, None)
+                if not edge_ids:
+                    del index[key]
+        return connection
+
+    def remove_connection(self, connection):
+        """Удалить одну связь с теми же узлами и комментарием, добавленную последней; вернуть её или None"""
+        pair = self._find_pair(connection)
+        if pair not in self._pairs:
+            return None
+        source, target = pair
+        comment = connection.get('comment', "")
+        for edge_id in reversed(list(self._forward[source])):
+            candidate = self._edges[edge_id]
+            if candidate.target == target and candidate.comment == comment:
+                return self._remove_edge(edge_id)
+        return None
+
+    def _remove_pair(self, source, target):
+        if (source, target) not in self._pairs:
+            return []
+        return [
+            self._remove_edge(edge_id) for edge_id in list(self._forward[source])
+            if self._edges[edge_id].target == target
+        ]
+
+    def remove_edges(self, from_classifier, from_element, to_classifier, to_element):
+        """Удалить все связи между двумя узлами; вернуть удалённые связи"""
+        find = self.registry.find
+        return self._remove_pair(find(from_classifier, from_element), find(to_classifier, to_element))
+
+    def add_missing(self, from_classifier, to_classifier, pairs, comment=""):
+        """Добавить связи для пар элементов двух признаков, между которыми связи ещё нет; вернуть добавленные"""
+        registry = self.registry
+        from_id = registry.classifier_id(from_classifier)
+        to_id = registry.classifier_id(to_classifier)
+        node_ids = registry.node_ids
+        added = []
+        for from_element, to_element in pairs:
+            source = node_ids.get((from_id, from_element))
+            target = node_ids.get((to_id, to_element))
+            if source is None or target is None or (source, target) not in self._pairs:
+                source = registry.node_id(from_classifier, from_element) if source is None else source
+                target = registry.node_id(to_classifier, to_element) if target is None else target
+                added.append(self._add_edge(source, target, comment))
+        return added
+
+    def remove_pairs(self, from_classifier, to_classifier, pairs):
+        """Удалить все связи для пар элементов двух признаков; вернуть удалённые связи"""
+        classifier_ids = self.registry.classifier_ids
+        from_id = classifier_ids.get(from_classifier)
+        to_id = classifier_ids.get(to_classifier)
+        if from_id is None or to_id is None:
+            return []
+        node_ids = self.registry.node_ids
+        removed = []
+        for from_element, to_element in pairs:
+            removed.extend(self._remove_pair(node_ids.get((from_id, from_element)), node_ids.get((to_id, to_element))))
+        return removed
+
+    def remove_node(self, classifier, element):
+        """Удалить все связи, входящие в узел и исходящие из него; вернуть удалённые связи"""
+        node_id = self.registry.find(classifier, element)
+        edge_ids = list(self._forward.get(node_id, ())) + list(self._reverse.get(node_id, ()))
+        return [self._remove_edge(edge_id) for edge_id in dict.fromkeys(edge_ids)]
+
+    def _merge_node(self, old_id, new_id):
+        """Перенести связи узла old_id на узел new_id; вернуть число перенесённых связей"""
+        outgoing = self._forward.pop(old_id, {})
+        incoming = self._reverse.pop(old_id, {})
+        changed = dict.fromkeys(outgoing)
+        changed.update(dict.fromkeys(incoming))
+        edges = self._edges
+        for edge_id in changed:
+            connection = edges[edge_id]
+            self._count_pair((connection.source, connection.target), -1)
+        for edge_id in outgoing:
+            edges[edge_id].source = new_id
+        for edge_id in incoming:
+            edges[edge_id].target = new_id
+        for edge_id in changed:
+            connection = edges[edge_id]
+            self._count_pair((connection.source, connection.target), 1)
+        if outgoing:
+            self._forward.setdefault(new_id, {}).update(outgoing)
+        if incoming:
+            self._reverse.setdefault(new_id, {}).update(incoming)
+        return len(changed)
+
+    def rename_node(self, classifier, old_element, new_element):
+        """Переименовать узел во всех связях; вернуть число изменённых связей.
+
+        Если узла с новым названием ещё нет, переименование выполняется за O(1);
+        иначе связи переносятся на существующий узел.
+        """
+        if old_element == new_element:
+            return 0
+        registry = self.registry
+        old_id = registry.find(classifier, old_element)
+        if old_id is None:
+            return 0
+        changed = len(self._forward.get(old_id, ())) + len(self._reverse.get(old_id, ()))
+        new_id = registry.find(classifier, new_element)
+        if new_id is None:
+            registry.rename_node(old_id, new_element)
+            return changed
+        return self._merge_node(old_id, new_id)
+
+    def rename_classifier(self, old_classifier, new_classifier):
+        """Переименовать признак во всех связях.
+
+        Если признак с новым названием ещё не встречался в связях, переименование
+        выполняется за O(1); иначе узлы признака объединяются с узлами нового.
+        """
+        registry = self.registry
+        if old_classifier == new_classifier or old_classifier not in registry.classifier_ids:
+            return
+        if new_classifier not in registry.classifier_ids:
+            registry.rename_classifier(old_classifier, new_classifier)
+            return
+        for node_id in registry.classifier_nodes(old_classifier):
+            element = registry.node_names[node_id]
+            target_id = registry.find(new_classifier, element)
+            if target_id is None:
+                del registry.node_ids[(registry.node_classifiers[node_id], element)]
+                new_classifier_id = registry.classifier_ids[new_classifier]
+                registry.node_classifiers[node_id] = new_classifier_id
+                registry.node_ids[(new_classifier_id, element)] = node_id
+            else:
+                self._merge_node(node_id, target_id)
+
+    def to_list(self):
+        """Список связей для сохранения в файл проекта"""
+        return [connection.to_dict() for connection in self._edges.values()]
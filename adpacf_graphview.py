@@ -0,0 +1,470 @@
+"""Граф структуры связей на tk.Canvas: признаки - столбцами, связи - линиями.
+
+Признаки располагаются столбцами слева направо в порядке проекта, элементы -
+строками внутри столбца (узлы связей, которых нет в списках элементов,
+дописываются в конец своего столбца). Раскладка (GraphLayout) вычисляется
+один раз для ревизии проекта и кешируется, поэтому прокрутка и масштабирование
+её не пересчитывают. Окно рисует только узлы и связи, попадающие в видимую
+область: узлы выбираются арифметически по номерам строк, связи - по
+ограничивающим прямоугольникам (через NumPy, если он установлен).
+
+При мелком масштабе, когда подписи элементов не помещаются, соседние
+элементы столбца объединяются в группы по 2, 4, 8... элементов (уровень
+детализации), а все связи между двумя группами рисуются одной линией,
+толщина которой растёт с числом связей. Группировка каждого уровня тоже
+вычисляется один раз и кешируется в раскладке.
+"""
+import math
+import tkinter as tk
+import weakref
+from collections import Counter
+from tkinter import ttk
+
+try:
+    import numpy as np
+except ImportError:  # граф работает и без numpy, но отбор видимых связей медленнее
+    np = None
+
+from adpacf_profiling import instrumented
+
+COLUMN_WIDTH = 280      # шаг столбцов признаков при масштабе 1
+NODE_WIDTH = 200        # ширина прямоугольника узла
+ROW_HEIGHT = 24         # шаг строк элементов
+NODE_HEIGHT = 18        # высота прямоугольника одного элемента
+MARGIN = 20             # поля слева, справа и снизу
+TOP_MARGIN = 40         # поле сверху, под заголовками столбцов
+BACK_LINK_OFFSET = 40   # вынос дуги для связей внутри столбца и справа налево
+LABEL_MIN_HEIGHT = 14   # наименьшая экранная высота строки, при которой элементы не группируются
+CHAR_WIDTH = 7          # примерная ширина символа подписи в пикселях
+MAX_DRAWN_EDGES = 2000  # предел числа рисуемых связей; при превышении рисуются самые «тяжёлые»
+MIN_SCALE = 0.005
+MAX_SCALE = 4.0
+ZOOM_STEP = 1.25
+
+NODE_FILL = "#e3f2fd"
+GROUP_FILL = "#bbdefb"
+SELECTED_FILL = "#ffe082"
+EDGE_COLOR = "#90a4ae"
+SELECTED_EDGE_COLOR = "#e65100"
+
+_layouts = weakref.WeakKeyDictionary()  # проект -> последняя вычисленная раскладка
+
+
+@instrumented()
+def graph_layout(project):
+    """Раскладка структуры проекта; пересчитывается только после изменения проекта"""
+    layout = _layouts.get(project)
+    if layout is None or layout.revision != project.revision or layout.structure is not project.structure:
+        layout = _layouts[project] = GraphLayout(project)
+    return layout
+
+
+def group_size_for_scale(scale):
+    """Число элементов в группе (степень двойки), при котором группа видна не мельче LABEL_MIN_HEIGHT"""
+    size = 1
+    while ROW_HEIGHT * scale * size < LABEL_MIN_HEIGHT:
+        size *= 2
+    return size
+
+
+class LayoutLevel:
+    """Уровень детализации раскладки: группы по size соседних элементов и связи между группами"""
+
+    def __init__(self, layout, size):
+        self.size = size
+        self.column_offsets = []  # столбец -> номер первой группы столбца
+        self.groups = []          # номер группы -> (столбец, первая строка, число элементов)
+        for column, nodes in enumerate(layout.column_nodes):
+            self.column_offsets.append(len(self.groups))
+            for first in range(0, len(nodes), size):
+                self.groups.append((column, first, min(size, len(nodes) - first)))
+        node_groups = [
+            self.column_offsets[column] + row // size for column, row in zip(layout.node_column, layout.node_row)
+        ]
+        if size == 1:
+            self.edges = layout.edges
+        else:
+            weights = Counter()
+            for source, target, count in layout.edges:
+                weights[(node_groups[source], node_groups[target])] += count
+            self.edges = [(source, target, count) for (source, target), count in weights.items()]
+        self.node_groups = node_groups
+        self.edge_lines = [self._edge_line(source, target) for source, target, _ in self.edges]
+        self.weights = [count for _, _, count in self.edges]
+        bounds = [(min(line[0::2]), min(line[1::2]), max(line[0::2]), max(line[1::2])) for line in self.edge_lines]
+        if np is not None:
+            self._bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+            self._weights = np.asarray(self.weights, dtype=np.int64)
+            self._sources = np.asarray([source for source, _, _ in self.edges], dtype=np.int64)
+            self._targets = np.asarray([target for _, target, _ in self.edges], dtype=np.int64)
+        else:
+            self._bounds = bounds
+
+    def group_box(self, group):
+        """Прямоугольник группы (x1, y1, x2, y2) при масштабе 1"""
+        column, first, count = self.groups[group]
+        x = MARGIN + column * COLUMN_WIDTH
+        y = TOP_MARGIN + first * ROW_HEIGHT
+        return x, y, x + NODE_WIDTH, y + (count - 1) * ROW_HEIGHT + NODE_HEIGHT
+
+    def _edge_line(self, source, target):
+        """Координаты линии связи: слева направо - прямая, иначе дуга слева от столбцов"""
+        source_column = self.groups[source][0]
+        target_column = self.groups[target][0]
+        x1, top1, right1, bottom1 = self.group_box(source)
+        x2, top2, right2, bottom2 = self.group_box(target)
+        y1 = (top1 + bottom1) / 2
+        y2 = (top2 + bottom2) / 2
+        if source_column < target_column:
+            return (right1, y1, x2, y2)
+        middle = min(x1, x2) - BACK_LINK_OFFSET
+        return (x1, y1, middle, (y1 + y2) / 2, x2, y2)
+
+    def visible_groups(self, left, top, right, bottom):
+        """Номера групп, пересекающих прямоугольник (в координатах масштаба 1)"""
+        step = self.size * ROW_HEIGHT
+        first_row = max(0, int((top - TOP_MARGIN) // step))
+        last_row = max(0, int((bottom - TOP_MARGIN) // step) + 1)
+        groups = []
+        for column, offset in enumerate(self.column_offsets):
+            x = MARGIN + column * COLUMN_WIDTH
+            if x + NODE_WIDTH < left or x > right:
+                continue
+            end = self.column_offsets[column + 1] if column + 1 < len(self.column_offsets) else len(self.groups)
+            groups.extend(range(min(end, offset + first_row), min(end, offset + last_row)))
+        return groups
+
+    def visible_edges(self, left, top, right, bottom, limit=MAX_DRAWN_EDGES):
+        """Номера связей, пересекающих прямоугольник, не больше limit; и общее число таких связей"""
+        if np is not None:
+            bounds = self._bounds
+            mask = (bounds[:, 2] >= left) & (bounds[:, 0] <= right) & (bounds[:, 3] >= top) & (bounds[:, 1] <= bottom)
+            indices = np.flatnonzero(mask)
+            total = len(indices)
+            if total > limit:
+                indices = indices[np.argsort(-self._weights[indices], kind='stable')[:limit]]
+            return indices.tolist(), total
+        indices = [
+            index for index, (x1, y1, x2, y2) in enumerate(self._bounds)
+            if x2 >= left and x1 <= right and y2 >= top and y1 <= bottom
+        ]
+        total = len(indices)
+        if total > limit:
+            indices = sorted(indices, key=lambda index: -self.weights[index])[:limit]
+        return indices, total
+
+    def group_edges(self, group):
+        """Номера связей, начинающихся или заканчивающихся в группе"""
+        if np is not None:
+            return np.flatnonzero((self._sources == group) | (self._targets == group)).tolist()
+        return [index for index, (source, target, _) in enumerate(self.edges) if group in (source, target)]
+
+
+class GraphLayout:
+    """Послойная раскладка структуры: столбцы признаков, строки элементов и связи между узлами"""
+
+    def __init__(self, project):
+        self.revision = project.revision
+        self.structure = project.structure
+        self.columns = []       # столбец -> название признака
+        self.column_ids = {}    # название признака -> столбец
+        self.column_nodes = []  # столбец -> номера узлов сверху вниз
+        self.nodes = []         # номер узла -> (признак, элемент)
+        self.node_ids = {}      # (признак, элемент) -> номер узла
+        self.node_column = []
+        self.node_row = []
+        for classifier in project.classifiers:
+            self._column(classifier)
+            for element in project.elements.get(classifier, ()):
+                if (classifier, element) not in self.node_ids:
+                    self._add_node(classifier, element)
+
+        # Связи по номерам узлов реестра; повторные связи между одними узлами рисуются одной линией
+        registry = project.structure.registry
+        layout_ids = {}
+        pairs = Counter(project.structure.node_edges())
+        self.connection_count = sum(pairs.values())
+        self.edges = []  # (номер начала, номер конца, число связей)
+        for (source, target), count in pairs.items():
+            for registry_id in (source, target):
+                if registry_id not in layout_ids:
+                    node = registry.node(registry_id)
+                    node_id = self.node_ids.get(node)
+                    layout_ids[registry_id] = self._add_node(*node) if node_id is None else node_id
+            self.edges.append((layout_ids[source], layout_ids[target], count))
+
+        rows = max((len(nodes) for nodes in self.column_nodes), default=0)
+        self.width = 2 * MARGIN + max(len(self.columns) - 1, 0) * COLUMN_WIDTH + NODE_WIDTH
+        self.height = TOP_MARGIN + MARGIN + rows * ROW_HEIGHT
+        self._levels = {}
+
+    def _column(self, classifier):
+        column = self.column_ids.get(classifier)
+        if column is None:
+            column = self.column_ids[classifier] = len(self.columns)
+            self.columns.append(classifier)
+            self.column_nodes.append([])
+        return column
+
+    def _add_node(self, classifier, element):
+        column = self._column(classifier)
+        node_id = self.node_ids[(classifier, element)] = len(self.nodes)
+        self.nodes.append((classifier, element))
+        self.node_column.append(column)
+        self.node_row.append(len(self.column_nodes[column]))
+        self.column_nodes[column].append(node_id)
+        return node_id
+
+    def level(self, size):
+        """Уровень детализации с группами по size элементов (вычисляется один раз)"""
+        level = self._levels.get(size)
+        if level is None:
+            level = self._levels[size] = LayoutLevel(self, size)
+        return level
+
+    def group_label(self, level, group):
+        """Подпись группы: название элемента или первый и последний элементы с их числом"""
+        column, first, count = level.groups[group]
+        nodes = self.column_nodes[column]
+        if count == 1:
+            return self.nodes[nodes[first]][1]
+        return f"{self.nodes[nodes[first]][1]} … {self.nodes[nodes[first + count - 1]][1]} ({count})"
+
+
+def _shorten(text, width):
+    """Обрезать подпись до ширины width пикселей"""
+    chars = int(width // CHAR_WIDTH)
+    if len(text) <= chars:
+        return text
+    return text[:max(chars - 1, 0)] + "…"
+
+
+class GraphViewWindow:
+    """Окно графа структуры с прокруткой, масштабированием и выбором узла"""
+
+    def __init__(self, root, project):
+        self.project = project
+        self.scale = 1.0
+        self.selected = None  # выбранный узел (признак, элемент)
+        self.redraw_pending = False
+        self.drag_start = None
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Граф структуры")
+        self.window.geometry("1000x700")
+        self.window.transient(root)
+
+        toolbar = ttk.Frame(self.window, padding=5)
+        toolbar.pack(fill=tk.X)
+        ttk.Button(toolbar, text="−", width=3, command=lambda: self.zoom(1 / ZOOM_STEP)).pack(side=tk.LEFT)
+        ttk.Button(toolbar, text="+", width=3, command=lambda: self.zoom(ZOOM_STEP)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Весь граф", command=self.fit).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Масштаб 100%", command=lambda: self.zoom(1 / self.scale)).pack(side=tk.LEFT, padx=2)
+        self.status_var = tk.StringVar()
+        ttk.Label(toolbar, textvariable=self.status_var).pack(side=tk.LEFT, padx=10)
+        ttk.Button(toolbar, text="Закрыть", command=self.window.destroy).pack(side=tk.RIGHT)
+
+        self.selection_var = tk.StringVar()
+        ttk.Label(self.window, textvariable=self.selection_var, padding=(5, 0)).pack(fill=tk.X)
+
+        graph_frame = ttk.Frame(self.window)
+        graph_frame.pack(fill=tk.BOTH, expand=True)
+        self.canvas = tk.Canvas(graph_frame, background="white")
+        x_scrollbar = ttk.Scrollbar(graph_frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
+        y_scrollbar = ttk.Scrollbar(graph_frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.canvas.config(
+            xscrollcommand=lambda *args: (x_scrollbar.set(*args), self.schedule_redraw()),
+            yscrollcommand=lambda *args: (y_scrollbar.set(*args), self.schedule_redraw())
+        )
+        y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.canvas.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        self.canvas.bind("<Configure>", lambda _: self.schedule_redraw())
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Control-MouseWheel>", self.on_zoom_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.scroll_or_zoom(event, -1))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll_or_zoom(event, 1))
+
+        project.listeners.append(self.on_project_change)
+        self.window.bind("<Destroy>", self.on_destroy)
+        self.layout = graph_layout(project)
+        self.update_scrollregion()
+
+    def on_destroy(self, event):
+        if event.widget is self.window and self.on_project_change in self.project.listeners:
+            self.project.listeners.remove(self.on_project_change)
+
+    def on_project_change(self, change):
+        """Перерисовать граф после изменения проекта (раскладка пересчитается при отрисовке)"""
+        self.schedule_redraw()
+
+    # Прокрутка и масштаб
+
+    def update_scrollregion(self):
+        self.canvas.config(scrollregion=(0, 0, self.layout.width * self.scale, self.layout.height * self.scale))
+
+    def zoom(self, factor, x=None, y=None):
+        """Изменить масштаб, сохранив на месте точку окна (x, y) (по умолчанию - центр)"""
+        if x is None:
+            x = self.canvas.winfo_width() / 2
+            y = self.canvas.winfo_height() / 2
+        scale = min(MAX_SCALE, max(MIN_SCALE, self.scale * factor))
+        if scale == self.scale:
+            return
+        layout_x = self.canvas.canvasx(x) / self.scale
+        layout_y = self.canvas.canvasy(y) / self.scale
+        self.scale = scale
+        self.update_scrollregion()
+        self.canvas.xview_moveto((layout_x * scale - x) / (self.layout.width * scale))
+        self.canvas.yview_moveto((layout_y * scale - y) / (self.layout.height * scale))
+        self.schedule_redraw()
+
+    def fit(self):
+        """Масштаб, при котором граф целиком помещается в окне"""
+        width = max(self.canvas.winfo_width(), 1)
+        height = max(self.canvas.winfo_height(), 1)
+        self.scale = min(MAX_SCALE, max(MIN_SCALE, min(width / self.layout.width, height / self.layout.height)))
+        self.update_scrollregion()
+        self.canvas.xview_moveto(0)
+        self.canvas.yview_moveto(0)
+        self.schedule_redraw()
+
+    def on_wheel(self, event):
+        self.canvas.yview_scroll(-1 if event.delta > 0 else 1, tk.UNITS)
+
+    def on_zoom_wheel(self, event):
+        self.zoom(ZOOM_STEP if event.delta > 0 else 1 / ZOOM_STEP, event.x, event.y)
+
+    def scroll_or_zoom(self, event, direction):
+        """Колесо мыши в X11: прокрутка, с Ctrl - масштаб"""
+        if event.state & 0x4:
+            self.zoom(ZOOM_STEP if direction < 0 else 1 / ZOOM_STEP, event.x, event.y)
+        else:
+            self.canvas.yview_scroll(direction, tk.UNITS)
+
+    def on_press(self, event):
+        self.drag_start = (event.x, event.y)
+        self.canvas.scan_mark(event.x, event.y)
+
+    def on_drag(self, event):
+        self.canvas.scan_dragto(event.x, event.y, gain=1)
+
+    def on_release(self, event):
+        """Щелчок без перетаскивания выбирает узел"""
+        if self.drag_start is not None and abs(event.x - self.drag_start[0]) + abs(event.y - self.drag_start[1]) < 4:
+            self.select_at(self.canvas.canvasx(event.x) / self.scale, self.canvas.canvasy(event.y) / self.scale)
+        self.drag_start = None
+
+    # Выбор узла
+
+    def select_at(self, x, y):
+        """Выбрать узел под точкой (x, y) в координатах масштаба 1"""
+        level = self.layout.level(group_size_for_scale(self.scale))
+        self.selected = None
+        for group in level.visible_groups(x, y, x, y):
+            x1, y1, x2, y2 = level.group_box(group)
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                column, first, _ = level.groups[group]
+                self.selected = self.layout.nodes[self.layout.column_nodes[column][first]]
+                break
+        self.redraw()
+
+    def describe_selection(self):
+        if self.selected is None:
+            return "Щелчок по элементу показывает его связи; перетаскивание - прокрутка, Ctrl+колесо - масштаб"
+        classifier, element = self.selected
+        structure = self.project.structure
+        return (
+            f"'{element}' ({classifier}): исходящих связей - {len(structure.children(classifier, element))}, "
+            f"входящих - {len(structure.parents(classifier, element))}"
+        )
+
+    # Отрисовка
+
+    def schedule_redraw(self):
+        """Перерисовать видимую часть графа при ближайшем простое"""
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.window.after_idle(self.redraw)
+
+    @instrumented('graph_redraw')
+    def redraw(self):
+        """Нарисовать только видимые узлы и связи выбранного уровня детализации"""
+        self.redraw_pending = False
+        if not self.window.winfo_exists():
+            return
+        layout = graph_layout(self.project)
+        if layout is not self.layout:
+            self.layout = layout
+            self.update_scrollregion()
+        canvas = self.canvas
+        canvas.delete("all")
+        scale = self.scale
+        left = canvas.canvasx(0) / scale
+        top = canvas.canvasy(0) / scale
+        right = left + canvas.winfo_width() / scale
+        bottom = top + canvas.winfo_height() / scale
+        size = group_size_for_scale(scale)
+        level = layout.level(size)
+
+        selected_group = None
+        if self.selected in layout.node_ids:
+            selected_group = level.node_groups[layout.node_ids[self.selected]]
+        elif self.selected is not None:
+            self.selected = None
+        edges, visible = level.visible_edges(left, top, right, bottom)
+        for index in edges:
+            self.draw_edge(level, index, EDGE_COLOR)
+        if selected_group is not None:
+            for index in level.group_edges(selected_group):
+                self.draw_edge(level, index, SELECTED_EDGE_COLOR)
+
+        label_width = NODE_WIDTH * scale - 6
+        font_size = max(6, min(12, int(9 * scale)))
+        for group in level.visible_groups(left, top, right, bottom):
+            x1, y1, x2, y2 = level.group_box(group)
+            if group == selected_group:
+                fill = SELECTED_FILL
+            else:
+                fill = NODE_FILL if level.groups[group][2] == 1 else GROUP_FILL
+            canvas.create_rectangle(x1 * scale, y1 * scale, x2 * scale, y2 * scale, fill=fill, outline="#607d8b")
+            if label_width >= 3 * CHAR_WIDTH:
+                canvas.create_text(
+                    x1 * scale + 3, (y1 + y2) / 2 * scale, anchor=tk.W, font=('Arial', font_size),
+                    text=_shorten(layout.group_label(level, group), label_width)
+                )
+
+        # Заголовки столбцов остаются у верхнего края окна
+        if COLUMN_WIDTH * scale >= 4 * CHAR_WIDTH:
+            header_y = canvas.canvasy(0)
+            for column, classifier in enumerate(layout.columns):
+                x = (MARGIN + column * COLUMN_WIDTH) * scale
+                if x + NODE_WIDTH * scale < left * scale or x > right * scale:
+                    continue
+                canvas.create_rectangle(
+                    x, header_y, x + NODE_WIDTH * scale, header_y + 22, fill="#eceff1", outline=""
+                )
+                canvas.create_text(
+                    x + 3, header_y + 11, anchor=tk.W, font=('Arial', 10, 'bold'),
+                    text=_shorten(classifier, NODE_WIDTH * scale - 6)
+                )
+
+        status = (
+            f"Узлов: {len(layout.nodes)}, связей: {layout.connection_count}; масштаб {scale:.0%}"
+        )
+        if size > 1:
+            status += f"; элементы сгруппированы по {size}"
+        if visible > len(edges):
+            status += f"; показано линий {len(edges)} из {visible}"
+        self.status_var.set(status)
+        self.selection_var.set(self.describe_selection())
+
+    def draw_edge(self, level, index, color):
+        """Нарисовать связь; толщина линии растёт с числом объединённых связей"""
+        scale = self.scale
+        line = [coordinate * scale for coordinate in level.edge_lines[index]]
+        width = min(6, 1 + int(math.log2(level.weights[index])))
+        self.canvas.create_line(*line, fill=color, width=width, smooth=len(line) > 4, arrow=tk.LAST, arrowshape=(6, 7, 3))
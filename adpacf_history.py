@@ -0,0 +1,222 @@
+"""История изменений проекта для отмены и повтора действий.
+
+История подписана на уведомления проекта и хранит сами словари изменений
+({'op': операция, ...}), которые проект уже рассылает журналу и интерфейсу.
+Отмена строит по словарю обратное изменение и выполняет его методами
+проекта, повтор - заново применяет исходное изменение через Project.apply.
+Поэтому шаг истории занимает память пропорционально изменению, а время
+отмены не зависит от размера проекта.
+
+Очистка структуры и сброс анализа заменяют граф связей и словарь решений
+новыми объектами; для их отмены история хранит ссылки на прежние объекты
+(без копирования) и возвращает их в проект. Так же отменяется переименование,
+при котором узлы объединились с уже существующими: проект выполняет его над
+копией структуры, и отмена возвращает связи и решения в прежнем порядке.
+"""
+from collections import deque
+
+from adpacf_core import COMBINATION_MODES, ProjectError
+
+HISTORY_LIMIT = 200  # число хранимых шагов отмены
+
+# Изменения, заменяющие структуру целиком: для отмены нужно прежнее состояние
+WHOLE_STRUCTURE_OPS = ('clear_structure', 'reset_analysis', 'restore_structure')
+
+OP_TITLES = {
+    'add_classifier': "добавление признака",
+    'insert_classifier': "восстановление признака",
+    'remove_classifier': "удаление признака",
+    'rename_classifier': "переименование признака",
+    'add_element': "добавление элемента",
+    'add_elements': "добавление элементов",
+    'insert_element': "восстановление элемента",
+    'remove_element': "удаление элемента",
+    'remove_elements': "удаление элементов",
+    'rename_element': "переименование элемента",
+    'decision': "решение по комбинации",
+    'decisions': "решения пакетного режима",
+    'clear_structure': "очистка структуры",
+    'reset_analysis': "сброс анализа",
+    'add_connection': "добавление связи",
+    'remove_node': "удаление элемента структуры",
+    'rename_node': "переименование элемента структуры",
+    'combination_mode': "смена режима перебора",
+    'patch_structure': "изменение связей",
+    'restore_structure': "восстановление структуры",
+}
+
+
+def describe_change(change):
+    """Название изменения для пунктов меню «Отменить» и «Повторить»"""
+    return OP_TITLES.get(change['op'], change['op'])
+
+
+def _connection_of(combination, comment):
+    classifier1, element1, classifier2, element2 = combination
+    return {
+        'from_classifier': classifier1,
+        'from_element': element1,
+        'to_classifier': classifier2,
+        'to_element': element2,
+        'comment': comment
+    }
+
+
+class ProjectHistory:
+    """Стеки отмены и повтора изменений проекта"""
+
+    def __init__(self, project, limit=HISTORY_LIMIT):
+        self.project = project
+        self._undo = deque(maxlen=limit)  # шаги (изменение, прежнее состояние структуры или None)
+        self._redo = []
+        self._replaying = False
+        self._captured = None  # шаг, записанный во время отмены или повтора
+        self._remember_state()
+        project.listeners.append(self.record)
+
+    def close(self):
+        """Отписаться от изменений проекта"""
+        if self.record in self.project.listeners:
+            self.project.listeners.remove(self.record)
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo_title(self):
+        """Название изменения, которое будет отменено, или None"""
+        return describe_change(self._undo[-1][0]) if self._undo else None
+
+    def redo_title(self):
+        """Название изменения, которое будет повторено, или None"""
+        return describe_change(self._redo[-1][0]) if self._redo else None
+
+    def _remember_state(self):
+        project = self.project
+        self._state = (project.structure, project.rejected, project.analysis_cursor)
+
+    def record(self, change):
+        """Запомнить изменение проекта"""
+        # Переименование с объединением узлов выполняется над копией структуры (см.
+        # Project._rename_links), поэтому прежние связи и решения тоже сохраняются целиком
+        previous = self._state if change['op'] in WHOLE_STRUCTURE_OPS or change.get('merged') else None
+        self._remember_state()
+        if self._replaying:
+            self._captured = (change, previous)
+            return
+        self._undo.append((change, previous))
+        self._redo.clear()
+
+    def _replay(self, action):
+        """Выполнить action, не записывая её изменения как новые шаги; вернуть записанный шаг"""
+        self._replaying = True
+        self._captured = None
+        try:
+            action()
+        finally:
+            self._replaying = False
+        return self._captured
+
+    def undo(self):
+        """Отменить последнее изменение; вернуть отменённое изменение или None"""
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        try:
+            self._replay(lambda: self._apply_inverse(*step))
+        except Exception:
+            self._undo.append(step)
+            raise
+        self._redo.append(step)
+        return step[0]
+
+    def redo(self):
+        """Повторить последнее отменённое изменение; вернуть его или None"""
+        if not self._redo:
+            return None
+        step = self._redo.pop()
+        try:
+            captured = self._replay(lambda: self.project.apply(step[0]))
+        except Exception:
+            self._redo.append(step)
+            raise
+        # Повтор порождает новое уведомление (например, с другими удалёнными связями);
+        # следующая отмена строится по нему
+        self._undo.append(captured or step)
+        return step[0]
+
+    def _apply_inverse(self, change, previous):
+        """Выполнить изменение, обратное change"""
+        project = self.project
+        op = change['op']
+        if op == 'add_classifier':
+            project.remove_classifier(project.classifiers.index(change['name']))
+        elif op == 'insert_classifier':
+            project.remove_classifier(change['index'])
+        elif op == 'remove_classifier':
+            project.insert_classifier(change['index'], change['name'], change['elements'])
+        elif op == 'rename_classifier':
+            # Если узлы объединились с существующими, обратное переименование
+            # перенесло бы и чужие связи: связи и решения возвращаются целиком
+            merged = change.get('merged', False)
+            project.rename_classifier(change['index'], change['old'], rename_links=not merged)
+            if merged:
+                project.restore_structure(*previous)
+        elif op == 'add_element':
+            elements = project.elements[change['classifier']]
+            index = len(elements) - 1 if elements[-1] == change['name'] else elements.index(change['name'])
+            project.remove_element(change['classifier'], index)
+        elif op == 'add_elements':
+            project.remove_elements(change['classifier'], change['names'])
+        elif op == 'insert_element':
+            project.remove_element(change['classifier'], change['index'])
+        elif op == 'remove_element':
+            project.insert_element(change['classifier'], change['index'], change['name'])
+        elif op == 'remove_elements':
+            project.add_elements(change['classifier'], change['names'])
+        elif op == 'rename_element':
+            merged = change.get('merged', False)
+            project.rename_element(change['classifier'], change['index'], change['old'], rename_links=not merged)
+            if merged:
+                project.restore_structure(*previous)
+        elif op == 'decision':
+            combination = change['combination']
+            removed = [_connection_of(combination, change['comment'])] if change['is_valid'] else []
+            if change['rejected_before']:
+                project.patch_structure(removed=removed, rejected=[combination])
+            else:
+                project.patch_structure(removed=removed, unrejected=[combination])
+        elif op == 'decisions':
+            classifier1, classifier2 = change['classifier1'], change['classifier2']
+            rejected_before = {tuple(pair) for pair in change['rejected_before']}
+            combination = lambda pair: [classifier1, pair[0], classifier2, pair[1]]
+            project.patch_structure(
+                added=change['removed'],
+                removed=change['added'],
+                rejected=[combination(pair) for pair in change['significant'] if tuple(pair) in rejected_before],
+                unrejected=[combination(pair) for pair in change['insignificant'] if tuple(pair) not in rejected_before]
+            )
+        elif op == 'patch_structure':
+            project.patch_structure(
+                added=change['removed'], removed=change['added'],
+                rejected=change['unrejected'], unrejected=change['rejected']
+            )
+        elif op == 'add_connection':
+            project.patch_structure(removed=[change])
+        elif op == 'remove_node':
+            project.patch_structure(added=change['removed'])
+        elif op == 'rename_node':
+            if change.get('merged'):
+                project.restore_structure(*previous)
+            else:
+                project.rename_node(change['classifier'], change['new'], change['old'])
+        elif op in WHOLE_STRUCTURE_OPS:
+            project.restore_structure(*previous)
+        elif op == 'combination_mode':
+            project.set_combination_mode(next(mode for mode in COMBINATION_MODES if mode != change['mode']))
+        else:
+            raise ProjectError(f"Неизвестная операция: {op}")
@@ -0,0 +1,154 @@
+"""Массовый импорт признаков и элементов из текста, CSV и TSV.
+
+Многострочный текст (например, из буфера обмена) импортируется построчно
+в один признак. В таблицах CSV/TSV столбцы сопоставляются признакам: по
+заголовку, если хотя бы одно название столбца совпадает с признаком, иначе -
+по порядку признаков. Дубликаты отсекаются через множества проекта, поэтому
+импорт выполняется за время, близкое к линейному.
+"""
+import csv
+import io
+import os
+
+MAX_REPORTED_CONFLICTS = 20  # число конфликтов, перечисляемых в тексте отчёта
+
+
+class ImportReport:
+    """Итоги массового импорта"""
+
+    def __init__(self):
+        self.added = {}              # признак -> число добавленных элементов
+        self.added_classifiers = []  # признаки, созданные при импорте
+        self.duplicates = 0          # элементы, которые уже были в признаке или повторялись в источнике
+        self.conflicts = []          # сообщения о спорных строках и столбцах
+
+    @property
+    def total_added(self):
+        return sum(self.added.values())
+
+    def summary(self):
+        """Текст отчёта для пользователя"""
+        lines = []
+        if self.added or not self.added_classifiers:
+            lines.append(f"Добавлено элементов: {self.total_added}")
+        for classifier, count in self.added.items():
+            if count:
+                lines.append(f"    {classifier}: {count}")
+        if self.added_classifiers:
+            lines.append(f"Добавлено признаков: {len(self.added_classifiers)}")
+        lines.append(f"Пропущено дубликатов: {self.duplicates}")
+        if self.conflicts:
+            lines.append(f"Конфликтов: {len(self.conflicts)}")
+            lines.extend(f"    {conflict}" for conflict in self.conflicts[:MAX_REPORTED_CONFLICTS])
+            if len(self.conflicts) > MAX_REPORTED_CONFLICTS:
+                lines.append(f"    ... и ещё {len(self.conflicts) - MAX_REPORTED_CONFLICTS}")
+        return "\n".join(lines)
+
+
+def split_lines(text):
+    """Непустые строки текста без пробелов по краям"""
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def is_table_text(text):
+    """Похож ли текст на таблицу, скопированную из электронной таблицы"""
+    return "\t" in text
+
+
+def read_table(text, delimiter=None):
+    """Разобрать текст CSV/TSV в список строк; разделитель определяется автоматически"""
+    if delimiter is None:
+        first_line = text.split("\n", 1)[0]
+        if "\t" in first_line:
+            delimiter = "\t"
+        elif ";" in first_line and "," not in first_line:
+            delimiter = ";"
+        else:
+            delimiter = ","
+    return [row for row in csv.reader(io.StringIO(text), delimiter=delimiter) if any(cell.strip() for cell in row)]
+
+
+def read_table_file(filepath):
+    """Прочитать таблицу из файла; файлы .tsv и .tab считаются разделёнными табуляцией"""
+    extension = os.path.splitext(filepath)[1].lower()
+    delimiter = "\t" if extension in (".tsv", ".tab") else None
+    with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+        return read_table(f.read(), delimiter)
+
+
+def _element_owners(project):
+    """Словарь: название элемента -> признак, в котором он уже есть"""
+    owners = {}
+    for classifier, elements in project.elements.items():
+        for element in elements:
+            owners.setdefault(element, classifier)
+    return owners
+
+
+def _import_column(project, classifier, names, report, owners):
+    """Добавить элементы одного признака и учесть результат в отчёте"""
+    added, skipped = project.add_elements(classifier, names)
+    report.added[classifier] = report.added.get(classifier, 0) + len(added)
+    report.duplicates += len(skipped)
+    for name in added:
+        owner = owners.setdefault(name, classifier)
+        if owner != classifier:
+            report.conflicts.append(f"Элемент '{name}' ({classifier}) уже есть у признака '{owner}'")
+
+
+def import_lines(project, classifier, text):
+    """Импортировать строки текста как элементы одного признака"""
+    report = ImportReport()
+    _import_column(project, classifier, split_lines(text), report, _element_owners(project))
+    return report
+
+
+def import_classifiers(project, text):
+    """Импортировать строки текста как признаки структуризации"""
+    report = ImportReport()
+    for name in split_lines(text):
+        if project.has_classifier(name):
+            report.duplicates += 1
+        else:
+            report.added_classifiers.append(project.add_classifier(name))
+    return report
+
+
+def import_table(project, rows, create_classifiers=False):
+    """Импортировать таблицу, сопоставив столбцы признакам.
+
+    Если в первой строке есть название существующего признака, она считается
+    заголовком; столбцы с неизвестными заголовками создают новые признаки
+    (при create_classifiers=True) или пропускаются. Без заголовка столбцы
+    сопоставляются признакам по порядку.
+    """
+    report = ImportReport()
+    if not rows:
+        return report
+    header = [cell.strip() for cell in rows[0]]
+    column_count = max(len(row) for row in rows)
+    mapping = {}
+    if any(project.has_classifier(name) for name in header):
+        data = rows[1:]
+        for column, name in enumerate(header):
+            if not name:
+                continue
+            if project.has_classifier(name):
+                mapping[column] = name
+            elif create_classifiers:
+                report.added_classifiers.append(project.add_classifier(name))
+                mapping[column] = name
+            else:
+                report.conflicts.append(f"Столбец '{name}' не соответствует ни одному признаку")
+    else:
+        data = rows
+        for column in range(column_count):
+            if column < len(project.classifiers):
+                mapping[column] = project.classifiers[column]
+            else:
+                report.conflicts.append(f"Столбцу {column + 1} не соответствует ни один признак")
+    owners = _element_owners(project)
+    for column, classifier in mapping.items():
+        names = [row[column] for row in data if column < len(row)]
+        _import_column(project, classifier, names, report, owners)
+    return report
@@ -0,0 +1,114 @@
+"""Журнал изменений проекта для автосохранения и восстановления после сбоя.
+
+Каждое изменение проекта (решение по комбинации, правка признаков, элементов
+или структуры) дописывается строкой JSON в файл <проект>.journal рядом
+с файлом проекта. Стоимость записи пропорциональна изменению, а не размеру
+проекта. Периодически журнал сворачивается: проект целиком сохраняется
+в основной файл, а журнал очищается. Сворачивает журнал его владелец
+(программа - фоновой операцией, сервис - в отдельном потоке), а не
+подписчик уведомлений: полное сохранение внутри уведомления остановило бы
+интерфейс, а ошибка записи попала бы к тому, кто изменил проект. При
+открытии проекта записи журнала повторяются поверх основного файла.
+"""
+import json
+import os
+
+from adpacf_core import ProjectError
+
+JOURNAL_SUFFIX = ".journal"
+COMPACT_EVERY = 500  # число записей журнала, после которого он сворачивается в основной файл
+
+
+def journal_path(project_path):
+    """Путь к журналу изменений проекта"""
+    return project_path + JOURNAL_SUFFIX
+
+
+def save_atomically(project, project_path, control=None):
+    """Сохранить проект через временный файл, чтобы сбой или отмена не повредили основной файл"""
+    root, extension = os.path.splitext(project_path)
+    temporary_path = f"{root}.tmp{extension}"
+    try:
+        project.save(temporary_path, control)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    os.replace(temporary_path, project_path)
+
+
+def replay_journal(project, project_path):
+    """Повторить изменения из журнала проекта; вернуть число применённых записей.
+
+    Недописанная последняя строка (сбой во время записи) пропускается.
+    """
+    path = journal_path(project_path)
+    if not os.path.exists(path):
+        return 0
+    applied = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                change = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            try:
+                project.apply(change)
+            except (ProjectError, KeyError, IndexError, TypeError) as e:
+                raise ProjectError(f"Не удалось применить запись журнала {applied + 1}: {e}") from e
+            applied += 1
+    return applied
+
+
+class ProjectJournal:
+    """Журнал изменений, подписанный на уведомления проекта"""
+
+    def __init__(self, project, project_path):
+        self.project = project
+        self.project_path = project_path
+        self.path = journal_path(project_path)
+        self._encode = json.JSONEncoder(ensure_ascii=False).encode
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._entries = 0
+        self._compact_at = COMPACT_EVERY  # число записей, при котором журнал пора свернуть
+        project.listeners.append(self.record)
+
+    def record(self, change):
+        """Дописать изменение в журнал"""
+        self._file.write(self._encode(change))
+        self._file.write("\n")
+        self._file.flush()
+        self._entries += 1
+
+    @property
+    def compact_due(self):
+        """Пора ли свернуть журнал в основной файл"""
+        return self._entries >= self._compact_at
+
+    def postpone_compaction(self):
+        """Отложить сворачивание ещё на COMPACT_EVERY записей (например, после ошибки сохранения)"""
+        self._compact_at = self._entries + COMPACT_EVERY
+
+    def compact(self):
+        """Сохранить проект в основной файл и очистить журнал"""
+        save_atomically(self.project, self.project_path)
+        self.compact_without_saving()
+
+    def compact_without_saving(self):
+        """Очистить журнал, когда проект уже полностью сохранён в основной файл"""
+        self._file.seek(0)
+        self._file.truncate()
+        self._entries = 0
+        self._compact_at = COMPACT_EVERY
+
+    def close(self, compact=False):
+        """Отписаться от проекта и закрыть журнал; при compact=True - предварительно свернуть его"""
+        if self.record in self.project.listeners:
+            self.project.listeners.remove(self.record)
+        if compact and self._entries:
+            self.compact()
+        self._file.close()
+        if compact and os.path.exists(self.path) and os.path.getsize(self.path) == 0:
+            os.remove(self.path)
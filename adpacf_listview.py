@@ -0,0 +1,239 @@
+"""Виртуальный список строк с фильтром для экранов ввода признаков и элементов.
+
+Строки хранятся в списке Python, а в tk.Listbox находятся только строки,
+помещающиеся в окне; полоса прокрутки управляет сдвигом окна. Поэтому
+добавление, удаление и переименование строки, как и прокрутка, стоят
+O(высоты окна), а не O(длины списка). Фильтр по подстроке использует
+SubstringIndex, который строится при первом запросе и затем обновляется
+вместе со списком; при правке строки отбор не пересчитывается, а правится
+на месте (двоичный поиск позиции и сдвиг следующих номеров).
+"""
+import tkinter as tk
+from bisect import bisect_left
+from tkinter import ttk
+
+from adpacf_search import SubstringIndex
+
+WHEEL_STEP = 3  # число строк, прокручиваемых одним щелчком колеса мыши
+
+
+class VirtualListbox(ttk.Frame):
+    """Список с отрисовкой только видимых строк и фильтром по подстроке"""
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.items = []
+        self._index = None      # индекс подстрок по строкам списка, строится при первом фильтре
+        self._query = ""
+        self._rows = None       # номера строк, прошедших фильтр; None - показываются все
+        self._first = 0         # первая видимая позиция
+        self._visible = 1       # число позиций, помещающихся в окне
+        self._selected = None   # номер выделенной строки в self.items
+        self.listbox = tk.Listbox(self, selectmode=tk.SINGLE, exportselection=False, activestyle=tk.NONE)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.listbox.bind('<Configure>', self._on_configure)
+        self.listbox.bind('<<ListboxSelect>>', self._on_select)
+        self.listbox.bind('<MouseWheel>', self._on_wheel)
+        self.listbox.bind('<Button-4>', lambda event: self.scroll(-WHEEL_STEP))
+        self.listbox.bind('<Button-5>', lambda event: self.scroll(WHEEL_STEP))
+        self.listbox.bind('<Up>', lambda event: self._move_selection(-1))
+        self.listbox.bind('<Down>', lambda event: self._move_selection(1))
+        self.listbox.bind('<Prior>', lambda event: self._move_selection(-self._visible))
+        self.listbox.bind('<Next>', lambda event: self._move_selection(self._visible))
+
+    # Содержимое
+
+    def set_items(self, items):
+        """Заменить все строки списка"""
+        self.items = list(items)
+        self._index = None
+        self._selected = None
+        self._first = 0
+        self._refilter()
+
+    def insert(self, index, text):
+        """Вставить строку в позицию index (tk.END - в конец)"""
+        if index == tk.END:
+            index = len(self.items)
+        self.items.insert(index, text)
+        if self._selected is not None and index <= self._selected:
+            self._selected += 1
+        if self._index is not None:
+            self._index.add(text, text)
+        if self._rows is not None:
+            position = bisect_left(self._rows, index)
+            self._shift_rows(position, 1)
+            if self._matches(text):
+                self._rows.insert(position, index)
+        self._render()
+
+    def extend(self, texts):
+        """Добавить строки в конец списка"""
+        texts = list(texts)
+        self.items.extend(texts)
+        if self._index is not None:
+            for text in texts:
+                self._index.add(text, text)
+        if self._rows is not None:
+            matched = set(self._index.search(self._query))
+            start = len(self.items) - len(texts)
+            self._rows.extend(i for i in range(start, len(self.items)) if self.items[i] in matched)
+        self._render()
+
+    def delete(self, index):
+        """Удалить строку с номером index"""
+        text = self.items.pop(index)
+        if self._selected is not None:
+            if index == self._selected:
+                self._selected = None
+            elif index < self._selected:
+                self._selected -= 1
+        if self._index is not None:
+            self._index.remove(text)
+        if self._rows is not None:
+            position = bisect_left(self._rows, index)
+            if position < len(self._rows) and self._rows[position] == index:
+                del self._rows[position]
+            self._shift_rows(position, -1)
+        self._render()
+
+    def replace(self, index, text):
+        """Заменить текст строки с номером index"""
+        old_text = self.items[index]
+        self.items[index] = text
+        if self._index is not None:
+            self._index.remove(old_text)
+            self._index.add(text, text)
+        if self._rows is not None:
+            position = bisect_left(self._rows, index)
+            shown = position < len(self._rows) and self._rows[position] == index
+            if self._matches(text) and not shown:
+                self._rows.insert(position, index)
+            elif shown and not self._matches(text):
+                del self._rows[position]
+        self._render()
+
+    def _shift_rows(self, position, delta):
+        """Сдвинуть номера отобранных строк, начиная с позиции position"""
+        rows = self._rows
+        rows[position:] = [i + delta for i in rows[position:]]
+
+    # Фильтр
+
+    def set_filter(self, query):
+        """Показывать только строки, содержащие query (пустой запрос - все строки)"""
+        self._query = query.strip()
+        self._first = 0
+        self._refilter()
+
+    def _matches(self, text):
+        """Проходит ли строка текущий фильтр"""
+        return self._query.casefold() in text.casefold()
+
+    def _refilter(self):
+        if not self._query:
+            self._rows = None
+        else:
+            if self._index is None:
+                self._index = SubstringIndex((text, text) for text in self.items)
+            matched = set(self._index.search(self._query))
+            self._rows = [i for i, text in enumerate(self.items) if text in matched]
+        self._render()
+
+    # Выделение
+
+    def curselection(self):
+        """Номер выделенной строки в полном списке (кортеж, как у tk.Listbox)"""
+        return () if self._selected is None else (self._selected,)
+
+    def _row_count(self):
+        return len(self.items) if self._rows is None else len(self._rows)
+
+    def _item_at(self, position):
+        return position if self._rows is None else self._rows[position]
+
+    def _position_of(self, index):
+        """Позиция строки среди показанных или None, если она скрыта фильтром"""
+        if self._rows is None:
+            return index
+        position = bisect_left(self._rows, index)
+        if position < len(self._rows) and self._rows[position] == index:
+            return position
+        return None
+
+    def _on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self._selected = self._item_at(self._first + selection[0])
+
+    def _move_selection(self, delta):
+        total = self._row_count()
+        if not total:
+            return "break"
+        position = self._position_of(self._selected) if self._selected is not None else None
+        position = 0 if position is None else max(0, min(total - 1, position + delta))
+        self._selected = self._item_at(position)
+        if position < self._first:
+            self._first = position
+        elif position >= self._first + self._visible:
+            self._first = position - self._visible + 1
+        self._render()
+        self.listbox.event_generate('<<ListboxSelect>>')
+        return "break"
+
+    # Прокрутка и отрисовка
+
+    def yview(self, *args):
+        """Команда полосы прокрутки"""
+        total = self._row_count()
+        if args[0] == 'moveto':
+            self._first = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self._visible
+            self._first += step
+        self._render()
+
+    def scroll(self, rows):
+        """Прокрутить список на rows строк"""
+        self._first += rows
+        self._render()
+        return "break"
+
+    def _on_wheel(self, event):
+        return self.scroll(-WHEEL_STEP if event.delta > 0 else WHEEL_STEP)
+
+    def _on_configure(self, event):
+        line_height = self._line_height()
+        visible = max(1, event.height // line_height)
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
+
+    def _line_height(self):
+        bbox = self.listbox.bbox(0)
+        if bbox:
+            return max(1, bbox[3])
+        return max(1, self.listbox.winfo_reqheight() // max(1, int(self.listbox.cget('height'))))
+
+    def _render(self):
+        """Перерисовать видимое окно строк"""
+        total = self._row_count()
+        self._first = max(0, min(self._first, total - self._visible))
+        end = min(total, self._first + self._visible)
+        listbox = self.listbox
+        listbox.delete(0, tk.END)
+        if end > self._first:
+            listbox.insert(tk.END, *(self.items[self._item_at(position)] for position in range(self._first, end)))
+        if self._selected is not None:
+            position = self._position_of(self._selected)
+            if position is not None and self._first <= position < end:
+                listbox.selection_set(position - self._first)
+                listbox.activate(position - self._first)
+        if total:
+            self.scrollbar.set(self._first / total, end / total)
+        else:
+            self.scrollbar.set(0, 1)
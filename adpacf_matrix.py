@@ -0,0 +1,159 @@
+"""Пакетный режим анализа связей: матрица значимости для пары признаков.
+
+Решения по всем парам элементов двух признаков (соседних или, в режиме всех
+пар, любых - см. Project.classifier_pairs) хранятся в булевой
+матрице NumPy (строки - элементы первого признака, столбцы - второго).
+Массовые операции (строка, столбец, правило по названиям, инверсия)
+выполняются над матрицей целиком, а изменения записываются в проект
+одной операцией Project.record_decisions.
+
+В проект попадают только ячейки, которые аналитик менял; пары, которых он
+не касался, остаются нерассмотренными, если явно не выбран режим
+«неотмеченные пары незначимы» (reject_unchecked).
+
+Модуль требует пакет numpy; без него пакетный режим недоступен.
+"""
+import re
+
+try:
+    import numpy as np
+except ImportError:  # пакетный режим необязателен
+    np = None
+
+from adpacf_core import ProjectError
+
+
+def matrix_available():
+    """Доступен ли пакетный режим (установлен ли numpy)"""
+    return np is not None
+
+
+class RelevanceMatrix:
+    """Матрица значимости связей между элементами двух признаков"""
+
+    def __init__(self, project, classifier1, classifier2):
+        if np is None:
+            raise ProjectError("Для пакетного режима требуется пакет numpy")
+        self.project = project
+        self.classifier1 = classifier1
+        self.classifier2 = classifier2
+        self.rows = list(project.elements.get(classifier1, []))
+        self.columns = list(project.elements.get(classifier2, []))
+        shape = (len(self.rows), len(self.columns))
+        self.significant = np.zeros(shape, dtype=bool)  # связи, уже записанные в структуру
+        self.rejected = np.zeros(shape, dtype=bool)     # пары, уже признанные незначимыми
+        self.load()
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def load(self):
+        """Заполнить матрицу текущими решениями проекта"""
+        self.significant[:] = False
+        self.rejected[:] = False
+        column_index = {element: j for j, element in enumerate(self.columns)}
+        structure = self.project.structure
+        for i, element1 in enumerate(self.rows):
+            for connection in structure.children(self.classifier1, element1):
+                if connection['to_classifier'] == self.classifier2:
+                    j = column_index.get(connection['to_element'])
+                    if j is not None:
+                        self.significant[i, j] = True
+        row_index = {element: i for i, element in enumerate(self.rows)}
+        for classifier1, element1, classifier2, element2 in self.project.rejected:
+            if classifier1 == self.classifier1 and classifier2 == self.classifier2:
+                i = row_index.get(element1)
+                j = column_index.get(element2)
+                if i is not None and j is not None:
+                    self.rejected[i, j] = True
+        self.values = self.significant.copy()
+        self.touched = np.zeros(self.significant.shape, dtype=bool)  # ячейки, изменённые аналитиком
+
+    def decided(self):
+        """Маска пар, по которым уже принято решение"""
+        return self.significant | self.rejected
+
+    # Массовые операции
+
+    def toggle(self, row, column):
+        """Переключить одну ячейку"""
+        self.values[row, column] = not self.values[row, column]
+        self.touched[row, column] = True
+
+    def set_row(self, row, value=True):
+        """Отметить или снять всю строку"""
+        self.values[row, :] = value
+        self.touched[row, :] = True
+
+    def set_column(self, column, value=True):
+        """Отметить или снять весь столбец"""
+        self.values[:, column] = value
+        self.touched[:, column] = True
+
+    def set_all(self, value=True):
+        """Отметить или снять всю матрицу"""
+        self.values[:] = value
+        self.touched[:] = True
+
+    def invert(self):
+        """Инвертировать матрицу"""
+        np.logical_not(self.values, out=self.values)
+        self.touched[:] = True
+
+    @staticmethod
+    def _match(names, pattern, regex):
+        """Маска названий, подходящих под подстроку или регулярное выражение"""
+        if not pattern:
+            return np.ones(len(names), dtype=bool)
+        if regex:
+            try:
+                compiled = re.compile(pattern, re.IGNORECASE)
+            except re.error as e:
+                raise ProjectError(f"Некорректное регулярное выражение: {e}") from e
+            return np.fromiter((compiled.search(name) is not None for name in names), dtype=bool, count=len(names))
+        pattern = pattern.casefold()
+        return np.fromiter((pattern in name.casefold() for name in names), dtype=bool, count=len(names))
+
+    def fill_by_rule(self, row_pattern="", column_pattern="", regex=False, value=True):
+        """Установить значение для пар, где строка и столбец подходят под правила.
+
+        Пустое правило подходит под все названия. Вернуть число затронутых ячеек.
+        """
+        row_mask = self._match(self.rows, row_pattern, regex)
+        column_mask = self._match(self.columns, column_pattern, regex)
+        cells = np.ix_(row_mask, column_mask)
+        self.values[cells] = value
+        self.touched[cells] = True
+        return int(row_mask.sum()) * int(column_mask.sum())
+
+    # Запись в проект
+
+    def changes(self, reject_unchecked=False):
+        """Изменения относительно проекта: маски новых значимых и новых незначимых пар.
+
+        Незначимыми становятся снятые аналитиком ячейки, а при reject_unchecked -
+        все неотмеченные пары без решения, в том числе нетронутые.
+        """
+        added = self.values & ~self.significant
+        dropped = ~self.values & ~self.rejected
+        if not reject_unchecked:
+            dropped &= self.touched
+        return added, dropped
+
+    def _pairs(self, mask):
+        """Пары (элемент1, элемент2) для отмеченных в маске ячеек"""
+        rows, columns = np.nonzero(mask)
+        return list(zip(np.array(self.rows, dtype=object)[rows], np.array(self.columns, dtype=object)[columns]))
+
+    def commit(self, comment="", reject_unchecked=False):
+        """Записать матрицу в проект; вернуть число значимых и незначимых пар, по которым изменилось решение"""
+        added, dropped = self.changes(reject_unchecked)
+        significant = self._pairs(added)
+        insignificant = self._pairs(dropped)
+        if significant or insignificant:
+            self.project.record_decisions(
+                self.classifier1, self.classifier2, significant, insignificant, comment
+            )
+        self.load()
+        return len(significant), len(insignificant)
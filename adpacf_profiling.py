@@ -0,0 +1,151 @@
+"""Замеры времени и счётчики основных операций приложения для диагностики.
+
+Методы этапов работы (построение дерева результатов, показ комбинаций,
+открытие, сохранение, экспорт) оборачиваются декоратором instrumented или
+контекстом instrumentation.timed: для каждой операции копятся число вызовов,
+суммарное и максимальное время. Счётчики (вставленные узлы дерева, принятые
+решения) копятся методом count. Сводку можно получить словарём или записать
+в JSON; дополнительно можно включить профилировщик cProfile.
+
+Модуль не зависит от tkinter.
+"""
+import cProfile
+import functools
+import io
+import json
+import platform
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+PROFILE_TOP = 30  # число функций в текстовой сводке профилировщика
+
+
+class Instrumentation:
+    """Накопитель замеров времени и счётчиков"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+        self._profile = None
+        self.profile_text = ""  # сводка последнего сеанса профилирования
+
+    def reset(self):
+        """Сбросить все замеры"""
+        with self._lock:
+            self.started = time.time()
+            self.timings = {}   # операция -> [вызовов, суммарное время, максимальное время]
+            self.counters = {}  # счётчик -> [значение, время первого изменения, время последнего]
+
+    def record(self, name, seconds):
+        """Учесть один вызов операции"""
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                self.timings[name] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+
+    @contextmanager
+    def timed(self, name):
+        """Контекст, замеряющий время выполнения операции name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def count(self, name, amount=1):
+        """Увеличить счётчик"""
+        now = time.time()
+        with self._lock:
+            counter = self.counters.get(name)
+            if counter is None:
+                self.counters[name] = [amount, now, now]
+            else:
+                counter[0] += amount
+                counter[2] = now
+
+    def snapshot(self):
+        """Сводка замеров в виде словаря, пригодного для JSON"""
+        with self._lock:
+            timings = {
+                name: {
+                    'calls': calls,
+                    'total_seconds': total,
+                    'mean_seconds': total / calls,
+                    'max_seconds': longest,
+                    'calls_per_second': calls / total if total else None,
+                }
+                for name, (calls, total, longest) in self.timings.items()
+            }
+            counters = {}
+            for name, (value, first, last) in self.counters.items():
+                span = last - first
+                counters[name] = {
+                    'value': value,
+                    'per_minute': value * 60 / span if span > 0 else None,
+                }
+            return {
+                'started': time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                'uptime_seconds': time.time() - self.started,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'timings': timings,
+                'counters': counters,
+                'profile': self.profile_text,
+            }
+
+    def dump(self, filepath):
+        """Записать сводку замеров в JSON"""
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+    # Профилировщик
+
+    @property
+    def profiling(self):
+        """Включён ли профилировщик"""
+        return self._profile is not None
+
+    def start_profile(self):
+        """Включить cProfile (профилируется поток интерфейса)"""
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop_profile(self, filepath=None):
+        """Выключить cProfile; сохранить статистику в filepath (формат pstats) и вернуть текстовую сводку.
+
+        Сводка строится до записи файла, поэтому при ошибке записи (OSError)
+        она не теряется и остаётся в profile_text.
+        """
+        profile, self._profile = self._profile, None
+        if profile is None:
+            return self.profile_text
+        profile.disable()
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP)
+        self.profile_text = stream.getvalue()
+        if filepath:
+            profile.dump_stats(filepath)
+        return self.profile_text
+
+
+instrumentation = Instrumentation()  # общий накопитель приложения
+
+
+def instrumented(name=None):
+    """Декоратор: замерять время вызовов функции в общем накопителе"""
+    def decorator(function):
+        operation = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with instrumentation.timed(operation):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
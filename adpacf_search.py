@@ -0,0 +1,251 @@
+"""Индексы подстрок для быстрого поиска по названиям и комментариям.
+
+Каждый текст разбивается на триграммы (подстроки из трёх символов) без учёта
+регистра. Для запроса из трёх и более символов кандидаты берутся из
+пересечения списков его триграмм, начиная с самого короткого, и затем
+проверяются на вхождение запроса целиком. Короткие запросы проверяются
+перебором. Добавление и удаление текста стоят O(длины текста).
+
+ProjectIndex строит такой индекс по признакам, элементам и комментариям
+связей проекта и поддерживает его по уведомлениям об изменениях проекта.
+"""
+
+TRIGRAM = 3
+
+
+def _trigrams(text):
+    """Множество триграмм текста"""
+    return {text[i:i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+
+class SubstringIndex:
+    """Триграммный индекс: ключ -> текст, поиск ключей по подстроке текста"""
+
+    def __init__(self, items=()):
+        self._texts = {}  # ключ -> текст в нижнем регистре
+        self._grams = {}  # триграмма -> {ключ: None}
+        for key, text in items:
+            self.add(key, text)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __contains__(self, key):
+        return key in self._texts
+
+    def add(self, key, text):
+        """Добавить текст под ключом; прежний текст ключа заменяется"""
+        if key in self._texts:
+            self.remove(key)
+        folded = text.casefold()
+        self._texts[key] = folded
+        grams = self._grams
+        for gram in _trigrams(folded):
+            bucket = grams.get(gram)
+            if bucket is None:
+                bucket = grams[gram] = {}
+            bucket[key] = None
+
+    def remove(self, key):
+        """Удалить текст ключа из индекса"""
+        folded = self._texts.pop(key, None)
+        if folded is None:
+            return
+        for gram in _trigrams(folded):
+            bucket = self._grams.get(gram)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._grams[gram]
+
+    def search(self, query):
+        """Ключи, тексты которых содержат запрос (без учёта регистра)"""
+        folded = query.strip().casefold()
+        if not folded:
+            return list(self._texts)
+        if len(folded) < TRIGRAM:
+            return [key for key, text in self._texts.items() if folded in text]
+        buckets = []
+        for gram in _trigrams(folded):
+            bucket = self._grams.get(gram)
+            if bucket is None:
+                return []
+            buckets.append(bucket)
+        buckets.sort(key=len)
+        smallest, others = buckets[0], buckets[1:]
+        texts = self._texts
+        return [
+            key for key in smallest
+            if all(key in bucket for bucket in others) and folded in texts[key]
+        ]
+
+
+# Виды результатов поиска по проекту, в порядке выдачи
+HIT_CLASSIFIER = 'classifier'  # ('classifier', признак)
+HIT_ELEMENT = 'element'        # ('element', признак, элемент)
+HIT_COMMENT = 'comment'        # ('comment', признак1, элемент1, признак2, элемент2)
+HIT_ORDER = {HIT_CLASSIFIER: 0, HIT_ELEMENT: 1, HIT_COMMENT: 2}
+
+
+class ProjectIndex:
+    """Поисковый индекс проекта, обновляемый по уведомлениям об изменениях.
+
+    Элементы индексируются как из списков элементов, так и из узлов структуры
+    (в дереве результатов можно добавить элемент, которого нет в списках).
+    Комментарии всех связей между двумя узлами объединяются в одну запись.
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self.rebuild()
+        project.listeners.append(self.on_change)
+
+    def close(self):
+        """Отписаться от изменений проекта"""
+        if self.on_change in self.project.listeners:
+            self.project.listeners.remove(self.on_change)
+
+    def rebuild(self):
+        """Построить индекс заново по всему проекту.
+
+        Если комментарии связей ещё не прочитаны (двоичный проект открыт
+        с отложенными комментариями), они индексируются позже - вызовом
+        index_comments после их загрузки или при первом поиске.
+        """
+        project = self.project
+        index = self._index = SubstringIndex()
+        for classifier in project.classifiers:
+            index.add((HIT_CLASSIFIER, classifier), classifier)
+        for classifier, elements in project.elements.items():
+            for element in elements:
+                index.add((HIT_ELEMENT, classifier, element), element)
+        for connection in project.structure:
+            for side in ('from', 'to'):
+                key = (HIT_ELEMENT, connection[f'{side}_classifier'], connection[f'{side}_element'])
+                if key not in index:
+                    index.add(key, key[2])
+        self.comments_indexed = False
+        if project.deferred_comments is None:
+            self.index_comments()
+
+    def index_comments(self):
+        """Проиндексировать комментарии связей, дочитав отложенные"""
+        self.project.load_deferred_comments()
+        comments = {}
+        for connection in self.project.structure:
+            if connection['comment']:
+                key = (
+                    HIT_COMMENT, connection['from_classifier'], connection['from_element'],
+                    connection['to_classifier'], connection['to_element']
+                )
+                comments.setdefault(key, []).append(connection['comment'])
+        for key, texts in comments.items():
+            self._index.add(key, "\n".join(texts))
+        self.comments_indexed = True
+
+    def search(self, query):
+        """Ключи результатов поиска: признаки, затем элементы, затем комментарии"""
+        if not self.comments_indexed:
+            self.index_comments()
+        return sorted(self._index.search(query), key=lambda key: HIT_ORDER[key[0]])
+
+    def comment_text(self, key):
+        """Текст комментариев связей для результата вида HIT_COMMENT"""
+        return "; ".join(self._pair_comments(*key[1:]))
+
+    # Обновление по изменениям проекта
+
+    def _pair_comments(self, from_classifier, from_element, to_classifier, to_element):
+        return [
+            connection['comment'] for connection in self.project.structure.children(from_classifier, from_element)
+            if connection['comment']
+            and connection['to_classifier'] == to_classifier and connection['to_element'] == to_element
+        ]
+
+    def _update_node(self, classifier, element):
+        """Добавить или убрать элемент в зависимости от того, есть ли он в проекте"""
+        project = self.project
+        key = (HIT_ELEMENT, classifier, element)
+        if (project.has_element(classifier, element)
+                or project.structure.has_children(classifier, element)
+                or project.structure.has_parents(classifier, element)):
+            if key not in self._index:
+                self._index.add(key, element)
+        else:
+            self._index.remove(key)
+
+    def _update_pair(self, from_classifier, from_element, to_classifier, to_element):
+        """Обновить комментарии связей между двумя узлами и сами узлы"""
+        key = (HIT_COMMENT, from_classifier, from_element, to_classifier, to_element)
+        comments = self._pair_comments(from_classifier, from_element, to_classifier, to_element)
+        if comments:
+            self._index.add(key, "\n".join(comments))
+        else:
+            self._index.remove(key)
+        self._update_node(from_classifier, from_element)
+        self._update_node(to_classifier, to_element)
+
+    def _update_connection(self, connection):
+        self._update_pair(
+            connection['from_classifier'], connection['from_element'],
+            connection['to_classifier'], connection['to_element']
+        )
+
+    def on_change(self, change):
+        """Обновить индекс по уведомлению проекта"""
+        op = change['op']
+        index = self._index
+        if op == 'add_classifier':
+            index.add((HIT_CLASSIFIER, change['name']), change['name'])
+        elif op == 'remove_classifier':
+            index.remove((HIT_CLASSIFIER, change['name']))
+            for element in change['elements'] or ():
+                self._update_node(change['name'], element)
+        elif op == 'insert_classifier':
+            index.add((HIT_CLASSIFIER, change['name']), change['name'])
+            for element in change['elements'] or ():
+                self._update_node(change['name'], element)
+        elif op == 'rename_classifier':
+            # Переименование признака затрагивает все его связи: индекс строится заново
+            self.rebuild()
+        elif op == 'add_element':
+            self._update_node(change['classifier'], change['name'])
+        elif op == 'add_elements':
+            for name in change['names']:
+                self._update_node(change['classifier'], name)
+        elif op in ('remove_element', 'insert_element'):
+            self._update_node(change['classifier'], change['name'])
+        elif op == 'remove_elements':
+            for name in change['names']:
+                self._update_node(change['classifier'], name)
+        elif op == 'decision':
+            if change['is_valid']:
+                self._update_pair(*change['combination'])
+        elif op == 'decisions':
+            classifier1, classifier2 = change['classifier1'], change['classifier2']
+            for element1, element2 in change['significant'] + change['insignificant']:
+                self._update_pair(classifier1, element1, classifier2, element2)
+        elif op == 'patch_structure':
+            for connection in change['added'] + change['removed']:
+                self._update_connection(connection)
+        elif op == 'add_connection':
+            self._update_connection(change)
+        elif op == 'remove_node':
+            for connection in change['removed']:
+                self._update_connection(connection)
+            self._update_node(change['classifier'], change['element'])
+        elif op in ('rename_element', 'rename_node'):
+            classifier, old, new = change['classifier'], change['old'], change['new']
+            structure = self.project.structure
+            renamed = lambda c, e: old if (c, e) == (classifier, new) else e
+            for connection in structure.children(classifier, new) + structure.parents(classifier, new):
+                index.remove((
+                    HIT_COMMENT,
+                    connection['from_classifier'], renamed(connection['from_classifier'], connection['from_element']),
+                    connection['to_classifier'], renamed(connection['to_classifier'], connection['to_element'])
+                ))
+                self._update_connection(connection)
+            self._update_node(classifier, old)
+            self._update_node(classifier, new)
+        elif op in ('clear_structure', 'reset_analysis', 'restore_structure'):
+            self.rebuild()
@@ -0,0 +1,488 @@
+"""Локальный HTTP-сервис с JSON для работы с проектами без графического интерфейса.
+
+Проекты загружаются в память один раз при запуске (с повтором журнала
+изменений, как при открытии в программе) и обслуживаются одним циклом
+asyncio, поэтому одновременные клиенты не перечитывают файлы. Чтение
+выполняется сразу: обработчик не прерывается до ответа и видит
+согласованное состояние проекта. Изменения одного проекта выполняются по
+очереди под его asyncio.Lock; под той же блокировкой в отдельном потоке
+выполняются экспорт и сохранение, чтобы проект не менялся во время записи.
+Каждое изменение дописывается в журнал проекта (adpacf_journal), при
+остановке сервиса журнал сворачивается в файл проекта.
+
+Запросы (название проекта - имя файла без расширения):
+    GET  /projects                                   - список проектов со сводками
+    GET  /projects/<проект>                          - сводка по проекту
+    GET  /projects/<проект>/classifiers              - признаки
+    GET  /projects/<проект>/elements?classifier=...  - элементы признака (offset, limit)
+    POST /projects/<проект>/elements                 - {"classifier", "name"} или {"classifier", "names"}
+    GET  /projects/<проект>/combination              - следующая нерассмотренная комбинация
+    POST /projects/<проект>/decisions                - {"combination", "is_valid", "comment"} или
+                                                       {"classifier1", "classifier2", "significant",
+                                                        "insignificant", "comment"}
+    GET  /projects/<проект>/subtree?classifier=...&element=...&depth=1 - поддерево связей
+    GET  /projects/<проект>/export?format=txt        - отчёт в формате экспорта
+    POST /projects/<проект>/save                     - сохранить проект в файл
+
+Пример:
+    python adpacf_cli.py serve project.adpacf --port 8765
+    curl "http://127.0.0.1:8765/projects/project/subtree?classifier=Цели&element=Цель%201&depth=2"
+"""
+import asyncio
+import io
+import json
+import os
+import re
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from adpacf_core import Project, ProjectError
+from adpacf_export import EXPORT_FORMATS
+from adpacf_journal import ProjectJournal, replay_journal, save_atomically
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_SIZE = 16 << 20      # наибольший размер тела запроса
+MAX_PAGE_SIZE = 10000         # наибольшее число элементов в одном ответе
+MAX_SUBTREE_DEPTH = 20
+MAX_SUBTREE_NODES = 10000     # наибольшее число узлов поддерева в одном ответе
+
+EXPORT_CONTENT_TYPES = {
+    "txt": "text/plain",
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "graphml": "application/xml",
+    "dot": "text/vnd.graphviz",
+}
+
+
+class RequestError(Exception):
+    """Ошибка запроса с HTTP-статусом ответа"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ServedProject:
+    """Загруженный проект сервиса: файл, журнал и блокировка изменений"""
+
+    def __init__(self, name, path, project, journal=None):
+        self.name = name
+        self.path = path
+        self.project = project
+        self.journal = journal
+        self.lock = asyncio.Lock()
+
+    def close(self):
+        """Свернуть журнал в файл проекта и закрыть его"""
+        if self.journal is not None:
+            journal, self.journal = self.journal, None
+            journal.close(compact=True)
+
+
+def load_served_project(name, path, journal=True):
+    """Загрузить проект с повтором журнала; при journal=True продолжить журналирование"""
+    project = Project.load(path)
+    if not journal:
+        return ServedProject(name, path, project)
+    replay_journal(project, path)
+    # Журнал сворачивается сервисом в отдельном потоке, а не внутри обработчика запроса
+    return ServedProject(name, path, project, ProjectJournal(project, path))
+
+
+def subtree(structure, classifier, element, depth=1, limit=MAX_SUBTREE_NODES):
+    """Поддерево связей узла до глубины depth в виде вложенных словарей.
+
+    Узлы глубже depth помечаются has_children, чтобы клиент мог запросить их
+    отдельно; повтор узла на пути от корня помечается cycle и не раскрывается.
+    Возвращает (корень, признак того, что поддерево обрезано по limit).
+    """
+    root = {'classifier': classifier, 'element': element, 'children': []}
+    count = 1
+    truncated = False
+    stack = [(root, 0, frozenset([(classifier, element)]))]
+    while stack:
+        node, level, path = stack.pop()
+        children = structure.children(node['classifier'], node['element'])
+        if level >= depth:
+            node['has_children'] = bool(children)
+            del node['children']
+            continue
+        for connection in children:
+            if count >= limit:
+                truncated = True
+                break
+            key = (connection['to_classifier'], connection['to_element'])
+            child = {
+                'classifier': key[0], 'element': key[1], 'comment': connection['comment'], 'children': []
+            }
+            node['children'].append(child)
+            count += 1
+            if key in path:
+                child['cycle'] = True
+                del child['children']
+            else:
+                stack.append((child, level + 1, path | {key}))
+    return root, truncated
+
+
+def _query_value(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def _query_int(query, name, default, low, high):
+    value = _query_value(query, name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Параметр {name} должен быть целым числом") from None
+    return min(max(number, low), high)
+
+
+def _required(data, name):
+    if name not in data:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Не указано поле '{name}'")
+    return data[name]
+
+
+def _required_string(data, name):
+    value = _required(data, name)
+    if not isinstance(value, str):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Поле '{name}' должно быть строкой")
+    return value
+
+
+def _string_list(data, name, length=None):
+    """Список строк (length=None) или список списков из length строк из поля name"""
+    values = data.get(name, [])
+    if not isinstance(values, list):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Поле '{name}' должно быть списком")
+    for value in values:
+        items = [value] if length is None else value
+        if (length is not None and (not isinstance(value, list) or len(value) != length)) or \
+                not all(isinstance(item, str) for item in items):
+            kind = "строками" if length is None else f"списками из {length} строк"
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Элементы поля '{name}' должны быть {kind}")
+    return values
+
+
+class ProjectServer:
+    """HTTP-сервис над загруженными в память проектами"""
+
+    ROUTES = [
+        ('GET', r'/projects', 'list_projects'),
+        ('GET', r'/projects/(?P<name>[^/]+)', 'project_summary'),
+        ('GET', r'/projects/(?P<name>[^/]+)/classifiers', 'list_classifiers'),
+        ('GET', r'/projects/(?P<name>[^/]+)/elements', 'list_elements'),
+        ('POST', r'/projects/(?P<name>[^/]+)/elements', 'add_elements'),
+        ('GET', r'/projects/(?P<name>[^/]+)/combination', 'next_combination'),
+        ('POST', r'/projects/(?P<name>[^/]+)/decisions', 'record_decisions'),
+        ('GET', r'/projects/(?P<name>[^/]+)/subtree', 'get_subtree'),
+        ('GET', r'/projects/(?P<name>[^/]+)/export', 'export'),
+        ('POST', r'/projects/(?P<name>[^/]+)/save', 'save'),
+    ]
+
+    def __init__(self, projects=()):
+        self.projects = {}  # название -> ServedProject
+        self.server = None
+        self._routes = [(method, re.compile(pattern + r'/?$'), handler) for method, pattern, handler in self.ROUTES]
+        for served in projects:
+            self.add_project(served)
+
+    @classmethod
+    def from_paths(cls, paths, journal=True):
+        """Сервис над проектами из файлов; названия - имена файлов без расширения"""
+        server = cls()
+        try:
+            for path in paths:
+                name = os.path.splitext(os.path.basename(path))[0]
+                unique = name
+                number = 2
+                while unique in server.projects:
+                    unique = f"{name}-{number}"
+                    number += 1
+                server.add_project(load_served_project(unique, path, journal))
+        except BaseException:
+            server.close()
+            raise
+        return server
+
+    def add_project(self, served):
+        self.projects[served.name] = served
+
+    def close(self):
+        """Сохранить журналы проектов в файлы и закрыть их"""
+        for served in self.projects.values():
+            served.close()
+
+    # Сетевая часть
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Начать приём соединений; port=0 - свободный порт (см. self.port)"""
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1] if self.server is not None else None
+
+    async def handle_connection(self, reader, writer):
+        """Обслужить соединение: запросы HTTP/1.1 с поддержкой keep-alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    key, _, value = line.decode('latin-1').partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    await self.write_response(writer, *self.error_response(HTTPStatus.BAD_REQUEST, "Некорректный запрос"))
+                    break
+                if length > MAX_BODY_SIZE:
+                    await self.write_response(
+                        writer, *self.error_response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Слишком большой запрос")
+                    )
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = version == "HTTP/1.1" and headers.get('connection', "").lower() != "close"
+                await self.write_response(writer, *await self.respond(method, target, body), keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def write_response(self, writer, status, content_type, data, keep_alive=False):
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + data)
+        await writer.drain()
+
+    def error_response(self, status, message):
+        return status, "application/json", json.dumps({'error': message}, ensure_ascii=False).encode('utf-8')
+
+    async def respond(self, method, target, body):
+        """Выполнить запрос; вернуть (статус, тип содержимого, тело ответа)"""
+        try:
+            result = await self.dispatch(method, target, body)
+        except RequestError as e:
+            return self.error_response(e.status, str(e))
+        except ProjectError as e:
+            return self.error_response(HTTPStatus.BAD_REQUEST, str(e))
+        except (TypeError, ValueError, KeyError, IndexError) as e:
+            return self.error_response(HTTPStatus.BAD_REQUEST, f"Некорректные данные запроса: {e}")
+        except OSError as e:
+            return self.error_response(HTTPStatus.INTERNAL_SERVER_ERROR, f"Ошибка ввода-вывода: {e}")
+        except Exception as e:  # непредвиденная ошибка не должна оставлять клиента без ответа
+            return self.error_response(HTTPStatus.INTERNAL_SERVER_ERROR, f"Внутренняя ошибка: {type(e).__name__}: {e}")
+        if isinstance(result, tuple):
+            content_type, text = result
+            return HTTPStatus.OK, content_type, text.encode('utf-8')
+        return HTTPStatus.OK, "application/json", json.dumps(result, ensure_ascii=False).encode('utf-8')
+
+    async def dispatch(self, method, target, body):
+        """Найти обработчик запроса и вызвать его"""
+        url = urlsplit(target)
+        path = url.path
+        query = parse_qs(url.query)
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            arguments = {key: unquote(value) for key, value in match.groupdict().items()}
+            if 'name' in arguments:
+                served = self.projects.get(arguments.pop('name'))
+                if served is None:
+                    raise RequestError(HTTPStatus.NOT_FOUND, "Проект не найден")
+                arguments['served'] = served
+            data = None
+            if method == 'POST':
+                try:
+                    data = json.loads(body or b"{}")
+                except (ValueError, UnicodeDecodeError):
+                    raise RequestError(HTTPStatus.BAD_REQUEST, "Тело запроса должно быть JSON") from None
+                if not isinstance(data, dict):
+                    raise RequestError(HTTPStatus.BAD_REQUEST, "Тело запроса должно быть объектом JSON")
+            return await getattr(self, handler)(query=query, data=data, **arguments)
+        if allowed:
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "Метод не поддерживается")
+        raise RequestError(HTTPStatus.NOT_FOUND, "Неизвестный адрес")
+
+    # Обработчики запросов
+
+    async def list_projects(self, query, data):
+        return [{'name': name, 'summary': served.project.summary()} for name, served in self.projects.items()]
+
+    async def project_summary(self, served, query, data):
+        return served.project.summary()
+
+    async def list_classifiers(self, served, query, data):
+        return list(served.project.classifiers)
+
+    async def list_elements(self, served, query, data):
+        project = served.project
+        classifier = _query_value(query, 'classifier')
+        if classifier is None:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Не указан признак (classifier)")
+        if not project.has_classifier(classifier):
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Признак '{classifier}' не найден")
+        elements = project.elements.get(classifier, [])
+        offset = _query_int(query, 'offset', 0, 0, len(elements))
+        limit = _query_int(query, 'limit', MAX_PAGE_SIZE, 0, MAX_PAGE_SIZE)
+        return {'total': len(elements), 'offset': offset, 'elements': elements[offset:offset + limit]}
+
+    async def add_elements(self, served, query, data):
+        """Добавить элемент (name) или несколько элементов (names) - как add_element в программе"""
+        classifier = _required_string(data, 'classifier')
+        if 'names' in data:
+            names = _string_list(data, 'names')
+        else:
+            name = _required_string(data, 'name')
+        async with served.lock:
+            if not served.project.has_classifier(classifier):
+                raise RequestError(HTTPStatus.NOT_FOUND, f"Признак '{classifier}' не найден")
+            if 'names' in data:
+                added, skipped = served.project.add_elements(classifier, names)
+            else:
+                added, skipped = [served.project.add_element(classifier, name)], []
+            await self.compact_journal(served)
+        return {'added': added, 'skipped': skipped}
+
+    async def next_combination(self, served, query, data):
+        """Следующая нерассмотренная комбинация; она же становится позицией анализа"""
+        async with served.lock:
+            project = served.project
+            combination = next(project.generate_combinations(), None)
+            project.analysis_cursor = combination
+        return {'combination': list(combination) if combination is not None else None,
+                'pending': project.pending_count()}
+
+    async def record_decisions(self, served, query, data):
+        """Записать решение по комбинации (как process_combination) или решения пакетного режима"""
+        async with served.lock:
+            project = served.project
+            comment = str(data.get('comment', "")).strip()
+            if 'combination' in data:
+                combination = data['combination']
+                if not isinstance(combination, list) or len(combination) != 4 or \
+                        not all(isinstance(item, str) for item in combination):
+                    raise RequestError(HTTPStatus.BAD_REQUEST, "Комбинация - это [признак1, элемент1, признак2, элемент2]")
+                is_valid = _required(data, 'is_valid')
+                if not isinstance(is_valid, bool):
+                    raise RequestError(HTTPStatus.BAD_REQUEST, "Поле 'is_valid' должно быть true или false")
+                combination = tuple(combination)
+                for classifier, element in (combination[:2], combination[2:]):
+                    if not project.has_element(classifier, element):
+                        raise RequestError(HTTPStatus.NOT_FOUND, f"Элемент '{element}' ({classifier}) не найден")
+                project.record_decision(combination, is_valid, comment)
+                await self.compact_journal(served)
+                return {'recorded': 1}
+            classifier1 = _required_string(data, 'classifier1')
+            classifier2 = _required_string(data, 'classifier2')
+            for classifier in (classifier1, classifier2):
+                if not project.has_classifier(classifier):
+                    raise RequestError(HTTPStatus.NOT_FOUND, f"Признак '{classifier}' не найден")
+            significant = [tuple(pair) for pair in _string_list(data, 'significant', 2)]
+            insignificant = [tuple(pair) for pair in _string_list(data, 'insignificant', 2)]
+            for element1, element2 in significant + insignificant:
+                for classifier, element in ((classifier1, element1), (classifier2, element2)):
+                    if not project.has_element(classifier, element):
+                        raise RequestError(HTTPStatus.NOT_FOUND, f"Элемент '{element}' ({classifier}) не найден")
+            project.record_decisions(classifier1, classifier2, significant, insignificant, comment)
+            await self.compact_journal(served)
+        return {'recorded': len(significant) + len(insignificant)}
+
+    async def get_subtree(self, served, query, data):
+        """Поддерево связей элемента, как при раскрытии узла в дереве результатов"""
+        project = served.project
+        classifier = _query_value(query, 'classifier')
+        element = _query_value(query, 'element')
+        if classifier is None or element is None:
+            first_classifier, roots = project.root_elements()
+            return {'roots': [{'classifier': first_classifier, 'element': root} for root in roots]}
+        depth = _query_int(query, 'depth', 1, 0, MAX_SUBTREE_DEPTH)
+        root, truncated = subtree(project.structure, classifier, element, depth)
+        return {'subtree': root, 'truncated': truncated}
+
+    async def export(self, served, query, data):
+        """Отчёт в одном из форматов экспорта; формируется в потоке, пока изменения ждут"""
+        export_format = _query_value(query, 'format', "txt")
+        if export_format not in EXPORT_FORMATS:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Неизвестный формат экспорта: {export_format}")
+        back_references = _query_value(query, 'back_references', "0") not in ("0", "false", "")
+        writer = EXPORT_FORMATS[export_format][1]
+
+        def write():
+            out = io.StringIO()
+            if export_format == "txt":
+                writer(served.project, out, back_references)
+            else:
+                writer(served.project, out)
+            return out.getvalue()
+
+        async with served.lock:
+            text = await asyncio.to_thread(write)
+        return EXPORT_CONTENT_TYPES[export_format], text
+
+    async def compact_journal(self, served):
+        """Свернуть разросшийся журнал в файл проекта в отдельном потоке (вызывается под блокировкой)"""
+        journal = served.journal
+        if journal is not None and journal.compact_due:
+            try:
+                await asyncio.to_thread(journal.compact)
+            except OSError:
+                # Изменение уже записано в журнал; сохранить файл проекта попробуем позже
+                journal.postpone_compaction()
+
+    async def save(self, served, query, data):
+        """Сохранить проект в его файл и очистить журнал"""
+        async with served.lock:
+            if served.journal is not None:
+                await asyncio.to_thread(served.journal.compact)
+            else:
+                await asyncio.to_thread(save_atomically, served.project, served.path)
+        return {'saved': served.path}
+
+
+def serve(paths, host=DEFAULT_HOST, port=DEFAULT_PORT, journal=True, on_started=None):
+    """Загрузить проекты и обслуживать запросы до прерывания; затем сохранить журналы"""
+    server = ProjectServer.from_paths(paths, journal)
+
+    async def run():
+        await server.start(host, port)
+        if on_started is not None:
+            on_started(server)
+        async with server.server:
+            await server.server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
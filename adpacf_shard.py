@@ -0,0 +1,207 @@
+"""Разделение анализа связей на участки для нескольких аналитиков и слияние результатов.
+
+Нерассмотренные комбинации проекта распределяются по N участкам по
+устойчивому хешу комбинации (combination_key): каждый участок - обычный
+файл .adpacf с полной копией проекта и описанием участка, в котором
+анализ связей предлагает только комбинации своего участка. Участки
+обрабатываются независимо, затем сливаются с исходным проектом.
+
+Слияние сравнивает решения по каждой комбинации (признак1, элемент1,
+признак2, элемент2) с исходным проектом: решение участка принимается, если
+оно отличается от исходного. Если несколько участков по-разному изменили
+одну комбинацию (значимость или комментарии), это конфликт: принимается
+решение участка-владельца комбинации, а если он её не менял - участка
+с наименьшим номером. Снятие решения (например, после «Начать заново»)
+учитывается только для комбинаций своего участка. Результат не зависит
+от порядка файлов.
+
+Пример:
+    paths = write_shards(project, "project.adpacf", 4)
+    ...
+    report = merge_shards(project, [Project.load(path) for path in paths])
+    report.project.save("merged.adpacf")
+"""
+import hashlib
+import json
+import os
+
+from adpacf_core import PROJECT_EXTENSION, STAGE_ANALYSIS, Project, ProjectError, combination_key
+from adpacf_graph import ConnectionGraph
+
+MAX_REPORTED_CONFLICTS = 20  # число конфликтов, перечисляемых в тексте отчёта
+REJECTED = 'rejected'        # состояние комбинации: признана незначимой
+
+
+class MergeReport:
+    """Итоги слияния участков анализа"""
+
+    def __init__(self, project):
+        self.project = project  # проект с объединёнными решениями
+        self.merged = 0         # число участков
+        self.changed = 0        # комбинации, решения по которым взяты из участков
+        self.conflicts = []     # (комбинация, {номер участка: состояние}, выбранный участок)
+        self.missing = []       # номера участков, которых не было среди файлов
+
+    def summary(self):
+        """Текст отчёта для пользователя"""
+        lines = [
+            f"Слито участков: {self.merged}",
+            f"Изменено решений: {self.changed}",
+        ]
+        if self.missing:
+            lines.append("Отсутствуют участки: " + ", ".join(str(index + 1) for index in self.missing))
+        if self.conflicts:
+            lines.append(f"Конфликтов: {len(self.conflicts)}")
+            for combination, states, chosen in self.conflicts[:MAX_REPORTED_CONFLICTS]:
+                classifier1, element1, classifier2, element2 = combination
+                variants = "; ".join(
+                    f"участок {index + 1}: {_state_text(state)}" for index, state in sorted(states.items())
+                )
+                lines.append(
+                    f"    '{element1}' ({classifier1}) → '{element2}' ({classifier2}): {variants}; "
+                    f"принято решение участка {chosen + 1}"
+                )
+            if len(self.conflicts) > MAX_REPORTED_CONFLICTS:
+                lines.append(f"    ... и ещё {len(self.conflicts) - MAX_REPORTED_CONFLICTS}")
+        return "\n".join(lines)
+
+
+def _state_text(state):
+    if state is None:
+        return "не рассмотрена"
+    if state == REJECTED:
+        return "незначимая"
+    comments = [comment for comment in state if comment]
+    return "значимая" + (f" ({'; '.join(comments)})" if comments else "")
+
+
+def split_fingerprint(project):
+    """Отпечаток данных проекта, из которых создаются участки"""
+    data = project.to_dict()
+    content = [
+        data['classifiers'], data['elements'], data['structure'], data['rejected'], data['combination_mode']
+    ]
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def split_project(project, count):
+    """Разделить нерассмотренные комбинации проекта на count участков; вернуть проекты участков"""
+    if count < 1:
+        raise ProjectError("Число участков должно быть положительным")
+    if project.shard is not None:
+        raise ProjectError("Проект уже является участком анализа")
+    data = project.to_dict()
+    split = split_fingerprint(project)
+    shards = []
+    for index in range(count):
+        shard = Project.from_dict(data)
+        shard.project_name = f"{project.project_name} - участок {index + 1} из {count}"
+        shard.current_stage = STAGE_ANALYSIS
+        shard.analysis_cursor = None
+        shard.shard = {'index': index, 'count': count, 'split': split}
+        shards.append(shard)
+    return shards
+
+
+def shard_path(project_path, index, count):
+    """Путь к файлу участка рядом с файлом проекта"""
+    root = os.path.splitext(project_path)[0]
+    return f"{root}.part{index + 1}of{count}{PROJECT_EXTENSION}"
+
+
+def write_shards(project, project_path, count):
+    """Создать файлы участков рядом с файлом проекта; вернуть их пути"""
+    paths = []
+    for index, shard in enumerate(split_project(project, count)):
+        path = shard_path(project_path, index, count)
+        shard.save(path)
+        paths.append(path)
+    return paths
+
+
+def combination_states(project):
+    """Решения проекта: комбинация -> кортеж комментариев значимых связей или REJECTED"""
+    comments = {}
+    for connection in project.structure:
+        combination = (
+            connection['from_classifier'], connection['from_element'],
+            connection['to_classifier'], connection['to_element']
+        )
+        comments.setdefault(combination, []).append(connection['comment'])
+    states = {combination: tuple(sorted(texts)) for combination, texts in comments.items()}
+    for combination in project.rejected:
+        states.setdefault(combination, REJECTED)
+    return states
+
+
+def _check_shards(base, shards):
+    """Проверить, что участки созданы из base и не повторяются; вернуть их, упорядоченные по номеру"""
+    split = split_fingerprint(base)
+    by_index = {}
+    count = None
+    for shard in shards:
+        description = shard.shard
+        if description is None:
+            raise ProjectError(f"Проект '{shard.project_name}' не является участком анализа")
+        if description.get('split') != split:
+            raise ProjectError(f"Участок '{shard.project_name}' создан из другой версии проекта")
+        if count is not None and description['count'] != count:
+            raise ProjectError("Участки относятся к разным разбиениям проекта")
+        count = description['count']
+        if description['index'] in by_index:
+            raise ProjectError(f"Участок {description['index'] + 1} указан несколько раз")
+        if shard.classifiers != base.classifiers or shard.elements != base.elements:
+            raise ProjectError(f"В участке '{shard.project_name}' изменены признаки или элементы")
+        by_index[description['index']] = shard
+    return count, [by_index[index] for index in sorted(by_index)]
+
+
+def merge_shards(base, shards):
+    """Слить решения участков с исходным проектом; вернуть MergeReport с новым проектом"""
+    if not shards:
+        raise ProjectError("Не указано ни одного участка")
+    count, shards = _check_shards(base, shards)
+    base_states = combination_states(base)
+    shard_states = [(shard.shard['index'], combination_states(shard)) for shard in shards]
+
+    # Комбинации в детерминированном порядке: сначала исходного проекта, затем новые по участкам
+    order = dict.fromkeys(base_states)
+    for _, states in shard_states:
+        order.update(dict.fromkeys(states))
+
+    merged = Project.from_dict(base.to_dict())
+    report = MergeReport(merged)
+    report.merged = len(shards)
+    report.missing = [index for index in range(count or 0) if index not in {i for i, _ in shard_states}]
+    final = {}
+    for combination in order:
+        before = base_states.get(combination)
+        owner = combination_key(combination) % count
+        changes = {}
+        for index, states in shard_states:
+            state = states.get(combination)
+            if state != before and (state is not None or index == owner):
+                changes[index] = state
+        if not changes:
+            final[combination] = before
+            continue
+        report.changed += 1
+        if len(set(changes.values())) == 1:
+            final[combination] = next(iter(changes.values()))
+            continue
+        chosen = owner if owner in changes else min(changes)
+        final[combination] = changes[chosen]
+        report.conflicts.append((combination, changes, chosen))
+
+    structure = ConnectionGraph()
+    rejected = {}
+    for combination, state in final.items():
+        if state == REJECTED:
+            rejected[combination] = None
+        elif state is not None:
+            for comment in state:
+                structure.add(*combination, comment)
+    merged.structure = structure
+    merged.rejected = rejected
+    merged.analysis_cursor = None
+    return report
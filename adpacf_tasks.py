@@ -0,0 +1,165 @@
+"""Фоновое выполнение долгих операций: открытие, сохранение и экспорт проекта.
+
+Операция выполняется в отдельном потоке (ThreadPoolExecutor), а окно Tk
+опрашивает её через root.after и получает результат в своём потоке. На время
+операции показывается модальное окно с индикатором прогресса и кнопкой
+отмены; оно захватывает ввод (grab), поэтому изменить проект во время
+операции нельзя.
+
+Операции сообщают о прогрессе и проверяют отмену через TaskControl:
+control.progress(done, total) записывает прогресс и прерывает операцию
+исключением TaskCancelled, если пользователь нажал «Отмена».
+"""
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk
+
+POLL_INTERVAL_MS = 100  # период опроса фоновой операции окном
+WRITE_CHECK_EVERY = 4096  # число записей в файл между проверками отмены
+
+
+class TaskCancelled(Exception):
+    """Операция отменена пользователем"""
+
+
+class TaskControl:
+    """Прогресс фоновой операции и запрос её отмены"""
+
+    def __init__(self):
+        self._cancel_event = threading.Event()
+        self.done = 0
+        self.total = None  # None - объём работы неизвестен
+
+    def cancel(self):
+        """Попросить операцию остановиться"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check(self):
+        """Прервать операцию, если она отменена"""
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def progress(self, done, total=None):
+        """Сообщить прогресс и прервать операцию, если она отменена"""
+        self.done = done
+        self.total = total
+        self.check()
+
+    def wrap_file(self, file):
+        """Файл для записи, проверяющий отмену операции"""
+        return _ControlledWriter(file, self)
+
+
+class _ControlledWriter:
+    """Обёртка файла: считает записанные символы и периодически проверяет отмену"""
+
+    def __init__(self, file, control):
+        self._file = file
+        self._control = control
+        self._written = 0
+        self._writes = 0
+
+    def write(self, data):
+        self._writes += 1
+        self._written += len(data)
+        if self._writes >= WRITE_CHECK_EVERY:
+            self._writes = 0
+            self._control.progress(self._written)
+        return self._file.write(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class TaskRunner:
+    """Запуск операций в фоновом потоке с окном прогресса"""
+
+    def __init__(self, root):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="adpacf")
+        self._window = None
+
+    @property
+    def busy(self):
+        """Выполняется ли сейчас операция"""
+        return self._window is not None
+
+    def run(self, title, function, on_success, on_error=None, on_cancel=None):
+        """Выполнить function(control) в фоне.
+
+        По завершении в потоке окна вызывается on_success(результат),
+        on_error(исключение) или on_cancel().
+        """
+        if self.busy:
+            return False
+        control = TaskControl()
+        self._show_window(title, control)
+        future = self._executor.submit(function, control)
+        self.root.after(POLL_INTERVAL_MS, self._poll, future, control, on_success, on_error, on_cancel)
+        return True
+
+    def shutdown(self):
+        """Отменить текущую операцию и остановить поток"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _show_window(self, title, control):
+        window = self._window = tk.Toplevel(self.root)
+        window.title(title)
+        window.resizable(False, False)
+        window.transient(self.root)
+        ttk.Label(window, text=title).pack(padx=20, pady=(15, 5))
+        self._bar = ttk.Progressbar(window, length=300, mode='indeterminate')
+        self._bar.pack(padx=20, pady=5)
+        self._bar.start()
+        self._cancel_button = ttk.Button(window, text="Отмена", command=lambda: self._cancel(control))
+        self._cancel_button.pack(pady=(5, 15))
+        window.protocol("WM_DELETE_WINDOW", lambda: self._cancel(control))
+        window.grab_set()
+
+    def _cancel(self, control):
+        control.cancel()
+        self._cancel_button.config(text="Отмена...", state=tk.DISABLED)
+
+    def _update_window(self, control):
+        total = control.total
+        if total:
+            if str(self._bar.cget('mode')) != 'determinate':
+                self._bar.stop()
+                self._bar.config(mode='determinate', maximum=100)
+            self._bar['value'] = min(100, 100 * control.done / total)
+        elif str(self._bar.cget('mode')) != 'indeterminate':
+            self._bar.config(mode='indeterminate')
+            self._bar.start()
+
+    def _close_window(self):
+        window, self._window = self._window, None
+        window.grab_release()
+        window.destroy()
+
+    def _poll(self, future, control, on_success, on_error, on_cancel):
+        if not future.done():
+            self._update_window(control)
+            self.root.after(POLL_INTERVAL_MS, self._poll, future, control, on_success, on_error, on_cancel)
+            return
+        self._close_window()
+        try:
+            result = future.result()
+        except TaskCancelled:
+            if on_cancel is not None:
+                on_cancel()
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+            else:
+                raise
+        else:
+            on_success(result)
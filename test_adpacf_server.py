@@ -0,0 +1,165 @@
+"""Проверки HTTP-сервиса adpacf_server на локальном адресе со свободным портом.
+
+Запуск: python -m unittest test_adpacf_server (или python -m pytest)
+"""
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from adpacf_core import Project
+from adpacf_journal import replay_journal
+from adpacf_server import ProjectServer
+
+
+def make_project():
+    """Небольшой проект: два признака по два элемента"""
+    project = Project()
+    project.add_classifier("A")
+    project.add_classifier("B")
+    project.add_elements("A", ["a1", "a2"])
+    project.add_elements("B", ["b1", "b2"])
+    return project
+
+
+class ProjectServerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "demo.adpacf")
+        make_project().save(self.path)
+        self.server = ProjectServer.from_paths([self.path])
+        await self.server.start("127.0.0.1", 0)
+        self.project = self.server.projects["demo"].project
+
+    async def asyncTearDown(self):
+        self.server.server.close()
+        await self.server.server.wait_closed()
+        self.server.close()
+        self.directory.cleanup()
+
+    async def request(self, method, path, data=None, body=None):
+        """Выполнить запрос; вернуть (код ответа, разобранное тело JSON)"""
+        if body is None:
+            body = b"" if data is None else json.dumps(data).encode('utf-8')
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        await writer.wait_closed()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        self.assertTrue(payload, "сервис закрыл соединение без ответа")
+        status = int(head.split()[1])
+        return status, json.loads(payload)
+
+    async def test_summary(self):
+        status, result = await self.request("GET", "/projects")
+        self.assertEqual(status, 200)
+        self.assertEqual([project['name'] for project in result], ["demo"])
+
+    async def test_unknown_route_and_project(self):
+        self.assertEqual((await self.request("GET", "/nowhere"))[0], 404)
+        self.assertEqual((await self.request("GET", "/projects/missing"))[0], 404)
+        self.assertEqual((await self.request("DELETE", "/projects/demo"))[0], 405)
+
+    async def test_invalid_json(self):
+        status, result = await self.request("POST", "/projects/demo/elements", body=b"{not json")
+        self.assertEqual(status, 400)
+        self.assertIn('error', result)
+        self.assertEqual((await self.request("POST", "/projects/demo/elements", body=b"[1]"))[0], 400)
+
+    async def test_add_elements_rejects_non_strings(self):
+        for data in ({'classifier': "A", 'name': 5}, {'classifier': "A", 'names': ["x", 7]},
+                     {'classifier': "A", 'names': "x"}, {'classifier': 1, 'name': "x"}):
+            status, result = await self.request("POST", "/projects/demo/elements", data)
+            self.assertEqual(status, 400, data)
+            self.assertIn('error', result)
+        self.assertEqual(self.project.elements["A"], ["a1", "a2"])
+
+    async def test_add_elements_unknown_classifier(self):
+        status, _ = await self.request("POST", "/projects/demo/elements", {'classifier': "Z", 'name': "x"})
+        self.assertEqual(status, 404)
+
+    async def test_add_elements_response(self):
+        status, result = await self.request("POST", "/projects/demo/elements", {'classifier': "A", 'name': "a3"})
+        self.assertEqual((status, result), (200, {'added': ["a3"], 'skipped': []}))
+        status, result = await self.request(
+            "POST", "/projects/demo/elements", {'classifier': "A", 'names': ["a4", "a1"]}
+        )
+        self.assertEqual((status, result), (200, {'added': ["a4"], 'skipped': ["a1"]}))
+
+    async def test_decision_requires_boolean(self):
+        for is_valid in ("false", "0", 0, None):
+            status, _ = await self.request("POST", "/projects/demo/decisions", {
+                'combination': ["A", "a1", "B", "b1"], 'is_valid': is_valid
+            })
+            self.assertEqual(status, 400, is_valid)
+        self.assertEqual(len(self.project.structure), 0)
+        self.assertFalse(self.project.rejected)
+
+    async def test_decision_unknown_element(self):
+        status, _ = await self.request("POST", "/projects/demo/decisions", {
+            'combination': ["A", "nope", "B", "b1"], 'is_valid': True
+        })
+        self.assertEqual(status, 404)
+        self.assertEqual(len(self.project.structure), 0)
+
+    async def test_bulk_decisions_unknown_elements(self):
+        for data in ({'classifier1': "A", 'classifier2': "B", 'significant': [["nope", "nah"]]},
+                     {'classifier1': "A", 'classifier2': "B", 'significant': [["a1", "b1"]],
+                      'insignificant': [["a2", "nah"]]}):
+            status, _ = await self.request("POST", "/projects/demo/decisions", data)
+            self.assertEqual(status, 404, data)
+        self.assertEqual(len(self.project.structure), 0)
+        self.assertFalse(self.project.rejected)
+        self.assertEqual(self.project.validate(), [])
+
+    async def test_bulk_decisions_bad_pairs(self):
+        for pairs in ([["a1"]], [["a1", 2]], "a1"):
+            status, _ = await self.request("POST", "/projects/demo/decisions", {
+                'classifier1': "A", 'classifier2': "B", 'significant': pairs
+            })
+            self.assertEqual(status, 400, pairs)
+
+    async def test_bulk_decisions(self):
+        status, result = await self.request("POST", "/projects/demo/decisions", {
+            'classifier1': "A", 'classifier2': "B", 'significant': [["a1", "b1"]], 'insignificant': [["a2", "b2"]]
+        })
+        self.assertEqual((status, result), (200, {'recorded': 2}))
+        self.assertTrue(self.project.structure.has_edge("A", "a1", "B", "b1"))
+        self.assertIn(("A", "a2", "B", "b2"), self.project.rejected)
+
+    async def test_unexpected_error_returns_json(self):
+        async def broken(served, query, data):
+            raise RuntimeError("сбой")
+        self.server.project_summary = broken
+        status, result = await self.request("GET", "/projects/demo")
+        self.assertEqual(status, 500)
+        self.assertIn("RuntimeError", result['error'])
+
+    async def test_save_and_journal(self):
+        await self.request("POST", "/projects/demo/elements", {'classifier': "B", 'name': "b3"})
+        status, _ = await self.request("POST", "/projects/demo/save", {})
+        self.assertEqual(status, 200)
+        self.assertEqual(Project.load(self.path).elements["B"], ["b1", "b2", "b3"])
+
+    async def test_failed_compaction_keeps_change(self):
+        journal = self.server.projects["demo"].journal
+        journal._compact_at = 1
+        with mock.patch("adpacf_journal.save_atomically", side_effect=OSError("диск заполнен")):
+            status, _ = await self.request("POST", "/projects/demo/elements", {'classifier': "B", 'name': "b3"})
+        self.assertEqual(status, 200)
+        self.assertFalse(journal.compact_due)
+        project = Project.load(self.path)
+        replay_journal(project, self.path)
+        self.assertEqual(project.elements["B"], ["b1", "b2", "b3"])
+
+
+if __name__ == "__main__":
+    unittest.main()